@@ -0,0 +1,38 @@
+"""Batch-scoped memoization: CURRENT_DATE_STR(month) across many records.
+
+python benchmarks/bench_call_cache.py
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import document_placeholder.functions.date  # noqa: E402,F401
+from document_placeholder.call_cache import CallCache  # noqa: E402
+from document_placeholder.evaluator import Evaluator  # noqa: E402
+
+VALUE = "Invoice {ORDER}, {CURRENT_DATE_STR(month)} {CURRENT_DATE_NUM(year)}"
+RECORDS = 10_000
+
+
+def _run(call_cache: CallCache | None) -> float:
+    start = time.perf_counter()
+    for order in range(RECORDS):
+        Evaluator({"ORDER": order}, call_cache=call_cache).evaluate_value(VALUE)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    print(f"{RECORDS} records")
+    print(f"  per-record cache     {_run(None) * 1e3:8.1f} ms")
+    cache = CallCache()
+    elapsed = _run(cache)
+    print(f"  shared batch cache   {elapsed * 1e3:8.1f} ms  ({cache.misses} calls)")
+
+
+if __name__ == "__main__":
+    main()
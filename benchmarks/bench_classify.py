@@ -0,0 +1,58 @@
+"""Evaluating raw config values: cached classification vs SyntaxError probe.
+
+python benchmarks/bench_classify.py
+"""
+
+from __future__ import annotations
+
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import document_placeholder.functions.string  # noqa: E402,F401
+from document_placeholder.evaluator import Evaluator  # noqa: E402
+
+VALUES = [
+    "Payment is due within 30 days of the invoice date.",
+    "Dear {UPPER(NAME)}, thank you for your order.",
+    "UPPER(NAME)",
+]
+NUMBER = 20_000
+REPEAT = 5
+
+
+def probe(ev: Evaluator, value: str):
+    """Previous behaviour: parse as an expression, fall back on SyntaxError."""
+    try:
+        return ev.evaluate_expression(value)
+    except SyntaxError:
+        pass
+    if "{" in value:
+        return ev.evaluate_template(value)
+    return value
+
+
+def main() -> None:
+    ev = Evaluator({"NAME": "Acme"})
+    print(f"{NUMBER} evaluations per value, best of {REPEAT}")
+    print(f"  {'value':52} {'probe':>9} {'classify':>9}")
+    for value in VALUES:
+        assert probe(ev, value) == ev.evaluate_value(value)
+        probed = min(
+            timeit.repeat(lambda: probe(ev, value), number=NUMBER, repeat=REPEAT)
+        )
+        classified = min(
+            timeit.repeat(
+                lambda: ev.evaluate_value(value), number=NUMBER, repeat=REPEAT
+            )
+        )
+        print(
+            f"  {value[:52]:52} {probed / NUMBER * 1e6:7.2f}us"
+            f" {classified / NUMBER * 1e6:7.2f}us"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Benchmark repeated renders: DocumentProcessor vs CompiledTemplate.
+
+python benchmarks/bench_compiled.py
+"""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from docx import Document  # noqa: E402
+
+from document_placeholder.processor import (  # noqa: E402
+    CompiledTemplate,
+    DocumentProcessor,
+)
+
+PARAGRAPHS = 2000
+PLACEHOLDER_EVERY = 20
+RENDERS = 20
+
+
+def _build_template(path: Path) -> None:
+    doc = Document()
+    for i in range(PARAGRAPHS):
+        if i % PLACEHOLDER_EVERY == 0:
+            doc.add_paragraph(f"Line {i}: {{KEY_{i}}}")
+        else:
+            doc.add_paragraph(f"Line {i}: boilerplate prose without markers.")
+    doc.save(str(path))
+
+
+def main() -> None:
+    values = {f"KEY_{i}": f"value {i}" for i in range(0, PARAGRAPHS, PLACEHOLDER_EVERY)}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "template.docx"
+        _build_template(path)
+
+        start = time.perf_counter()
+        for _ in range(RENDERS):
+            DocumentProcessor(path).replace_placeholders(values)
+        processor_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        compiled = CompiledTemplate(path)
+        compile_time = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(RENDERS):
+            compiled.render(values)
+        render_time = time.perf_counter() - start
+
+    print(f"{PARAGRAPHS} paragraphs, {len(values)} placeholders, {RENDERS} renders")
+    print(f"  DocumentProcessor  {processor_time / RENDERS * 1000:8.1f} ms/render")
+    print(f"  CompiledTemplate   {render_time / RENDERS * 1000:8.1f} ms/render")
+    print(f"  (one-time compile  {compile_time * 1000:8.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
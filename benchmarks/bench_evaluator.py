@@ -0,0 +1,49 @@
+"""Microbenchmark: AST interpreter vs compiled closures.
+
+python benchmarks/bench_evaluator.py
+"""
+
+from __future__ import annotations
+
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import document_placeholder.functions.logic  # noqa: E402,F401
+import document_placeholder.functions.math  # noqa: E402,F401
+import document_placeholder.functions.string  # noqa: E402,F401
+from document_placeholder.compiler import compile_ast  # noqa: E402
+from document_placeholder.evaluator import Evaluator  # noqa: E402
+from document_placeholder.parser import Parser, Tokenizer  # noqa: E402
+
+EXPRESSIONS = [
+    "PRICE * QTY",
+    "ROUND(PRICE * QTY * 1.2, 2)",
+    "IF(PRICE * QTY > 1000, 'Premium', 'Standard')",
+    "(PRICE + 10) * (QTY - 1) / 3 % 7 >= 12",
+    "UPPER(NAME) + ' / ' + LOWER(NAME)",
+]
+NUMBER = 100_000
+
+
+def main() -> None:
+    variables = {"PRICE": 125.5, "QTY": 7, "NAME": "Acme"}
+    ev = Evaluator(variables)
+    print(f"{NUMBER} evaluations per expression")
+    print(f"  {'expression':48} {'interpret':>10} {'compiled':>10} {'speedup':>8}")
+    for text in EXPRESSIONS:
+        ast = Parser(Tokenizer(text).tokens).parse()
+        compiled = compile_ast(ast)
+        assert compiled(variables) == ev.evaluate(ast)
+        interpreted = timeit.timeit(lambda: ev.evaluate(ast), number=NUMBER)
+        closures = timeit.timeit(lambda: compiled(variables), number=NUMBER)
+        print(
+            f"  {text:48} {interpreted / NUMBER * 1e6:8.2f}us"
+            f" {closures / NUMBER * 1e6:8.2f}us {interpreted / closures:7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Benchmark a logo repeated across a document: per-call add_picture vs dedup.
+
+python benchmarks/bench_images.py
+"""
+
+from __future__ import annotations
+
+import base64
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from docx import Document  # noqa: E402
+
+from document_placeholder.image_value import ImageValue  # noqa: E402
+from document_placeholder.processor import (  # noqa: E402
+    DocumentProcessor,
+    _PictureSet,
+    prefetch_images,
+)
+
+# 1×1 red PNG
+PNG_BYTES = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAIAAACQd1PeAAAADElEQVR4nGP4z8AAAAMBAQDJ/pLvAAAAAElFTkSuQmCC"
+)
+
+SECTIONS = 20
+ROWS_PER_SECTION = 25
+RENDERS = 5
+
+
+def _build_template(path: Path) -> None:
+    doc = Document()
+    for s in range(SECTIONS):
+        section = doc.sections[0] if s == 0 else doc.add_section()
+        section.header.is_linked_to_previous = False
+        section.header.paragraphs[0].text = "{LOGO} Header"
+        table = doc.add_table(rows=ROWS_PER_SECTION, cols=2)
+        for row in table.rows:
+            row.cells[0].text = "{LOGO}"
+            row.cells[1].text = "Item"
+    doc.save(str(path))
+
+
+def _fill(template: Path, values: dict, dedup: bool) -> DocumentProcessor:
+    proc = DocumentProcessor(template)
+    pictures = _PictureSet(prefetch_images(values)) if dedup else None
+    for paragraph in proc.iter_paragraphs(proc.doc):
+        DocumentProcessor._replace_in_paragraph(paragraph, values, pictures)
+    return proc
+
+
+def _measure(template: Path, out: Path, values: dict, dedup: bool):
+    fill = save = 0.0
+    for _ in range(RENDERS):
+        start = time.perf_counter()
+        proc = _fill(template, values, dedup)
+        fill += time.perf_counter() - start
+        start = time.perf_counter()
+        proc.save(out)
+        save += time.perf_counter() - start
+    return fill / RENDERS, save / RENDERS, out.stat().st_size
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        logo = Path(tmp) / "logo.png"
+        logo.write_bytes(PNG_BYTES)
+        template = Path(tmp) / "template.docx"
+        _build_template(template)
+        values = {"LOGO": ImageValue(str(logo), 1.0)}
+        out = Path(tmp) / "out.docx"
+
+        occurrences = SECTIONS * (ROWS_PER_SECTION + 1)
+        print(f"{occurrences} logo occurrences in {SECTIONS} sections")
+        for label, dedup in (("add_picture per call", False), ("deduplicated", True)):
+            fill, save, size = _measure(template, out, values, dedup)
+            print(
+                f"  {label:22} fill {fill * 1000:7.1f} ms"
+                f"  save {save * 1000:7.1f} ms  size {size / 1024:7.1f} KiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Benchmark placeholder replacement as the number of config keys grows.
+
+Compares the single-pass scanner in ``DocumentProcessor`` with the previous
+per-key loop (reproduced below as ``_per_key_replace``).
+
+    python benchmarks/bench_placeholders.py
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from docx import Document  # noqa: E402
+
+from document_placeholder.processor import DocumentProcessor  # noqa: E402
+
+PARAGRAPHS = 800
+KEY_COUNTS = (10, 50, 100, 300, 1000)
+
+
+def _per_key_replace(paragraph, values: dict) -> None:
+    """The former O(keys) text pass, kept here as a baseline."""
+    runs = paragraph.runs
+    if not runs:
+        return
+    full_text = "".join(run.text for run in runs)
+    new_text = full_text
+    for key, value in values.items():
+        placeholder = "{" + key + "}"
+        if placeholder in new_text:
+            new_text = new_text.replace(placeholder, str(value))
+    if new_text != full_text:
+        runs[0].text = new_text
+        for run in runs[1:]:
+            run.text = ""
+
+
+def _build_doc(keys: list[str]):
+    doc = Document()
+    for i in range(PARAGRAPHS):
+        key = keys[i % len(keys)]
+        doc.add_paragraph(f"Line {i}: value of {{{key}}} goes here, rest is prose.")
+    return doc
+
+
+def _time(replace, keys: list[str], values: dict) -> float:
+    doc = _build_doc(keys)
+    start = time.perf_counter()
+    for paragraph in doc.paragraphs:
+        replace(paragraph, values)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    print(f"{PARAGRAPHS} paragraphs")
+    print(f"{'keys':>6}  {'per-key ms':>11}  {'single-pass ms':>15}  {'speedup':>8}")
+    for count in KEY_COUNTS:
+        keys = [f"KEY_{i}" for i in range(count)]
+        values = {k: f"v{i}" for i, k in enumerate(keys)}
+        old = _time(_per_key_replace, keys, values)
+        new = _time(DocumentProcessor._replace_in_paragraph, keys, values)
+        print(
+            f"{count:>6}  {old * 1000:>11.1f}  {new * 1000:>15.1f}  {old / new:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Placeholder evaluation with I/O-bound keys, sequential vs. on a thread pool.
+
+python benchmarks/bench_scheduler.py
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import document_placeholder.functions.math  # noqa: E402,F401
+from document_placeholder.evaluator import Evaluator  # noqa: E402
+from document_placeholder.functions import FunctionRegistry  # noqa: E402
+
+LATENCY = 0.02  # seconds per simulated lookup (HTTP image, remote query, ...)
+KEYS = 12
+
+
+@FunctionRegistry.register("LOOKUP")
+def lookup(value):
+    time.sleep(LATENCY)
+    return value
+
+
+def main() -> None:
+    placeholders = {f"K{i}": f"LOOKUP({i})" for i in range(KEYS)}
+    placeholders["TOTAL"] = " + ".join(placeholders)
+    print(f"{KEYS} independent keys at {LATENCY * 1000:.0f} ms each, plus TOTAL")
+    for workers in (1, 2, 4, 8):
+        start = time.perf_counter()
+        values = Evaluator().evaluate_placeholders(placeholders, max_workers=workers)
+        elapsed = time.perf_counter() - start
+        assert values["TOTAL"] == sum(range(KEYS))
+        print(f"  workers={workers}  {elapsed * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
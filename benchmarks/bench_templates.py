@@ -0,0 +1,47 @@
+"""Template-string rendering: DESCRIPTION-style values and OUTPUT_NAME.
+
+python benchmarks/bench_templates.py
+"""
+
+from __future__ import annotations
+
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import document_placeholder.functions.string  # noqa: E402,F401
+from document_placeholder.evaluator import Evaluator  # noqa: E402
+
+DESCRIPTION = "\n".join(
+    [
+        "Client: {UPPER(NAME)}",
+        "Order {ORDER} placed on behalf of {NAME}, {CITY}.",
+        "Total: {PRICE * QTY} EUR ({QTY} items at {PRICE} EUR each).",
+        "Delivery is free of charge for orders above 1000 EUR.",
+        "Please quote the order number in every reply.",
+    ]
+)
+OUTPUT_NAME = "Invoice-{ORDER}-{NAME}-{UPPER(CITY)}"
+NUMBER = 20_000
+
+
+def main() -> None:
+    record = {"NAME": "Acme", "CITY": "Berlin", "ORDER": 1042, "PRICE": 12.5, "QTY": 3}
+    ev = Evaluator(record)
+    cases = [
+        (
+            f"DESCRIPTION ({len(DESCRIPTION)} chars)",
+            lambda: ev.evaluate_template(DESCRIPTION),
+        ),
+        ("OUTPUT_NAME", lambda: ev.resolve_output_name(OUTPUT_NAME, record)),
+    ]
+    print(f"{NUMBER} renders per template")
+    for label, func in cases:
+        seconds = timeit.timeit(func, number=NUMBER) / NUMBER
+        print(f"  {label:28} {seconds * 1e6:8.2f}us")
+
+
+if __name__ == "__main__":
+    main()
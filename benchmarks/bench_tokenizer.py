@@ -0,0 +1,37 @@
+"""Tokenizer throughput on long expressions and template parts.
+
+python benchmarks/bench_tokenizer.py
+"""
+
+from __future__ import annotations
+
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from document_placeholder.parser import Tokenizer  # noqa: E402
+
+SNIPPETS = [
+    "IF(TOTAL >= 1000, 'Premium client', 'Standard client')",
+    "ROUND(PRICE * 1.2 + SHIPPING - DISCOUNT / 3, 2)",
+    'JOIN(\', \', UPPER(NAME), "Street \\"Main\\" 12", CITY)',
+    "DATE_FORMAT(TODAY() - DAYS(30), '%d.%m.%Y') != ''",
+]
+REPEAT = 200
+NUMBER = 50
+
+
+def main() -> None:
+    text = " + ".join(SNIPPETS * REPEAT)
+    tokens = len(Tokenizer(text).tokens)
+    seconds = timeit.timeit(lambda: Tokenizer(text), number=NUMBER) / NUMBER
+    print(f"{len(text)} characters, {tokens} tokens")
+    print(f"  {seconds * 1000:8.2f} ms per pass")
+    print(f"  {len(text) / seconds / 1e6:8.2f} M chars/s")
+    print(f"  {tokens / seconds / 1e6:8.2f} M tokens/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Column-wise vs per-record evaluation of batch placeholders.
+
+python benchmarks/bench_vectorized.py
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import document_placeholder.functions.date  # noqa: E402,F401
+import document_placeholder.functions.logic  # noqa: E402,F401
+import document_placeholder.functions.math  # noqa: E402,F401
+import document_placeholder.functions.string  # noqa: E402,F401
+from document_placeholder import vectorized  # noqa: E402
+from document_placeholder.call_cache import CallCache  # noqa: E402
+from document_placeholder.dependencies import DependencyGraph  # noqa: E402
+from document_placeholder.evaluator import Evaluator  # noqa: E402
+from document_placeholder.vectorized import ColumnEvaluator  # noqa: E402
+
+PLACEHOLDERS = {
+    "NET": "PRICE * QTY",
+    "TAX": "NET * 0.2",
+    "TOTAL": "NET + TAX",
+    "PREMIUM": "TOTAL > 1000",
+    "CLIENT": "UPPER(NAME)",
+    "AMOUNT": "FORMAT_NUM(TOTAL)",
+    "LINE": "Dear {CLIENT}, {QTY} items: {AMOUNT} EUR ({CURRENT_DATE_STR(month)})",
+}
+RECORDS = 10_000
+
+
+def main() -> None:
+    random.seed(0)
+    records = [
+        {
+            "NAME": f"client {i}",
+            "PRICE": round(random.uniform(1, 500), 2),
+            "QTY": random.randint(1, 20),
+        }
+        for i in range(RECORDS)
+    ]
+    graph = DependencyGraph(PLACEHOLDERS, exclude=records[0])
+
+    start = time.perf_counter()
+    cache = CallCache()
+    for record in records:
+        Evaluator(record, call_cache=cache).evaluate_placeholders(PLACEHOLDERS, graph)
+    per_record = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ColumnEvaluator.from_records(records).evaluate_placeholders(PLACEHOLDERS, graph)
+    columns = time.perf_counter() - start
+
+    numpy = "with NumPy" if vectorized.available() else "without NumPy"
+    print(f"{RECORDS} records, {len(PLACEHOLDERS)} keys ({numpy})")
+    print(f"  per record    {per_record * 1e3:8.1f} ms")
+    print(f"  column-wise   {columns * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,498 @@
+"""Mail-merge batch mode: render one document per record.
+
+Records come from a CSV file, a JSONL file, or a SQL query run through the
+connection in :mod:`document_placeholder.functions.sql`. Every record field is
+available to expressions as a variable (``TOTAL: PRICE * 1.2``) and to the
+template as a ``{FIELD}`` placeholder; config keys take precedence over fields
+of the same name in the template, fields over keys inside expressions.
+
+Rendering runs on a ``ProcessPoolExecutor``. Each worker parses the config,
+compiles the template and opens the database once, then renders as many
+records as it is handed. Exports to PDF and other formats happen in the
+calling process through :mod:`document_placeholder.exporter`, so a warm
+office pool set there serves the whole batch. ``ON_START`` / ``ON_END`` run
+around every record, exactly as for a single render, so a config with such
+hooks (e.g. a shared invoice counter) renders on one worker unless told
+otherwise. Documents are saved under a temporary name and moved into place
+by the calling process, which fails any record whose output name an earlier
+record already used.
+
+Before rendering, the keys whose values do not depend on rendering order
+(pure functions, today's date, arithmetic on record fields) are evaluated
+for all records at once by :class:`~document_placeholder.vectorized.ColumnEvaluator`;
+the workers evaluate only the remaining keys.
+
+Timings go to the active :mod:`~document_placeholder.profiling` profile; each
+worker process profiles its own renders and sends the timings back with the
+results.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+import document_placeholder.functions.date  # noqa: F401 — register functions
+import document_placeholder.functions.image  # noqa: F401
+import document_placeholder.functions.logic  # noqa: F401
+import document_placeholder.functions.math  # noqa: F401
+import document_placeholder.functions.string  # noqa: F401
+import document_placeholder.functions.sql as sql_mod
+from document_placeholder.budget import Budget, get_budget, set_budget
+from document_placeholder.call_cache import CallCache
+from document_placeholder.config import Config
+from document_placeholder.dependencies import DependencyGraph, used_keys
+from document_placeholder.evaluator import Evaluator
+from document_placeholder.exporter import (
+    DEFAULT_CHUNK_SIZE,
+    ExportError,
+    export_documents,
+)
+from document_placeholder.image_resize import get_image_resize, set_image_resize
+from document_placeholder.processor import CompiledTemplate
+from document_placeholder.profiling import Profile, get_profile, set_profile, stage
+from document_placeholder.scheduler import get_max_workers, set_max_workers
+from document_placeholder.vectorized import ColumnEvaluator
+
+# ---------------------------------------------------------------------------
+# Record sources
+# ---------------------------------------------------------------------------
+
+
+def load_records(path: str | Path) -> list[dict[str, Any]]:
+    """Read records from a ``.csv`` or ``.jsonl`` file.
+
+    CSV values stay strings; use ``INT()`` / ``FLOAT()`` in expressions.
+    """
+    path = Path(path)
+    ext = path.suffix.lower()
+    if ext == ".csv":
+        with open(path, "r", encoding="utf-8-sig", newline="") as fh:
+            return [dict(row) for row in csv.DictReader(fh)]
+    if ext in (".jsonl", ".ndjson"):
+        records: list[dict[str, Any]] = []
+        with open(path, "r", encoding="utf-8") as fh:
+            for lineno, line in enumerate(fh, 1):
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError(f"{path}:{lineno}: record must be a JSON object")
+                records.append(record)
+        return records
+    raise ValueError(f"Unsupported record source: {ext}")
+
+
+def query_records(query: str) -> list[dict[str, Any]]:
+    """Run *query* on the current SQL connection; one record per row."""
+    cursor = sql_mod.get_connection().execute(query)
+    columns = [col[0] for col in cursor.description or ()]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+# ---------------------------------------------------------------------------
+# Rendering
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class BatchResult:
+    index: int
+    base_name: str = ""
+    generated: list[Path] = field(default_factory=list)
+    error: str | None = None
+    # Set by the worker, consumed by the parent process:
+    docx_path: Path | None = None
+    pending: list[Path] = field(default_factory=list)
+    keep_docx: bool = True
+    # Where the .docx was saved until run_batch moves it to docx_path:
+    staged_path: Path | None = None
+    # Timings of a process worker, merged into the parent's profile:
+    profile: Profile | None = None
+
+
+class BatchRenderer:
+    """Render records against one config and template.
+
+    Holds everything that is loaded once per process: the parsed config and
+    the compiled template. Only the .docx is written here; conversions to
+    other formats are left in :attr:`BatchResult.pending` for the parent
+    process, which owns the export backend. With *lazy*, only the keys the
+    template, ``OUTPUT_NAME`` and ``ON_END`` use (and their dependencies)
+    are evaluated. Calls memoized per batch (``CURRENT_DATE_STR``, ...)
+    share :attr:`call_cache` across the records this renderer handles.
+    """
+
+    def __init__(
+        self,
+        config_path: str | Path,
+        template_path: str | Path,
+        output: str | Path,
+        lazy: bool = False,
+    ) -> None:
+        with stage("config"):
+            self.config = Config(config_path)
+        with stage("template"):
+            self.template = CompiledTemplate(template_path)
+        self.lazy = lazy
+        output = Path(output)
+        self.output_dir = output.parent or Path(".")
+        self.default_stem = output.stem
+        self.formats = self.config.output_format
+        if not self.formats:
+            ext = output.suffix.lstrip(".").lower()
+            self.formats = [ext if ext else "docx"]
+        self.call_cache = CallCache()
+        # Records from one source share their fields, so these hold one
+        # graph each.
+        self._graphs: dict[frozenset[str], DependencyGraph] = {}
+        self._remaining: dict[tuple[frozenset[str], frozenset[str]], Any] = {}
+
+    def _graph(
+        self, record: dict[str, Any], known: Iterable[str] = ()
+    ) -> DependencyGraph:
+        """Dependency graph for records with the fields of *record*, without
+        the *known* keys."""
+        fields = frozenset(record)
+        graph = self._graphs.get(fields)
+        if graph is None:
+            graph = DependencyGraph(self.config.placeholders, exclude=fields)
+            if self.lazy:
+                graph = graph.subgraph(used_keys(self.config, self.template.keys))
+            self._graphs[fields] = graph
+        known = frozenset(known)
+        if not known:
+            return graph
+        remaining = self._remaining.get((fields, known))
+        if remaining is None:
+            remaining = self._remaining[fields, known] = graph.without(known)
+        return remaining
+
+    def evaluate_columns(self, records: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Evaluate the keys that can be vectorized for all *records* at once.
+
+        Returns, for each record, the values to pass to :meth:`render`.
+        Records are grouped by their fields; keys that cannot be vectorized
+        (or fail for some record) are left for :meth:`render`. Under a
+        :mod:`~document_placeholder.budget`, every key is left for
+        :meth:`render`, which meters each record.
+        """
+        if get_budget() is not None:
+            return [{} for _ in records]
+        with stage("vectorize"):
+            return self._evaluate_columns(records)
+
+    def _evaluate_columns(self, records: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        precomputed: list[dict[str, Any]] = [{} for _ in records]
+        groups: dict[frozenset[str], list[int]] = {}
+        for index, record in enumerate(records):
+            groups.setdefault(frozenset(record), []).append(index)
+        for indices in groups.values():
+            if len(indices) < 2:
+                continue
+            first = records[indices[0]]
+            columns = {name: [records[i][name] for i in indices] for name in first}
+            evaluator = ColumnEvaluator(columns, call_cache=self.call_cache)
+            values = evaluator.evaluate_placeholders(
+                self.config.placeholders, self._graph(first)
+            )
+            for key, column in values.items():
+                for index, value in zip(indices, column):
+                    precomputed[index][key] = value
+        return precomputed
+
+    def render(
+        self,
+        index: int,
+        record: dict[str, Any],
+        precomputed: dict[str, Any] | None = None,
+        staged: bool = False,
+    ) -> BatchResult:
+        """Render one record. *precomputed* holds key values already
+        evaluated for it (see :meth:`evaluate_columns`). With *staged*, the
+        .docx is saved under a temporary name (:attr:`BatchResult.staged_path`)
+        for the caller to move into place."""
+        result = BatchResult(index)
+        precomputed = precomputed or {}
+        try:
+            evaluator = Evaluator(record, call_cache=self.call_cache)
+            with stage("on_start"):
+                for expr in self.config.on_start:
+                    evaluator.evaluate_value(expr)
+
+            for key, value in precomputed.items():
+                evaluator.variables.setdefault(key, value)
+            with stage("evaluate"):
+                computed = evaluator.evaluate_placeholders(
+                    self.config.placeholders, self._graph(record, precomputed)
+                )
+            values: dict[str, Any] = dict(record)
+            for key in self.config.placeholders:
+                if key in precomputed:
+                    values[key] = precomputed[key]
+                elif key in computed:
+                    values[key] = computed[key]
+
+            if self.config.output_name:
+                base_name = evaluator.resolve_output_name(
+                    self.config.output_name, values
+                )
+            else:
+                base_name = f"{self.default_stem}-{index + 1}"
+            result.base_name = base_name
+
+            docx_path = self.output_dir / f"{base_name}.docx"
+            docx_path.parent.mkdir(parents=True, exist_ok=True)
+            save_path = docx_path
+            if staged:
+                save_path = docx_path.with_name(f".{docx_path.name}.{index}.part")
+                result.staged_path = save_path
+            with stage("replace"):
+                document = self.template.render(values)
+            with stage("save"):
+                document.save(str(save_path))
+            result.docx_path = docx_path
+            result.keep_docx = "docx" in self.formats
+            for fmt in self.formats:
+                if fmt == "docx":
+                    result.generated.append(docx_path)
+                else:
+                    result.pending.append(self.output_dir / f"{base_name}.{fmt}")
+
+            with stage("on_end"):
+                for expr in self.config.on_end:
+                    evaluator.evaluate_value(expr)
+        except Exception as exc:
+            result.error = str(exc)
+        return result
+
+
+class _ExportQueue:
+    """Collect pending exports and convert them in bulk.
+
+    Results wait until *chunk_size* conversions are pending, then all of them
+    go through :func:`export_documents` together (one LibreOffice run per
+    chunk instead of one per file).
+    """
+
+    def __init__(
+        self,
+        chunk_size: int,
+        on_result: Callable[[BatchResult], None] | None,
+    ) -> None:
+        self.chunk_size = chunk_size
+        self.on_result = on_result
+        self._waiting: list[BatchResult] = []
+        self._pending = 0
+
+    def add(self, result: BatchResult) -> None:
+        if result.error or not result.pending:
+            self._cleanup(result)
+            self._report(result)
+            return
+        self._waiting.append(result)
+        self._pending += len(result.pending)
+        if self._pending >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        waiting, self._waiting, self._pending = self._waiting, [], 0
+
+        by_format: dict[str, list[tuple[BatchResult, Path]]] = {}
+        for result in waiting:
+            for target in result.pending:
+                fmt = target.suffix.lstrip(".")
+                by_format.setdefault(fmt, []).append((result, target))
+
+        for fmt, items in by_format.items():
+            try:
+                with stage("export"):
+                    export_documents(
+                        [result.docx_path for result, _ in items],
+                        fmt,
+                        [target for _, target in items],
+                        chunk_size=self.chunk_size,
+                    )
+                failures: dict[Path, str] = {}
+            except ExportError as exc:
+                failures = exc.failures
+            except Exception as exc:
+                failures = {target: str(exc) for _, target in items}
+            for result, target in items:
+                if target in failures:
+                    result.error = result.error or failures[target]
+                else:
+                    result.generated.append(target)
+
+        for result in waiting:
+            result.pending = []
+            self._cleanup(result)
+            self._report(result)
+
+    @staticmethod
+    def _cleanup(result: BatchResult) -> None:
+        if not result.keep_docx and result.docx_path is not None:
+            result.docx_path.unlink(missing_ok=True)
+
+    def _report(self, result: BatchResult) -> None:
+        if self.on_result:
+            self.on_result(result)
+
+
+class _OutputNames:
+    """Move staged documents into place, failing records whose output name
+    an earlier record already used (instead of overwriting its files)."""
+
+    def __init__(self) -> None:
+        self._used: dict[str, int] = {}
+
+    def claim(self, result: BatchResult) -> None:
+        staged, result.staged_path = result.staged_path, None
+        if result.error is None:
+            first = self._used.setdefault(result.base_name, result.index)
+            if first != result.index:
+                result.error = (
+                    f"Output name {result.base_name!r} is already used by "
+                    f"record {first + 1}"
+                )
+        if result.error is not None:
+            if staged is not None:
+                staged.unlink(missing_ok=True)
+            result.docx_path = None
+            result.generated = []
+            result.pending = []
+            return
+        if staged is not None and result.docx_path is not None:
+            staged.replace(result.docx_path)
+
+
+_worker: BatchRenderer | None = None
+
+
+def _init_worker(
+    config_path: str,
+    template_path: str,
+    output: str,
+    db: str,
+    image_resize: tuple[int | None, int],
+    eval_workers: int,
+    lazy: bool,
+    profile: bool,
+    budget: Budget | None,
+) -> None:
+    global _worker
+    if profile:
+        set_profile(Profile())
+    set_budget(budget)
+    sql_mod.init(db)
+    set_image_resize(*image_resize)
+    set_max_workers(eval_workers)
+    _worker = BatchRenderer(config_path, template_path, output, lazy)
+
+
+def _render_in_worker(
+    index: int, record: dict[str, Any], precomputed: dict[str, Any]
+) -> BatchResult:
+    assert _worker is not None, "batch worker not initialised"
+    result = _worker.render(index, record, precomputed, staged=True)
+    profile = get_profile()
+    if profile is not None:
+        result.profile = profile.drain()
+    return result
+
+
+def run_batch(
+    config_path: str | Path,
+    template_path: str | Path,
+    records: Iterable[dict[str, Any]],
+    output: str | Path = "output.docx",
+    db_path: str = "data.db",
+    workers: int | None = None,
+    on_result: Callable[[BatchResult], None] | None = None,
+    export_chunk_size: int = DEFAULT_CHUNK_SIZE,
+    lazy: bool = False,
+    vectorize: bool = True,
+) -> list[BatchResult]:
+    """Render one document per record and return the results in record order.
+
+    *workers* defaults to the CPU count, or to ``1`` when the config has
+    ``ON_START`` / ``ON_END`` hooks (which usually share state such as an
+    invoice counter); ``1`` renders in the current process. A record whose
+    output name an earlier record already used fails rather than overwrite
+    that record's files.
+    Conversions are grouped into bulk exports of *export_chunk_size*
+    documents. *on_result* is called for each result once its exports are
+    done. *lazy* skips the keys a render does not use (see
+    :class:`BatchRenderer`). With *vectorize*, keys that allow it are
+    evaluated for all records at once in the calling process (see
+    :meth:`BatchRenderer.evaluate_columns`).
+    """
+    records = list(records)
+    if workers is None:
+        config = Config(config_path)
+        workers = 1 if config.on_start or config.on_end else os.cpu_count() or 1
+    workers = max(1, min(workers, len(records) or 1))
+    init_args = (
+        str(config_path),
+        str(template_path),
+        str(output),
+        db_path,
+        get_image_resize(),
+        get_max_workers(),
+        lazy,
+        get_profile() is not None,
+        get_budget(),
+    )
+
+    results: list[BatchResult] = []
+    names = _OutputNames()
+    exports = _ExportQueue(export_chunk_size, on_result)
+    if workers == 1:
+        sql_mod.init(db_path)
+        try:
+            renderer = BatchRenderer(config_path, template_path, output, lazy)
+            if vectorize:
+                precomputed = renderer.evaluate_columns(records)
+            else:
+                precomputed = [{} for _ in records]
+            for index, record in enumerate(records):
+                result = renderer.render(index, record, precomputed[index], staged=True)
+                names.claim(result)
+                exports.add(result)
+                results.append(result)
+        finally:
+            sql_mod.close()
+        exports.flush()
+        return results
+
+    if vectorize:
+        renderer = BatchRenderer(config_path, template_path, output, lazy)
+        precomputed = renderer.evaluate_columns(records)
+    else:
+        precomputed = [{} for _ in records]
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=init_args,
+    ) as pool:
+        futures = [
+            pool.submit(_render_in_worker, index, record, precomputed[index])
+            for index, record in enumerate(records)
+        ]
+        profile = get_profile()
+        for future in futures:
+            result = future.result()
+            if result.profile is not None:
+                if profile is not None:
+                    profile.merge(result.profile)
+                result.profile = None
+            names.claim(result)
+            exports.add(result)
+            results.append(result)
+    exports.flush()
+    return results
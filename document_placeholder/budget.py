@@ -0,0 +1,231 @@
+"""Resource budgets for evaluating config values.
+
+A :class:`Budget` bounds what one render may spend:
+
+* ``max_steps`` — function calls and operators evaluated, over all the
+  values of the render (``ON_START``, placeholders, ``OUTPUT_NAME``,
+  ``ON_END``);
+* ``max_string_length`` — characters in any string produced; ``REPEAT``,
+  ``PAD_LEFT`` / ``PAD_RIGHT``, ``REPLACE`` and ``text * n`` check it before
+  building the string;
+* ``timeout`` — wall-clock seconds per value, checked at every step (a
+  single slow call is stopped only by its own limit, e.g. ``sql_timeout``);
+* ``sql_timeout`` — seconds per ``SQL()`` query, enforced through SQLite's
+  progress handler; a query also stops at the value's ``timeout``.
+
+Exceeding a budget raises :class:`BudgetExceededError`. Nothing is checked
+unless a budget is active::
+
+    with budget.limits(Budget(max_steps=10_000, timeout=5)):
+        run_batch(...)
+
+Each :class:`~document_placeholder.evaluator.Evaluator` created while a
+budget is active meters its own render. As with a profile, activating a
+budget drops the compiled expressions, which are compiled again with checks.
+Batch mode evaluates every record separately under a budget (no column-wise
+evaluation), and worker processes apply the budget of the calling process.
+"""
+
+from __future__ import annotations
+
+import itertools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, fields, replace
+from typing import Any, Callable, Iterator
+
+from document_placeholder.functions import FunctionInfo, FunctionRegistry
+
+
+class BudgetExceededError(RuntimeError):
+    """Evaluation went over a limit of the active :class:`Budget`."""
+
+
+@dataclass(frozen=True)
+class Budget:
+    """Per-render limits; ``None`` means unlimited."""
+
+    max_steps: int | None = None
+    max_string_length: int | None = None
+    timeout: float | None = None
+    sql_timeout: float | None = None
+
+    def __post_init__(self) -> None:
+        for f in fields(self):
+            value = getattr(self, f.name)
+            if value is not None and value <= 0:
+                raise ValueError(f"{f.name} must be positive, got {value!r}")
+
+
+class Meter:
+    """What one render has spent of *budget*."""
+
+    def __init__(self, budget: Budget) -> None:
+        self.budget = budget
+        self.steps = 0
+        self._counter = itertools.count(1)
+
+
+_active: Budget | None = None
+
+# The meter and deadline of the value being evaluated in this context.
+_current: ContextVar[tuple[Meter, float | None] | None] = ContextVar(
+    "budget_run", default=None
+)
+
+
+# ---------------------------------------------------------------------------
+# Activation
+# ---------------------------------------------------------------------------
+
+
+def get_budget() -> Budget | None:
+    """Return the active budget, if any."""
+    return _active
+
+
+def set_budget(budget: Budget | None) -> None:
+    """Apply *budget* to renders from now on (``None`` removes the limits)."""
+    global _active
+    if budget != _active:
+        _active = budget
+        FunctionRegistry.invalidate()
+
+
+@contextmanager
+def limits(budget: Budget | None) -> Iterator[Budget | None]:
+    """Apply *budget* within the block; ``limits(None)`` changes nothing."""
+    previous = _active
+    if budget is not None:
+        set_budget(budget)
+    try:
+        yield budget
+    finally:
+        set_budget(previous)
+
+
+def meter() -> Meter | None:
+    """Return a new meter for one render under the active budget, if any."""
+    return Meter(_active) if _active is not None else None
+
+
+def activate(meter: Meter) -> Token:
+    """Start metering one value against *meter*; its timeout starts now."""
+    timeout = meter.budget.timeout
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    return _current.set((meter, deadline))
+
+
+def deactivate(token: Token) -> None:
+    _current.reset(token)
+
+
+@contextmanager
+def metered() -> Iterator[None]:
+    """Apply the active budget, if any, to the block, without a step limit.
+
+    Used where pure functions run outside a render (constant folding), so
+    that expressions fold the same whatever ``max_steps`` is.
+    """
+    if _active is None:
+        yield
+        return
+    token = activate(Meter(replace(_active, max_steps=None)))
+    try:
+        yield
+    finally:
+        deactivate(token)
+
+
+# ---------------------------------------------------------------------------
+# Checks
+# ---------------------------------------------------------------------------
+
+
+def step() -> None:
+    """Count one evaluation step; raise if the steps or the time run out."""
+    current = _current.get()
+    if current is None:
+        return
+    meter, deadline = current
+    meter.steps = steps = next(meter._counter)
+    limit = meter.budget.max_steps
+    if limit is not None and steps > limit:
+        raise BudgetExceededError(f"Evaluation exceeded the limit of {limit} steps")
+    if deadline is not None and time.monotonic() > deadline:
+        raise BudgetExceededError(
+            f"Evaluation exceeded the timeout of {meter.budget.timeout:g}s"
+        )
+
+
+def reserve(length: int) -> None:
+    """Raise if a string of *length* characters would exceed the budget.
+
+    Call it before building a string whose size an argument controls.
+    """
+    current = _current.get()
+    if current is None:
+        return
+    limit = current[0].budget.max_string_length
+    if limit is not None and length > limit:
+        raise BudgetExceededError(
+            f"String of {length} characters exceeds the limit of {limit}"
+        )
+
+
+def check_value(value: Any) -> None:
+    """Raise if *value* is a string longer than the budget allows."""
+    if isinstance(value, str):
+        reserve(len(value))
+
+
+def sql_deadline() -> float | None:
+    """Return the ``time.monotonic()`` time a query started now must end by."""
+    current = _current.get()
+    if current is None:
+        return None
+    meter, deadline = current
+    sql_timeout = meter.budget.sql_timeout
+    if sql_timeout is not None:
+        sql_end = time.monotonic() + sql_timeout
+        deadline = sql_end if deadline is None else min(deadline, sql_end)
+    return deadline
+
+
+def checked(info: FunctionInfo) -> FunctionInfo:
+    """Return *info* with its function metered, if a budget is active."""
+    if _active is None:
+        return info
+    func = info.func
+
+    def run(*args: Any) -> Any:
+        step()
+        result = func(*args)
+        check_value(result)
+        return result
+
+    return replace(info, func=run)
+
+
+def checked_op(symbol: str, op: Callable[[Any, Any], Any]) -> Callable:
+    """Return the binary operator *op* metered, if a budget is active."""
+    if _active is None:
+        return op
+
+    def run(left: Any, right: Any) -> Any:
+        step()
+        if symbol == "*":
+            _reserve_product(left, right)
+        result = op(left, right)
+        check_value(result)
+        return result
+
+    return run
+
+
+def _reserve_product(left: Any, right: Any) -> None:
+    if isinstance(left, str) and type(right) is int:
+        reserve(len(left) * right)
+    elif isinstance(right, str) and type(left) is int:
+        reserve(len(right) * left)
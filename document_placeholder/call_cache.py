@@ -0,0 +1,123 @@
+"""Memoize function calls within their declared determinism scope.
+
+A function registered with ``scope="batch"`` (``CURRENT_DATE_STR``,
+``TODAY``, ``ENV``) returns the same value for the same arguments during a
+whole batch, so ``CURRENT_DATE_STR(month)`` in a 10k-record batch needs to
+be computed once, not 10k times. ``scope="run"`` functions are memoized per
+document. Pure functions with a high declared ``cost`` are memoized per
+batch, since equal arguments recur across records.
+
+Compiled expressions are shared by every evaluator (see
+:mod:`~document_placeholder.parse_cache`), so the caches cannot be bound at
+compile time. An :class:`~document_placeholder.evaluator.Evaluator` makes
+its caches current with :func:`activate` while it runs compiled code, and
+the wrappers built by :func:`memoize` look them up there. Outside of that,
+calls are not memoized.
+
+Calls with unhashable arguments are not cached, nor are results of mutable
+types (lists, dicts, ...), which would be shared between callers.
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import TYPE_CHECKING, Any, Callable, Iterator
+
+from document_placeholder.lru import MISSING, LRUCache
+
+if TYPE_CHECKING:
+    from document_placeholder.functions import FunctionInfo
+
+DEFAULT_MAXSIZE = 4096
+
+# Results of these types are never cached or shared: a caller could change them.
+MUTABLE_TYPES = (list, dict, set, bytearray)
+
+# Scope name -> cache of the evaluator currently running.
+_caches: ContextVar[dict[str, CallCache]] = ContextVar("call_caches", default={})
+
+
+class CallCache(LRUCache):
+    """Thread-safe LRU cache of function results keyed by their arguments.
+
+    Two threads calling the same function with the same arguments at the
+    same time may both run it; the cache only avoids repeated calls.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE) -> None:
+        super().__init__(maxsize)
+
+    def call(self, func: Callable, args: tuple, run: Callable | None = None) -> Any:
+        """Return ``func(*args)``, from the cache if it was computed before.
+
+        *run*, if given, is called instead of *func* on a miss (e.g. *func*
+        wrapped with a timer); results are still cached under *func*.
+        """
+        # Types are part of the key: 1, 1.0 and True are equal but format
+        # differently.
+        key = (func, args, tuple(map(type, args)))
+        if run is None:
+            run = func
+        try:
+            with self._lock:
+                value = self._get(key)
+                if value is not MISSING:
+                    return value
+                self.misses += 1
+        except TypeError:  # unhashable argument
+            return run(*args)
+
+        value = run(*args)
+        if not isinstance(value, MUTABLE_TYPES):
+            with self._lock:
+                self._put(key, value)
+        return value
+
+
+def activate(caches: dict[str, CallCache]) -> Token:
+    """Memoize calls in *caches* (scope name -> cache) from now on.
+
+    Returns a token for :func:`deactivate`, which restores the previous
+    caches.
+    """
+    return _caches.set(caches)
+
+
+def deactivate(token: Token) -> None:
+    _caches.reset(token)
+
+
+@contextmanager
+def use_caches(caches: dict[str, CallCache]) -> Iterator[None]:
+    """Memoize calls in *caches* within the block (see :func:`activate`)."""
+    token = _caches.set(caches)
+    try:
+        yield
+    finally:
+        _caches.reset(token)
+
+
+def memoize(info: FunctionInfo, run: Callable | None = None) -> Callable:
+    """Return *info*'s function, wrapped to use the cache of its scope.
+
+    *run*, if given, is what is called when the result is not cached (e.g.
+    the function with a timer); results are keyed by ``info.func``, so they
+    are shared by every call site. Functions that are not memoized (see
+    :attr:`FunctionInfo.memo_scope`) are returned as they are, or *run*.
+    """
+    func = info.func
+    if run is None:
+        run = func
+    scope = info.memo_scope
+    if scope is None:
+        return run
+
+    def memoized(*args: Any) -> Any:
+        cache = _caches.get().get(scope)
+        if cache is None:
+            return run(*args)
+        return cache.call(func, args, run)
+
+    memoized.__wrapped__ = func  # type: ignore[attr-defined]
+    return memoized
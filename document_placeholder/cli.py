@@ -12,10 +12,30 @@ import document_placeholder.functions.logic  # noqa: F401
 import document_placeholder.functions.math  # noqa: F401
 import document_placeholder.functions.string  # noqa: F401
 import document_placeholder.functions.sql as sql_mod
+from document_placeholder.batch import (
+    BatchResult,
+    load_records,
+    query_records,
+    run_batch,
+)
+from document_placeholder.budget import Budget, set_budget
 from document_placeholder.config import Config
+from document_placeholder.dependencies import DependencyGraph, used_keys
 from document_placeholder.evaluator import Evaluator
-from document_placeholder.exporter import export_document
+from document_placeholder.exporter import (
+    export_documents,
+    set_max_parallel,
+    set_pdf_backend,
+)
+from document_placeholder.image_resize import (
+    DEFAULT_DPI,
+    DEFAULT_QUALITY,
+    set_image_resize,
+)
+from document_placeholder.office_pool import OfficePool
+from document_placeholder.profiling import Profile, collect, stage
 from document_placeholder.processor import DocumentProcessor
+from document_placeholder.scheduler import set_max_workers
 
 
 def main() -> None:
@@ -46,6 +66,115 @@ def main() -> None:
         default="data.db",
         help="SQLite database path (default: data.db)",
     )
+    parser.add_argument(
+        "--records",
+        metavar="FILE",
+        help="Batch mode: render one document per record of a .csv/.jsonl file",
+    )
+    parser.add_argument(
+        "--records-sql",
+        metavar="QUERY",
+        help="Batch mode: render one document per row returned by QUERY",
+    )
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=None,
+        help="Batch mode worker processes (default: CPU count, or 1 when the "
+        "config has ON_START / ON_END hooks)",
+    )
+    parser.add_argument(
+        "--lazy",
+        action="store_true",
+        help="Evaluate only the keys used by the template, OUTPUT_NAME and "
+        "ON_END, plus the keys they depend on",
+    )
+    parser.add_argument(
+        "--no-vectorize",
+        dest="vectorize",
+        action="store_false",
+        help="Batch mode: evaluate every key record by record instead of "
+        "column-wise",
+    )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="store_true",
+        help="Report placeholder keys skipped by --lazy",
+    )
+    parser.add_argument(
+        "--office-pool",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Keep N warm LibreOffice instances for PDF export (needs UNO)",
+    )
+    parser.add_argument(
+        "--export-jobs",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Maximum parallel document conversions (default: CPU count)",
+    )
+    parser.add_argument(
+        "--eval-jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Evaluate up to N independent placeholders concurrently (default: 1)",
+    )
+    parser.add_argument(
+        "--image-dpi",
+        type=int,
+        default=DEFAULT_DPI,
+        metavar="DPI",
+        help=f"Downsample images to DPI at their placed size, 0 keeps originals "
+        f"(default: {DEFAULT_DPI}; needs Pillow)",
+    )
+    parser.add_argument(
+        "--image-quality",
+        type=int,
+        default=DEFAULT_QUALITY,
+        metavar="Q",
+        help=f"JPEG quality for resized images, 1-95 (default: {DEFAULT_QUALITY})",
+    )
+    parser.add_argument(
+        "--max-steps",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Abort a render after N function calls and operators",
+    )
+    parser.add_argument(
+        "--max-string-length",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Abort a render that builds a string longer than N characters",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="Abort a render when one config value takes longer than SECONDS",
+    )
+    parser.add_argument(
+        "--sql-timeout",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="Interrupt SQL() queries that run longer than SECONDS",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="-",
+        metavar="JSON",
+        help="Report time spent per stage, placeholder key, function and SQL "
+        "query: as a table, or written to JSON",
+    )
     parser.add_argument(
         "-V",
         "--version",
@@ -54,22 +183,80 @@ def main() -> None:
     )
     args = parser.parse_args()
 
+    if args.export_jobs is not None:
+        if args.export_jobs < 1:
+            parser.error("--export-jobs must be at least 1")
+        set_max_parallel(args.export_jobs)
+    if args.eval_jobs < 1:
+        parser.error("--eval-jobs must be at least 1")
+    set_max_workers(args.eval_jobs)
+    if args.image_dpi < 0:
+        parser.error("--image-dpi must not be negative")
+    if not 1 <= args.image_quality <= 95:
+        parser.error("--image-quality must be between 1 and 95")
+    set_image_resize(args.image_dpi or None, args.image_quality)
+    limits = (args.max_steps, args.max_string_length, args.timeout, args.sql_timeout)
+    if any(limit is not None for limit in limits):
+        try:
+            set_budget(Budget(*limits))
+        except ValueError as exc:
+            parser.error(f"--{exc}".replace("_", "-"))
+    pool = OfficePool(args.office_pool) if args.office_pool > 0 else None
+    set_pdf_backend(pool)
+    profile = Profile() if args.profile else None
+    try:
+        with collect(profile):
+            if args.records or args.records_sql:
+                _run_batch(args)
+            else:
+                _run_single(args)
+    finally:
+        if pool is not None:
+            set_pdf_backend(None)
+            pool.close()
+        if profile is not None:
+            _report_profile(args.profile, profile)
+
+
+def _report_profile(target: str, profile: Profile) -> None:
+    """Print the timings as a table (``-``) or write them to *target* as JSON."""
+    if target == "-":
+        print("\n  Profile")
+        print(profile.format_table())
+        return
+    try:
+        profile.write_json(target)
+    except OSError as exc:
+        print(f"Error: cannot write profile: {exc}", file=sys.stderr)
+        return
+    print(f"\n  Profile written to {target}")
+
+
+def _run_single(args: argparse.Namespace) -> None:
     sql_mod.init(args.db)
 
     try:
-        config = Config(args.config)
+        with stage("config"):
+            config = Config(args.config)
         evaluator = Evaluator()
 
-        for expr in config.on_start:
-            evaluator.evaluate_value(expr)
+        with stage("on_start"):
+            for expr in config.on_start:
+                evaluator.evaluate_value(expr)
 
-        values: dict[str, object] = {}
-        for key, raw in config.placeholders.items():
-            values[key] = evaluator.evaluate_value(raw)
-            print(f"  {key} = {values[key]}")
+        with stage("template"):
+            processor = DocumentProcessor(args.template)
+        graph = DependencyGraph(config.placeholders)
+        if args.lazy:
+            graph = _lazy_graph(args, config, graph, processor.keys)
 
-        processor = DocumentProcessor(args.template)
-        processor.replace_placeholders(values)
+        with stage("evaluate"):
+            values = evaluator.evaluate_placeholders(config.placeholders, graph)
+        for key, value in values.items():
+            print(f"  {key} = {value}")
+
+        with stage("replace"):
+            processor.replace_placeholders(values)
 
         output_arg = Path(args.output)
         output_dir = output_arg.parent or Path(".")
@@ -87,7 +274,8 @@ def main() -> None:
         print(f"\n  Output: {base_name} [{', '.join(formats)}]")
 
         docx_path = output_dir / f"{base_name}.docx"
-        processor.save(str(docx_path))
+        with stage("save"):
+            processor.save(str(docx_path))
 
         generated: list[Path] = []
         for fmt in formats:
@@ -95,14 +283,15 @@ def main() -> None:
                 generated.append(docx_path)
             else:
                 target = output_dir / f"{base_name}.{fmt}"
-                export_document(str(docx_path), str(target))
-                generated.append(target)
+                with stage("export"):
+                    generated.extend(export_documents([docx_path], fmt, [target]))
 
         if "docx" not in formats:
             docx_path.unlink(missing_ok=True)
 
-        for expr in config.on_end:
-            evaluator.evaluate_value(expr)
+        with stage("on_end"):
+            for expr in config.on_end:
+                evaluator.evaluate_value(expr)
 
         for g in generated:
             print(f"  -> {g}")
@@ -114,5 +303,78 @@ def main() -> None:
         sql_mod.close()
 
 
+def _lazy_graph(
+    args: argparse.Namespace,
+    config: Config,
+    graph: DependencyGraph,
+    template_keys: frozenset[str],
+) -> DependencyGraph:
+    """Narrow *graph* to the keys the render uses; report the rest with -v."""
+    needed = graph.subgraph(used_keys(config, template_keys))
+    if args.verbose:
+        skipped = [key for key in config.placeholders if key not in needed.dependencies]
+        if skipped:
+            print(f"  Skipped (unused): {', '.join(map(str, skipped))}")
+    return needed
+
+
+def _run_batch(args: argparse.Namespace) -> None:
+    try:
+        if args.records:
+            records = load_records(args.records)
+        else:
+            sql_mod.init(args.db)
+            try:
+                records = query_records(args.records_sql)
+            finally:
+                sql_mod.close()
+    except Exception as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"  Batch: {len(records)} record(s)")
+    if args.lazy and args.verbose:
+        try:
+            config = Config(args.config)
+            fields = records[0] if records else {}
+            _lazy_graph(
+                args,
+                config,
+                DependencyGraph(config.placeholders, exclude=fields),
+                DocumentProcessor(args.template).keys,
+            )
+        except Exception as exc:
+            print(f"Error: {exc}", file=sys.stderr)
+            sys.exit(1)
+
+    def report(result: BatchResult) -> None:
+        if result.error:
+            print(f"  [{result.index + 1}] Error: {result.error}", file=sys.stderr)
+        else:
+            for g in result.generated:
+                print(f"  [{result.index + 1}] -> {g}")
+
+    try:
+        results = run_batch(
+            args.config,
+            args.template,
+            records,
+            output=args.output,
+            db_path=args.db,
+            workers=args.workers,
+            on_result=report,
+            lazy=args.lazy,
+            vectorize=args.vectorize,
+        )
+    except Exception as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        sys.exit(1)
+
+    failed = sum(1 for r in results if r.error)
+    print(f"\n  Done: {len(results) - failed} ok, {failed} failed")
+    if failed:
+        sys.exit(1)
+
+
 if __name__ == "__main__":
     main()
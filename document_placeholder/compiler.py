@@ -0,0 +1,260 @@
+"""Compile expression ASTs to nested Python closures.
+
+:meth:`Evaluator.evaluate` re-interprets the tree on every evaluation: an
+``isinstance`` chain per node plus string comparisons for the operator.
+:func:`compile_ast` does that dispatch once. Each node becomes a closure
+taking the variables dict, with operators and registered functions bound at
+compile time. Functions that are not registered yet are looked up when the
+expression runs, so they fail (or succeed) exactly as in the interpreter.
+Arguments of lazy functions are passed as thunks, so only the branch the
+function selects is evaluated. Functions with a memoization scope are bound
+through :func:`~document_placeholder.call_cache.memoize`, and calls whose
+argument count the function does not accept raise ``TypeError`` when run.
+While a :mod:`~document_placeholder.profiling` profile is active, calls are
+compiled with timers, and while a :mod:`~document_placeholder.budget` is
+active, calls and operators are compiled with budget checks.
+
+:func:`compile_template` does the same for ``{expr}`` template strings: the
+braces are located once and the text becomes a list of literal chunks and
+compiled fields, so rendering is a single join.
+"""
+
+from __future__ import annotations
+
+import operator
+from dataclasses import replace
+from functools import partial
+from typing import Any, Callable, NamedTuple
+
+from document_placeholder import budget, profiling
+from document_placeholder.call_cache import memoize
+from document_placeholder.functions import FunctionInfo, FunctionRegistry
+from document_placeholder.parser import (
+    BinaryOp,
+    Constant,
+    FunctionCall,
+    Identifier,
+    NumberLiteral,
+    StringLiteral,
+    UnaryOp,
+)
+
+Compiled = Callable[[dict[str, Any]], Any]
+
+BINARY_OPS: dict[str, Callable[[Any, Any], Any]] = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+    "%": operator.mod,
+    ">": operator.gt,
+    "<": operator.lt,
+    ">=": operator.ge,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+
+def compile_ast(node: Any) -> Compiled:
+    """Return a function ``f(variables) -> value`` equivalent to evaluating *node*."""
+    if isinstance(node, (NumberLiteral, StringLiteral, Constant)):
+        value = node.value
+        return lambda variables: value
+
+    if isinstance(node, Identifier):
+        name = node.name
+        return lambda variables: variables.get(name, name)
+
+    if isinstance(node, FunctionCall):
+        return _compile_call(node)
+
+    if isinstance(node, BinaryOp) and node.op in BINARY_OPS:
+        op = budget.checked_op(node.op, BINARY_OPS[node.op])
+        left = compile_ast(node.left)
+        right = compile_ast(node.right)
+        return lambda variables: op(left(variables), right(variables))
+
+    if isinstance(node, UnaryOp) and node.op == "-":
+        operand = compile_ast(node.operand)
+        return lambda variables: -operand(variables)
+
+    raise ValueError(f"Unknown AST node: {type(node).__name__}")
+
+
+def _compile_call(node: FunctionCall) -> Compiled:
+    name = node.name
+    args = [compile_ast(arg) for arg in node.args]
+    info = FunctionRegistry.info(name)
+
+    if info is None:
+        return lambda variables: FunctionRegistry.call_lazy(
+            name, [partial(arg, variables) for arg in args]
+        )
+    if not info.accepts(len(args)):
+        return _raise_arity_error(info, len(args))
+    if info.lazy:
+        return _compile_lazy_call(budget.checked(profiling.timed(info)).func, args)
+    # Results are keyed by the registered function: the timer and budget
+    # wrappers are new at every call site and would split the cache key.
+    # Only calls that run are timed; every call, cached or not, is a step.
+    info = replace(info, func=memoize(info, profiling.timed(info).func))
+    func = budget.checked(info).func
+    if not args:
+        return lambda variables: func()
+    if len(args) == 1:
+        (a,) = args
+        return lambda variables: func(a(variables))
+    if len(args) == 2:
+        a, b = args
+        return lambda variables: func(a(variables), b(variables))
+    return lambda variables: func(*[arg(variables) for arg in args])
+
+
+def _compile_lazy_call(func: Callable, args: list[Compiled]) -> Compiled:
+    # Arguments are passed unevaluated, as thunks over the variables.
+    if len(args) == 2:
+        a, b = args
+        return lambda variables: func(partial(a, variables), partial(b, variables))
+    if len(args) == 3:
+        a, b, c = args
+        return lambda variables: func(
+            partial(a, variables), partial(b, variables), partial(c, variables)
+        )
+    return lambda variables: func(*[partial(arg, variables) for arg in args])
+
+
+def _raise_arity_error(info: FunctionInfo, count: int) -> Compiled:
+    low, high = info.arity
+    if high is None:
+        expected = f"at least {low}"
+    elif low == high:
+        expected = str(low)
+    else:
+        expected = f"{low} to {high}"
+    message = f"{info.name} expects {expected} argument(s), got {count}"
+
+    def fail(variables: dict[str, Any]) -> Any:
+        raise TypeError(message)
+
+    return fail
+
+
+# ---------------------------------------------------------------------------
+# Template strings
+# ---------------------------------------------------------------------------
+
+
+class Field(NamedTuple):
+    """An ``{expr}`` part of a template: its source text and compiled code.
+
+    *text* is ``None`` for the trailing part of a template with an unmatched
+    ``{``; its *compiled* function raises the ``SyntaxError``.
+    """
+
+    text: str | None
+    compiled: Compiled
+
+
+class TemplateString:
+    """A template string split into literal chunks and compiled fields."""
+
+    __slots__ = ("parts", "_constant")
+
+    def __init__(self, parts: list[str | Field]) -> None:
+        self.parts: tuple[str | Field, ...] = tuple(parts)
+        self._constant: str | None = (
+            "".join(parts) if all(type(p) is str for p in parts) else None
+        )
+
+    def __call__(
+        self,
+        variables: dict[str, Any],
+        substitutions: dict[str, str] | None = None,
+    ) -> str:
+        """Render the template; fields whose text is a key of
+        *substitutions* are replaced by that string instead of evaluated."""
+        if self._constant is not None:
+            return self._constant
+        out: list[str] = []
+        append = out.append
+        for part in self.parts:
+            if type(part) is str:
+                append(part)
+            elif substitutions and part.text in substitutions:
+                append(substitutions[part.text])
+            else:
+                value = part.compiled(variables)
+                append(str(value) if value is not None else "")
+        return "".join(out)
+
+    @property
+    def fields(self) -> list[Field]:
+        return [part for part in self.parts if type(part) is not str]
+
+
+def compile_template(
+    text: str, compile_expression: Callable[[str], Compiled]
+) -> TemplateString:
+    """Split *text* at its ``{expr}`` fields and compile each of them.
+
+    Syntax errors are not raised here: the failing field raises when the
+    template is rendered, after the fields before it have been evaluated,
+    as the character-by-character scanner used to do.
+    """
+    parts: list[str | Field] = []
+    i = 0
+    while True:
+        start = text.find("{", i)
+        if start < 0:
+            if i < len(text):
+                parts.append(text[i:])
+            break
+        if start > i:
+            parts.append(text[i:start])
+        try:
+            end = find_closing_brace(text, start)
+        except SyntaxError as exc:
+            parts.append(Field(None, _raise_syntax_error(str(exc))))
+            break
+        expr_text = text[start + 1 : end]
+        try:
+            compiled = compile_expression(expr_text)
+        except SyntaxError as exc:
+            compiled = _raise_syntax_error(str(exc))
+        parts.append(Field(expr_text, compiled))
+        i = end + 1
+    return TemplateString(parts)
+
+
+def find_closing_brace(text: str, start: int) -> int:
+    """Return the index of the ``}`` matching the ``{`` at *start*."""
+    depth = 1
+    i = start + 1
+    in_string: str | None = None
+    while i < len(text):
+        ch = text[i]
+        if in_string:
+            if ch == "\\" and i + 1 < len(text):
+                i += 2
+                continue
+            if ch == in_string:
+                in_string = None
+        else:
+            if ch in ('"', "'"):
+                in_string = ch
+            elif ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+                if depth == 0:
+                    return i
+        i += 1
+    raise SyntaxError(f"Unmatched '{{' at position {start}")
+
+
+def _raise_syntax_error(message: str) -> Compiled:
+    def fail(variables: dict[str, Any]) -> Any:
+        raise SyntaxError(message)
+
+    return fail
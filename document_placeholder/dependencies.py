@@ -0,0 +1,194 @@
+"""Dependencies between config keys.
+
+An identifier that names another placeholder key refers to that key's
+value, so ``TOTAL: PRICE * 1.2`` reuses ``PRICE`` instead of repeating its
+SQL. :class:`DependencyGraph` collects those references from the parsed
+values, rejects cycles, and fixes an evaluation order in which every key
+comes after the keys it uses. Independent keys keep their config order.
+
+For lazy rendering, :func:`used_keys` lists the keys a render reads
+directly, and :meth:`DependencyGraph.subgraph` narrows the graph to those
+keys and everything they depend on.
+"""
+
+from __future__ import annotations
+
+import heapq
+from typing import Any, Iterable
+
+from document_placeholder.config import Config
+from document_placeholder.parse_cache import (
+    EXPRESSION,
+    TEMPLATE,
+    ParseCache,
+    get_parse_cache,
+)
+from document_placeholder.parser import BinaryOp, FunctionCall, Identifier, UnaryOp
+
+
+class CircularReferenceError(ValueError):
+    """Config keys that refer to each other in a cycle."""
+
+    def __init__(self, cycle: list[str]) -> None:
+        self.cycle = cycle
+        super().__init__(
+            "Circular reference between config keys: " + " -> ".join(map(str, cycle))
+        )
+
+
+def references(raw: Any, parse_cache: ParseCache | None = None) -> set[str]:
+    """Return every identifier used by the raw config value *raw*.
+
+    Mirrors :meth:`Evaluator.evaluate_value`: a string is an expression if
+    it parses as one, otherwise a template if it contains ``{``, otherwise
+    plain text.
+    """
+    if not isinstance(raw, str):
+        return set()
+    cache = parse_cache if parse_cache is not None else get_parse_cache()
+    names: set[str] = set()
+    value = cache.classify(raw)
+    if value.kind == EXPRESSION:
+        _collect(value.node, names)
+    elif value.kind == TEMPLATE:
+        for field in value.compiled.fields:
+            if field.text is None:
+                continue
+            try:
+                _collect(cache.parse(field.text), names)
+            except SyntaxError:
+                pass
+    return names
+
+
+def used_keys(
+    config: Config,
+    template_keys: Iterable[str],
+    parse_cache: ParseCache | None = None,
+) -> set[str]:
+    """Return the placeholder keys a render reads directly.
+
+    These are the ``{KEY}`` tokens of the template, the keys referenced by
+    ``OUTPUT_NAME``, and those referenced by ``ON_END`` hooks (which run
+    after the placeholders and can see their values).
+    """
+    keys = set(config.placeholders)
+    names = set(template_keys)
+    if config.output_name is not None:
+        names |= references(str(config.output_name), parse_cache)
+    for expr in config.on_end:
+        names |= references(expr, parse_cache)
+    return names & keys
+
+
+def _collect(node: Any, names: set[str]) -> None:
+    if isinstance(node, Identifier):
+        names.add(node.name)
+    elif isinstance(node, FunctionCall):
+        for arg in node.args:
+            _collect(arg, names)
+    elif isinstance(node, BinaryOp):
+        _collect(node.left, names)
+        _collect(node.right, names)
+    elif isinstance(node, UnaryOp):
+        _collect(node.operand, names)
+
+
+class DependencyGraph:
+    """Which placeholder keys each key uses, and an order to evaluate them.
+
+    Names in *exclude* (e.g. the fields of a batch record, which take
+    precedence over keys of the same name) and a key's reference to itself
+    are not dependencies. Raises :class:`CircularReferenceError` if the
+    remaining references form a cycle.
+    """
+
+    def __init__(
+        self,
+        placeholders: dict[str, Any],
+        parse_cache: ParseCache | None = None,
+        exclude: Iterable[str] = (),
+    ) -> None:
+        excluded = set(exclude)
+        keys = list(placeholders)
+        self.dependencies: dict[str, list[str]] = {}
+        for key, raw in placeholders.items():
+            names = references(raw, parse_cache)
+            self.dependencies[key] = [
+                other
+                for other in keys
+                if other in names and other != key and other not in excluded
+            ]
+        self.order: list[str] = self._sort(keys)
+
+    def closure(self, keys: Iterable[str]) -> set[str]:
+        """Return *keys* and every key they depend on, directly or not.
+
+        Names that are not keys of the graph are ignored.
+        """
+        needed: set[str] = set()
+        pending = [key for key in keys if key in self.dependencies]
+        while pending:
+            key = pending.pop()
+            if key not in needed:
+                needed.add(key)
+                pending.extend(self.dependencies[key])
+        return needed
+
+    def subgraph(self, keys: Iterable[str]) -> DependencyGraph:
+        """Return the graph restricted to :meth:`closure` of *keys*."""
+        needed = self.closure(keys)
+        graph = DependencyGraph.__new__(DependencyGraph)
+        graph.dependencies = {
+            key: deps for key, deps in self.dependencies.items() if key in needed
+        }
+        graph.order = [key for key in self.order if key in needed]
+        return graph
+
+    def without(self, keys: Iterable[str]) -> DependencyGraph:
+        """Return the graph without *keys*, whose values are already known
+        (e.g. evaluated column-wise for a whole batch)."""
+        known = set(keys)
+        graph = DependencyGraph.__new__(DependencyGraph)
+        graph.dependencies = {
+            key: [dep for dep in deps if dep not in known]
+            for key, deps in self.dependencies.items()
+            if key not in known
+        }
+        graph.order = [key for key in self.order if key not in known]
+        return graph
+
+    def _sort(self, keys: list[str]) -> list[str]:
+        index = {key: i for i, key in enumerate(keys)}
+        waiting = {key: len(deps) for key, deps in self.dependencies.items()}
+        dependents: dict[str, list[str]] = {key: [] for key in keys}
+        for key, deps in self.dependencies.items():
+            for dep in deps:
+                dependents[dep].append(key)
+
+        ready = [index[key] for key in keys if not waiting[key]]
+        heapq.heapify(ready)
+        order: list[str] = []
+        while ready:
+            key = keys[heapq.heappop(ready)]
+            order.append(key)
+            for dependent in dependents[key]:
+                waiting[dependent] -= 1
+                if not waiting[dependent]:
+                    heapq.heappush(ready, index[dependent])
+
+        if len(order) < len(keys):
+            raise CircularReferenceError(self._find_cycle(waiting))
+        return order
+
+    def _find_cycle(self, waiting: dict[str, int]) -> list[str]:
+        # Every key still waiting has a dependency that is waiting too, so
+        # following those from any of them must eventually revisit a key.
+        key = next(k for k, count in waiting.items() if count)
+        path: list[str] = []
+        seen: dict[str, int] = {}
+        while key not in seen:
+            seen[key] = len(path)
+            path.append(key)
+            key = next(dep for dep in self.dependencies[key] if waiting[dep])
+        return path[seen[key] :] + [key]
@@ -2,23 +2,60 @@
 
 from __future__ import annotations
 
+from functools import partial
 from typing import Any
 
+from document_placeholder import budget
+from document_placeholder.call_cache import CallCache, activate, deactivate
+from document_placeholder.compiler import TemplateString, compile_template
+from document_placeholder.dependencies import DependencyGraph
 from document_placeholder.functions import FunctionRegistry
+from document_placeholder.parse_cache import LITERAL, ParseCache, get_parse_cache
+from document_placeholder.profiling import get_profile
 from document_placeholder.parser import (
     BinaryOp,
+    Constant,
     FunctionCall,
     Identifier,
     NumberLiteral,
-    Parser,
     StringLiteral,
-    Tokenizer,
     UnaryOp,
 )
+from document_placeholder.scheduler import evaluate_graph
 
 
 class Evaluator:
-    """Evaluate config values: literals, expressions, and template strings."""
+    """Evaluate config values: literals, expressions, and template strings.
+
+    *variables* maps identifier names to values (e.g. the fields of a batch
+    record). Identifiers without a variable evaluate to their own name, which
+    keeps bare words such as ``CURRENT_DATE_NUM(year)`` working.
+
+    Expressions are parsed through *parse_cache* (default: the process-wide
+    :func:`~document_placeholder.parse_cache.get_parse_cache`).
+
+    Calls to functions with a ``"run"`` scope are memoized for the lifetime
+    of the evaluator, and those with a ``"batch"`` scope in *call_cache*,
+    which a batch shares between its records (default: per evaluator too).
+
+    An evaluator created while a :mod:`~document_placeholder.budget` is
+    active counts everything it evaluates against that budget.
+    """
+
+    def __init__(
+        self,
+        variables: dict[str, Any] | None = None,
+        parse_cache: ParseCache | None = None,
+        call_cache: CallCache | None = None,
+    ) -> None:
+        self.variables: dict[str, Any] = dict(variables) if variables else {}
+        self.parse_cache = parse_cache if parse_cache is not None else get_parse_cache()
+        run_cache = CallCache()
+        self.call_caches: dict[str, CallCache] = {
+            "run": run_cache,
+            "batch": call_cache if call_cache is not None else run_cache,
+        }
+        self.meter = budget.meter()
 
     # -- AST evaluation -------------------------------------------------------
 
@@ -29,10 +66,16 @@ class Evaluator:
         if isinstance(node, StringLiteral):
             return node.value
 
+        if isinstance(node, Constant):
+            return node.value
+
         if isinstance(node, Identifier):
-            return node.name
+            return self.variables.get(node.name, node.name)
 
         if isinstance(node, FunctionCall):
+            if FunctionRegistry.is_lazy(node.name):
+                thunks = [partial(self.evaluate, arg) for arg in node.args]
+                return FunctionRegistry.call_lazy(node.name, thunks)
             args = [self.evaluate(arg) for arg in node.args]
             return FunctionRegistry.call(node.name, args)
 
@@ -72,44 +115,65 @@ class Evaluator:
     # -- high-level helpers ---------------------------------------------------
 
     def evaluate_expression(self, text: str) -> Any:
-        """Parse *text* as a single expression and return its value."""
-        tokenizer = Tokenizer(text)
-        parser = Parser(tokenizer.tokens)
-        return self.evaluate(parser.parse())
+        """Parse *text* as a single expression and return its value.
+
+        Runs the compiled form of the expression; :meth:`evaluate` remains
+        the reference interpreter for ASTs.
+        """
+        return self._run(self.parse_cache.compile(text))
 
     def evaluate_template(self, text: str) -> str:
         """Replace every ``{expression}`` in *text* with its evaluated value."""
-        result: list[str] = []
-        i = 0
-        while i < len(text):
-            if text[i] == "{":
-                end = self._find_closing_brace(text, i)
-                expr_text = text[i + 1 : end]
-                value = self.evaluate_expression(expr_text)
-                result.append(str(value) if value is not None else "")
-                i = end + 1
-            else:
-                result.append(text[i])
-                i += 1
-        return "".join(result)
+        return self._run(self.parse_cache.template(text))
 
     def evaluate_value(self, value: Any) -> Any:
-        """Evaluate a raw config value (number, expression string, or template)."""
+        """Evaluate a raw config value (number, expression string, or template).
+
+        A string is an expression if it parses as one, otherwise a template
+        if it contains ``{``, otherwise a literal; the decision is cached
+        with the compiled form (see :meth:`ParseCache.classify`).
+        """
         if not isinstance(value, str):
             return value
+        raw = self.parse_cache.classify(value)
+        if raw.kind == LITERAL:
+            return value
+        return self._run(raw.compiled)
 
-        # 1) Try to interpret the whole string as an expression.
-        try:
-            return self.evaluate_expression(value)
-        except SyntaxError:
-            pass
-
-        # 2) If it contains {…}, treat as template with interpolation.
-        if "{" in value:
-            return self.evaluate_template(value)
+    def evaluate_placeholders(
+        self,
+        placeholders: dict[str, Any],
+        graph: DependencyGraph | None = None,
+        errors: dict[str, Exception] | None = None,
+        max_workers: int | None = None,
+    ) -> dict[str, Any]:
+        """Evaluate every placeholder key once, dependencies first.
+
+        Each value is added to :attr:`variables` as soon as it is known, so
+        identifiers naming another key see that key's value (variables that
+        already exist, such as batch record fields, are not replaced).
+        *graph* may be passed to reuse the dependency analysis; by default
+        it is built here.
+
+        Up to *max_workers* independent keys are evaluated concurrently
+        (default: :func:`~document_placeholder.scheduler.get_max_workers`).
+        The first error is raised, unless *errors* is given: then failed
+        keys, and the keys depending on them, are recorded there and left
+        out of the result. The result is in config order.
+        """
+        if graph is None:
+            graph = DependencyGraph(placeholders, self.parse_cache, self.variables)
+
+        def evaluate(key: str) -> Any:
+            value = self.evaluate_value(placeholders[key])
+            self.variables.setdefault(key, value)
+            return value
 
-        # 3) Plain literal string.
-        return value
+        profile = get_profile()
+        if profile is not None:
+            evaluate = profile.wrap("keys", evaluate)
+        results = evaluate_graph(graph, evaluate, max_workers, errors)
+        return {key: results[key] for key in placeholders if key in results}
 
     # -- output name resolution -----------------------------------------------
 
@@ -120,7 +184,13 @@ class Evaluator:
     ) -> str:
         """Resolve ``OUTPUT_NAME``: substitute ``{KEY}`` placeholders, then
         evaluate any remaining ``{expression}`` patterns."""
-        result = str(raw_name)
+        raw_name = str(raw_name)
+        template = self.parse_cache.template(raw_name)
+        substituted = self._substitute_fields(template, values)
+        if substituted is not None:
+            return self._run(template, substituted)
+
+        result = raw_name
         for key, value in values.items():
             placeholder = "{" + key + "}"
             if placeholder in result:
@@ -129,34 +199,48 @@ class Evaluator:
                 )
         # Only evaluate remaining {expr} patterns — never parse the whole
         # string as a single expression (it may contain literal dashes, etc.)
+        # The result differs per record, so it is compiled without caching.
         if "{" in result:
-            return self.evaluate_template(result)
+            template = compile_template(result, self.parse_cache.compile)
+            return self._run(template)
         return result
 
     # -- internals ------------------------------------------------------------
 
+    def _run(self, compiled: Any, *args: Any) -> Any:
+        """Call compiled code on :attr:`variables` with this evaluator's
+        call caches and budget meter active."""
+        token = activate(self.call_caches)
+        metered = budget.activate(self.meter) if self.meter is not None else None
+        try:
+            result = compiled(self.variables, *args)
+            if metered is not None:
+                budget.check_value(result)
+            return result
+        finally:
+            if metered is not None:
+                budget.deactivate(metered)
+            deactivate(token)
+
     @staticmethod
-    def _find_closing_brace(text: str, start: int) -> int:
-        """Return the index of the ``}`` matching the ``{`` at *start*."""
-        depth = 1
-        i = start + 1
-        in_string: str | None = None
-        while i < len(text):
-            ch = text[i]
-            if in_string:
-                if ch == "\\" and i + 1 < len(text):
-                    i += 2
-                    continue
-                if ch == in_string:
-                    in_string = None
-            else:
-                if ch in ('"', "'"):
-                    in_string = ch
-                elif ch == "{":
-                    depth += 1
-                elif ch == "}":
-                    depth -= 1
-                    if depth == 0:
-                        return i
-            i += 1
-        raise SyntaxError(f"Unmatched '{{' at position {start}")
+    def _substitute_fields(
+        template: TemplateString, values: dict[str, object]
+    ) -> dict[str, str] | None:
+        """Return the text of the ``{KEY}`` fields of *template* in *values*.
+
+        Substituting those as text and then evaluating the rest is the same
+        as rendering with them replaced, unless a field nests braces or a
+        value contains ``{`` (it would be evaluated after substitution).
+        ``None`` means the text-substitution path must be taken.
+        """
+        substituted: dict[str, str] = {}
+        for field in template.fields:
+            if field.text is None or "{" in field.text:
+                return None
+            if field.text in values:
+                value = values[field.text]
+                text = str(value) if value is not None else ""
+                if "{" in text:
+                    return None
+                substituted[field.text] = text
+        return substituted
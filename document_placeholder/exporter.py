@@ -2,9 +2,95 @@
 
 from __future__ import annotations
 
+import atexit
+import math
+import os
 import shutil
 import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Iterator, Protocol, Sequence
+
+DEFAULT_CHUNK_SIZE = 25
+
+
+class PdfBackend(Protocol):
+    def convert(self, input_path: Path, output_path: Path) -> None: ...
+
+
+_pdf_backend: PdfBackend | None = None
+
+
+def set_pdf_backend(backend: PdfBackend | None) -> None:
+    """Route PDF conversions through *backend* (e.g. an ``OfficePool``).
+
+    ``None`` restores the default of one LibreOffice process per document.
+    """
+    global _pdf_backend
+    _pdf_backend = backend
+
+
+_max_parallel: int = os.cpu_count() or 1
+
+
+def set_max_parallel(limit: int) -> None:
+    """Allow at most *limit* conversions to run at the same time.
+
+    Defaults to the CPU count. Every concurrent LibreOffice run gets its own
+    user profile, so the runs do not block each other on the profile lock.
+    """
+    global _max_parallel
+    if limit < 1:
+        raise ValueError("Export concurrency limit must be at least 1")
+    with _profiles.cond:
+        _max_parallel = limit
+        _profiles.cond.notify_all()
+
+
+class _ProfilePool:
+    """LibreOffice user profiles, one per concurrent conversion slot.
+
+    Profiles are created on first use and reused afterwards, so LibreOffice's
+    first-start initialisation is paid once per slot. Acquiring a profile
+    also enforces the concurrency limit.
+    """
+
+    def __init__(self) -> None:
+        self.cond = threading.Condition()
+        self._free: list[Path] = []
+        self._in_use = 0
+        self._created = 0
+        self._base: Path | None = None
+
+    @contextmanager
+    def acquire(self) -> Iterator[Path]:
+        with self.cond:
+            while self._in_use >= _max_parallel:
+                self.cond.wait()
+            self._in_use += 1
+            profile = self._free.pop() if self._free else self._new_profile()
+        try:
+            yield profile
+        finally:
+            with self.cond:
+                self._free.append(profile)
+                self._in_use -= 1
+                self.cond.notify()
+
+    def _new_profile(self) -> Path:
+        if self._base is None:
+            self._base = Path(tempfile.mkdtemp(prefix="docplaceholder-profiles-"))
+            atexit.register(shutil.rmtree, self._base, ignore_errors=True)
+        self._created += 1
+        profile = self._base / f"profile-{self._created}"
+        profile.mkdir()
+        return profile
+
+
+_profiles = _ProfilePool()
 
 
 def export_document(input_path: str | Path, output_path: str | Path) -> None:
@@ -15,29 +101,150 @@ def export_document(input_path: str | Path, output_path: str | Path) -> None:
     if ext == ".docx":
         shutil.copy2(input_path, output_path)
     elif ext == ".pdf":
-        _convert_with_libreoffice(input_path, output_path)
+        if _pdf_backend is not None:
+            _pdf_backend.convert(input_path, output_path)
+        else:
+            failures = _convert_with_libreoffice([(input_path, output_path)])
+            if failures:
+                raise RuntimeError(
+                    f"LibreOffice conversion failed:\n{failures[output_path]}"
+                )
     else:
         raise ValueError(f"Unsupported output format: {ext}")
 
 
-def _convert_with_libreoffice(input_path: Path, output_path: Path) -> None:
-    output_dir = output_path.parent or Path(".")
-    result = subprocess.run(
-        [
-            "libreoffice",
-            "--headless",
-            "--convert-to",
-            "pdf",
-            "--outdir",
-            str(output_dir),
-            str(input_path),
-        ],
-        capture_output=True,
-        text=True,
-    )
-    if result.returncode != 0:
-        raise RuntimeError(f"LibreOffice conversion failed:\n{result.stderr}")
-
-    converted = output_dir / input_path.with_suffix(".pdf").name
-    if converted.resolve() != output_path.resolve():
-        shutil.move(str(converted), str(output_path))
+class ExportError(RuntimeError):
+    """Some documents of a bulk export failed; the others were written.
+
+    *failures* maps each failed target path to the reason.
+    """
+
+    def __init__(self, failures: dict[Path, str]) -> None:
+        self.failures = failures
+        lines = [f"  {target}: {reason}" for target, reason in failures.items()]
+        super().__init__(
+            f"Export failed for {len(failures)} document(s):\n" + "\n".join(lines)
+        )
+
+
+def export_documents(
+    paths: Sequence[str | Path],
+    fmt: str,
+    targets: Sequence[str | Path] | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> list[Path]:
+    """Export many .docx files to *fmt* and return the output paths.
+
+    Each input is written to the matching entry of *targets* (default: same
+    directory and name with the new extension). Without a PDF backend, inputs
+    are converted by one LibreOffice invocation per chunk of at most
+    *chunk_size* files instead of one per file. Chunks (or backend calls) run
+    in parallel up to the limit set by :func:`set_max_parallel`.
+
+    Raises :class:`ExportError` after all conversions were attempted if any
+    of them failed.
+    """
+    fmt = fmt.lower().lstrip(".")
+    inputs = [Path(p) for p in paths]
+    if targets is None:
+        outputs = [p.with_suffix(f".{fmt}") for p in inputs]
+    else:
+        outputs = [Path(t) for t in targets]
+        if len(outputs) != len(inputs):
+            raise ValueError("export_documents: paths and targets differ in length")
+    jobs = list(zip(inputs, outputs))
+
+    failures: dict[Path, str] = {}
+    if fmt == "docx":
+        for input_path, output_path in jobs:
+            try:
+                shutil.copy2(input_path, output_path)
+            except OSError as exc:
+                failures[output_path] = str(exc)
+    elif fmt == "pdf":
+        if _pdf_backend is not None:
+            tasks = [[job] for job in jobs]
+            convert = _convert_with_backend
+        else:
+            # Spread small batches over all slots instead of one big chunk.
+            size = min(chunk_size, math.ceil(len(jobs) / _max_parallel) or 1)
+            tasks = list(_chunks(jobs, size))
+            convert = _convert_with_libreoffice
+        if len(tasks) == 1:
+            failures.update(convert(tasks[0]))
+        elif tasks:
+            with ThreadPoolExecutor(max_workers=_max_parallel) as pool:
+                for task_failures in pool.map(convert, tasks):
+                    failures.update(task_failures)
+    else:
+        raise ValueError(f"Unsupported output format: .{fmt}")
+
+    if failures:
+        raise ExportError(failures)
+    return outputs
+
+
+def _chunks(
+    jobs: list[tuple[Path, Path]],
+    chunk_size: int,
+) -> Iterator[list[tuple[Path, Path]]]:
+    """Split *jobs* into chunks whose input file names are unique.
+
+    soffice names each output after its input, so two inputs called
+    ``a.docx`` cannot share one ``--outdir``.
+    """
+    chunk: list[tuple[Path, Path]] = []
+    names: set[str] = set()
+    for job in jobs:
+        name = job[0].stem
+        if len(chunk) >= max(1, chunk_size) or name in names:
+            yield chunk
+            chunk, names = [], set()
+        chunk.append(job)
+        names.add(name)
+    if chunk:
+        yield chunk
+
+
+def _convert_with_backend(jobs: list[tuple[Path, Path]]) -> dict[Path, str]:
+    failures: dict[Path, str] = {}
+    for input_path, output_path in jobs:
+        try:
+            _pdf_backend.convert(input_path, output_path)
+        except Exception as exc:
+            failures[output_path] = str(exc)
+    return failures
+
+
+def _convert_with_libreoffice(jobs: list[tuple[Path, Path]]) -> dict[Path, str]:
+    """Convert every ``(input, output)`` pair in one soffice run.
+
+    Returns the failed outputs mapped to the reason.
+    """
+    with (
+        _profiles.acquire() as profile,
+        tempfile.TemporaryDirectory(prefix="docplaceholder-") as tmp,
+    ):
+        result = subprocess.run(
+            [
+                "libreoffice",
+                f"-env:UserInstallation={profile.as_uri()}",
+                "--headless",
+                "--convert-to",
+                "pdf",
+                "--outdir",
+                tmp,
+                *(str(input_path) for input_path, _ in jobs),
+            ],
+            capture_output=True,
+            text=True,
+        )
+        reason = result.stderr.strip() or "no output produced"
+        failures: dict[Path, str] = {}
+        for input_path, output_path in jobs:
+            converted = Path(tmp) / f"{input_path.stem}.pdf"
+            if converted.exists():
+                shutil.move(str(converted), str(output_path))
+            else:
+                failures[output_path] = reason
+        return failures
@@ -1,7 +1,54 @@
 from __future__ import annotations
 
+import inspect
+from dataclasses import dataclass
 from typing import Any, Callable
 
+# Determinism scopes: how long a function's result stays valid for the same
+# arguments. Results are memoized within their scope (see
+# :mod:`document_placeholder.call_cache`).
+SCOPE_CALL = "call"  # may change on every call (RANDOM_INT, SQL)
+SCOPE_RUN = "run"  # fixed while one document is rendered
+SCOPE_BATCH = "batch"  # fixed for a whole batch (today's date, ENV)
+SCOPES = (SCOPE_CALL, SCOPE_RUN, SCOPE_BATCH)
+
+# Pure functions at least this expensive are memoized per batch even when
+# their arguments differ between records.
+MEMOIZE_COST = 10.0
+
+
+@dataclass(frozen=True)
+class FunctionInfo:
+    """Metadata declared when a function is registered.
+
+    *arity* is ``(min, max)`` positional arguments, ``max`` being ``None``
+    for variadic functions. *cost* is a rough cost of one call relative to
+    a cheap builtin such as ``UPPER`` (``1``). *keywords* are bare words
+    the function takes by name (``CURRENT_DATE_NUM(year)``).
+    """
+
+    name: str
+    func: Callable
+    pure: bool = False
+    lazy: bool = False
+    scope: str = SCOPE_CALL
+    arity: tuple[int, int | None] = (0, None)
+    cost: float = 1.0
+    keywords: frozenset[str] = frozenset()
+
+    @property
+    def memo_scope(self) -> str | None:
+        """Scope whose cache holds this function's results, if any."""
+        if self.lazy:
+            return None  # thunk arguments are not cacheable
+        if self.pure:
+            return SCOPE_BATCH if self.cost >= MEMOIZE_COST else None
+        return self.scope if self.scope != SCOPE_CALL else None
+
+    def accepts(self, count: int) -> bool:
+        low, high = self.arity
+        return count >= low and (high is None or count <= high)
+
 
 class FunctionRegistry:
     """Extensible registry for config functions.
@@ -11,26 +58,182 @@ class FunctionRegistry:
         @FunctionRegistry.register("MY_FUNC")
         def my_func(*args):
             ...
+
+    Functions registered with ``pure=True`` always return the same result for
+    the same arguments and have no side effects; calls to them with constant
+    arguments are evaluated once when the expression is compiled.
+
+    Impure functions may declare a *scope* in which their result does not
+    change: ``"run"`` (one document) or ``"batch"`` (every document of a
+    batch, e.g. ``CURRENT_DATE_STR``); calls are then memoized within that
+    scope. *arity* (derived from the signature when omitted) and *cost* are
+    recorded in :meth:`info`.
+
+    *keywords* lists bare words the function receives as their own name even
+    where a variable of that name exists, e.g. ``CURRENT_DATE_NUM(year)``
+    in a batch whose records have a ``year`` field.
+
+    Functions registered with ``lazy=True`` receive every argument as a
+    zero-argument callable and evaluate only the ones they need, so
+    ``IF(FLAG, SQL('...'), 'n/a')`` runs the query only when ``FLAG`` holds::
+
+        @FunctionRegistry.register("FIRST_TRUTHY", lazy=True)
+        def first_truthy(*args):
+            for arg in args:
+                if value := arg():
+                    return value
     """
 
     _functions: dict[str, Callable] = {}
+    _pure: set[str] = set()
+    _lazy: set[str] = set()
+    _info: dict[str, FunctionInfo] = {}
+    # name -> (function the kernel implements, kernel)
+    _kernels: dict[str, tuple[Callable, Callable]] = {}
+    # Bumped on every registration; compiled expressions bind functions and
+    # are dropped when it changes.
+    generation: int = 0
 
     @classmethod
-    def register(cls, name: str):
+    def register(
+        cls,
+        name: str,
+        pure: bool = False,
+        lazy: bool = False,
+        scope: str | None = None,
+        arity: int | tuple[int, int | None] | None = None,
+        cost: float = 1.0,
+        keywords: tuple[str, ...] = (),
+    ):
         """Decorator that registers *func* under *name*."""
+        if scope is None:
+            scope = SCOPE_BATCH if pure else SCOPE_CALL
+        elif scope not in SCOPES:
+            raise ValueError(f"Unknown scope {scope!r}; expected one of {SCOPES}")
+        if isinstance(arity, int):
+            arity = (arity, arity)
 
         def decorator(func: Callable) -> Callable:
             cls._functions[name] = func
+            cls._info[name] = FunctionInfo(
+                name=name,
+                func=func,
+                pure=pure,
+                lazy=lazy,
+                scope=scope,
+                arity=arity if arity is not None else _arity(func),
+                cost=cost,
+                keywords=frozenset(keywords),
+            )
+            for flag, names in ((pure, cls._pure), (lazy, cls._lazy)):
+                if flag:
+                    names.add(name)
+                else:
+                    names.discard(name)
+            cls.generation += 1
             return func
 
         return decorator
 
+    @classmethod
+    def invalidate(cls) -> None:
+        """Drop expressions compiled so far, so the next evaluations compile
+        (and bind functions) again."""
+        cls.generation += 1
+
+    @classmethod
+    def kernel(cls, name: str):
+        """Decorator that registers a column kernel for the function *name*.
+
+        A kernel takes one list per argument, holding that argument's value
+        for every row, and returns the list of results; it must give the
+        same results as calling the function row by row (see
+        :mod:`document_placeholder.vectorized`). It applies only to the
+        function registered under *name* at that time.
+        """
+
+        def decorator(kernel: Callable) -> Callable:
+            if name not in cls._functions:
+                raise ValueError(f"Unknown function: {name}")
+            cls._kernels[name] = (cls._functions[name], kernel)
+            return kernel
+
+        return decorator
+
+    @classmethod
+    def get_kernel(cls, name: str) -> Callable | None:
+        entry = cls._kernels.get(name)
+        if entry is None or entry[0] is not cls._functions.get(name):
+            return None
+        return entry[1]
+
     @classmethod
     def call(cls, name: str, args: list[Any]) -> Any:
+        """Call *name* with already evaluated *args*."""
         if name not in cls._functions:
             raise ValueError(f"Unknown function: {name}")
+        if name in cls._lazy:
+            return cls._functions[name](*[_constant(arg) for arg in args])
         return cls._functions[name](*args)
 
+    @classmethod
+    def call_lazy(cls, name: str, thunks: list[Callable[[], Any]]) -> Any:
+        """Call *name* with arguments that are evaluated on demand.
+
+        Each thunk is called at most as often as the function asks for it;
+        functions that are not lazy get every argument evaluated up front.
+        """
+        if name not in cls._functions:
+            raise ValueError(f"Unknown function: {name}")
+        if name in cls._lazy:
+            return cls._functions[name](*thunks)
+        return cls._functions[name](*[thunk() for thunk in thunks])
+
+    @classmethod
+    def get(cls, name: str) -> Callable | None:
+        return cls._functions.get(name)
+
     @classmethod
     def has(cls, name: str) -> bool:
         return name in cls._functions
+
+    @classmethod
+    def is_pure(cls, name: str) -> bool:
+        return name in cls._pure
+
+    @classmethod
+    def is_lazy(cls, name: str) -> bool:
+        return name in cls._lazy
+
+    @classmethod
+    def info(cls, name: str) -> FunctionInfo | None:
+        """Return the metadata of *name*, or ``None`` if it is unknown.
+
+        Functions placed in the registry without :meth:`register` get
+        default metadata.
+        """
+        func = cls._functions.get(name)
+        if func is None:
+            return None
+        info = cls._info.get(name)
+        if info is None or info.func is not func:
+            return FunctionInfo(name, func, arity=_arity(func))
+        return info
+
+
+def _arity(func: Callable) -> tuple[int, int | None]:
+    try:
+        params = inspect.signature(func).parameters.values()
+    except (TypeError, ValueError):
+        return (0, None)
+    positional = [
+        p for p in params if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD)
+    ]
+    low = sum(1 for p in positional if p.default is p.empty)
+    if any(p.kind is p.VAR_POSITIONAL for p in params):
+        return (low, None)
+    return (low, len(positional))
+
+
+def _constant(value: Any) -> Callable[[], Any]:
+    return lambda: value
@@ -74,7 +74,15 @@ DAY_NAMES: dict[int, str] = {
 }
 
 
-@FunctionRegistry.register("CURRENT_DATE_NUM")
+# Functions reading today's date are computed once per batch (see
+# :mod:`document_placeholder.call_cache`), so every document of a batch
+# running past midnight still carries the same date.
+
+# Bare words naming a date component, never looked up as variables.
+COMPONENTS = ("day", "month", "year")
+
+
+@FunctionRegistry.register("CURRENT_DATE_NUM", scope="batch", keywords=COMPONENTS)
 def current_date_num(*args: str):
     """Return numeric date component(s).
 
@@ -96,7 +104,7 @@ def current_date_num(*args: str):
     return DateValue(today, list(args))
 
 
-@FunctionRegistry.register("CURRENT_DATE_STR")
+@FunctionRegistry.register("CURRENT_DATE_STR", scope="batch", keywords=COMPONENTS)
 def current_date_str(*args: str):
     """Return a human-readable string for a date component.
 
@@ -117,37 +125,37 @@ def current_date_str(*args: str):
     raise ValueError(f"Unknown date component: {comp}")
 
 
-@FunctionRegistry.register("DAYS")
+@FunctionRegistry.register("DAYS", pure=True)
 def days(n) -> timedelta:
     """Return a ``timedelta`` of *n* days."""
     return timedelta(days=int(n))
 
 
-@FunctionRegistry.register("WEEKS")
+@FunctionRegistry.register("WEEKS", pure=True)
 def weeks(n) -> timedelta:
     """Return a ``timedelta`` of *n* weeks."""
     return timedelta(weeks=int(n))
 
 
-@FunctionRegistry.register("MONTHS")
+@FunctionRegistry.register("MONTHS", pure=True)
 def months(n) -> timedelta:
     """Approximate ``timedelta`` of *n* months (30 days each)."""
     return timedelta(days=int(n) * 30)
 
 
-@FunctionRegistry.register("YEARS")
+@FunctionRegistry.register("YEARS", pure=True)
 def years(n) -> timedelta:
     """Approximate ``timedelta`` of *n* years (365 days each)."""
     return timedelta(days=int(n) * 365)
 
 
-@FunctionRegistry.register("TODAY")
+@FunctionRegistry.register("TODAY", scope="batch")
 def today():
     """Return today's date as a ``DateValue``."""
     return DateValue(date.today())
 
 
-@FunctionRegistry.register("DATE")
+@FunctionRegistry.register("DATE", pure=True)
 def make_date(year, month, day):
     """Construct a ``DateValue`` from explicit components.
 
@@ -156,7 +164,7 @@ def make_date(year, month, day):
     return DateValue(date(int(year), int(month), int(day)))
 
 
-@FunctionRegistry.register("DATE_FORMAT")
+@FunctionRegistry.register("DATE_FORMAT", pure=True)
 def date_format(d, fmt) -> str:
     """Format a date using a ``strftime``-style *fmt* string.
 
@@ -169,7 +177,7 @@ def date_format(d, fmt) -> str:
     raise TypeError(f"DATE_FORMAT expects a date, got {type(d).__name__}")
 
 
-@FunctionRegistry.register("DAY_OF_WEEK")
+@FunctionRegistry.register("DAY_OF_WEEK", scope="batch")
 def day_of_week(d=None) -> int:
     """Return the ISO weekday number (Monday=1 … Sunday=7)."""
     if d is None:
@@ -181,7 +189,7 @@ def day_of_week(d=None) -> int:
     raise TypeError(f"DAY_OF_WEEK expects a date, got {type(d).__name__}")
 
 
-@FunctionRegistry.register("DAYS_BETWEEN")
+@FunctionRegistry.register("DAYS_BETWEEN", pure=True)
 def days_between(a, b) -> int:
     """Return the number of days between two dates (``b - a``).
 
@@ -9,67 +9,78 @@ from document_placeholder.functions import FunctionRegistry
 _reg = FunctionRegistry.register
 
 
-@_reg("IF")
+# IF, COALESCE, DEFAULT, AND, OR, CHOOSE and SWITCH take lazy arguments:
+# each one is a callable, evaluated only if it decides the result.
+
+
+@_reg("IF", pure=True, lazy=True)
 def if_fn(condition, then_val, else_val=None):
     """Return *then_val* when *condition* is truthy, otherwise *else_val*.
 
     ``IF(PRICE > 1000, 'expensive', 'cheap')``
     """
-    return then_val if condition else (else_val if else_val is not None else "")
+    if condition():
+        return then_val()
+    if else_val is None:
+        return ""
+    value = else_val()
+    return value if value is not None else ""
 
 
-@_reg("COALESCE")
+@_reg("COALESCE", pure=True, lazy=True)
 def coalesce(*args):
     """Return the first non-``None`` argument (or ``None``)."""
-    for a in args:
-        if a is not None:
-            return a
+    for arg in args:
+        value = arg()
+        if value is not None:
+            return value
     return None
 
 
-@_reg("DEFAULT")
+@_reg("DEFAULT", pure=True, lazy=True)
 def default(val, fallback):
     """Return *val* if it is not ``None``, otherwise *fallback*."""
-    return val if val is not None else fallback
+    value = val()
+    return value if value is not None else fallback()
 
 
-@_reg("DEFINED")
+@_reg("DEFINED", pure=True)
 def defined(val) -> bool:
     """Return ``True`` if *val* is not ``None``."""
     return val is not None
 
 
-@_reg("NOT")
+@_reg("NOT", pure=True)
 def not_fn(val) -> bool:
     """Logical NOT."""
     return not val
 
 
-@_reg("AND")
+@_reg("AND", pure=True, lazy=True)
 def and_fn(*args) -> bool:
     """Logical AND — ``True`` when every argument is truthy."""
-    return all(args)
+    return all(arg() for arg in args)
 
 
-@_reg("OR")
+@_reg("OR", pure=True, lazy=True)
 def or_fn(*args) -> bool:
     """Logical OR — ``True`` when at least one argument is truthy."""
-    return any(args)
+    return any(arg() for arg in args)
 
 
-@_reg("CHOOSE")
+@_reg("CHOOSE", pure=True, lazy=True)
 def choose(index, *args):
     """Pick a value by 0-based *index*.
 
     ``CHOOSE(1, 'a', 'b', 'c')`` → ``'b'``
     """
-    i = int(index)
+    i = int(index())
     if 0 <= i < len(args):
-        return args[i]
+        return args[i]()
     raise ValueError(f"CHOOSE index {i} out of range (0..{len(args) - 1})")
 
 
-@_reg("SWITCH")
+@_reg("SWITCH", pure=True, lazy=True)
 def switch(value, *pairs):
     """Match *value* against ``(case, result)`` pairs with optional default.
 
@@ -77,17 +88,16 @@ def switch(value, *pairs):
 
     Odd number of remaining args means the last one is the default.
     """
-    it = iter(pairs)
-    for case in it:
-        result = next(it, None)
-        if result is None:
-            return case  # last unpaired value = default
-        if value == case:
-            return result
+    subject = value()
+    for i in range(0, len(pairs) - 1, 2):
+        if subject == pairs[i]():
+            return pairs[i + 1]()
+    if len(pairs) % 2:
+        return pairs[-1]()
     return None
 
 
-@_reg("ENV")
+@_reg("ENV", scope="batch")
 def env(name, fallback="") -> str:
     """Read an environment variable (with optional *fallback*).
 
@@ -9,49 +9,49 @@ from document_placeholder.functions import FunctionRegistry
 _reg = FunctionRegistry.register
 
 
-@_reg("ROUND")
+@_reg("ROUND", pure=True)
 def round_fn(n, decimals=0):
     """Round *n* to *decimals* decimal places."""
     return round(float(n), int(decimals))
 
 
-@_reg("FLOOR")
+@_reg("FLOOR", pure=True)
 def floor(n) -> int:
     """Return the largest integer ≤ *n*."""
     return _math.floor(float(n))
 
 
-@_reg("CEIL")
+@_reg("CEIL", pure=True)
 def ceil(n) -> int:
     """Return the smallest integer ≥ *n*."""
     return _math.ceil(float(n))
 
 
-@_reg("ABS")
+@_reg("ABS", pure=True)
 def abs_fn(n):
     """Return the absolute value of *n*."""
     return abs(n)
 
 
-@_reg("MIN")
+@_reg("MIN", pure=True)
 def min_fn(*args):
     """Return the smallest argument."""
     return min(args)
 
 
-@_reg("MAX")
+@_reg("MAX", pure=True)
 def max_fn(*args):
     """Return the largest argument."""
     return max(args)
 
 
-@_reg("SUM")
+@_reg("SUM", pure=True)
 def sum_fn(*args):
     """Return the sum of all arguments."""
     return sum(args)
 
 
-@_reg("AVG")
+@_reg("AVG", pure=True)
 def avg(*args):
     """Return the arithmetic mean of all arguments."""
     if not args:
@@ -59,31 +59,31 @@ def avg(*args):
     return sum(args) / len(args)
 
 
-@_reg("POW")
+@_reg("POW", pure=True)
 def pow_fn(base, exp):
     """Return *base* raised to the power *exp*."""
     return float(base) ** float(exp)
 
 
-@_reg("SQRT")
+@_reg("SQRT", pure=True)
 def sqrt(n):
     """Return the square root of *n*."""
     return _math.sqrt(float(n))
 
 
-@_reg("INT")
+@_reg("INT", pure=True)
 def int_fn(n) -> int:
     """Convert *n* to integer (truncates toward zero)."""
     return int(float(n))
 
 
-@_reg("FLOAT")
+@_reg("FLOAT", pure=True)
 def float_fn(n) -> float:
     """Convert *n* to float."""
     return float(n)
 
 
-@_reg("FORMAT_NUM")
+@_reg("FORMAT_NUM", pure=True)
 def format_num(n, decimals=2) -> str:
     """Format *n* with thousands separators and *decimals* decimal places.
 
@@ -98,3 +98,34 @@ def random_int(low, high) -> int:
     import random
 
     return random.randint(int(low), int(high))
+
+
+# ---------------------------------------------------------------------------
+# Column kernels (see document_placeholder.vectorized)
+# ---------------------------------------------------------------------------
+
+_kernel = FunctionRegistry.kernel
+
+
+@_kernel("ROUND")
+def _round_column(values: list, decimals: list | None = None) -> list[float]:
+    if decimals is None:
+        return [round(float(n), 0) for n in values]
+    return [round(float(n), int(d)) for n, d in zip(values, decimals)]
+
+
+@_kernel("INT")
+def _int_column(values: list) -> list[int]:
+    return [int(float(n)) for n in values]
+
+
+@_kernel("FLOAT")
+def _float_column(values: list) -> list[float]:
+    return [float(n) for n in values]
+
+
+@_kernel("FORMAT_NUM")
+def _format_num_column(values: list, decimals: list | None = None) -> list[str]:
+    if decimals is None:
+        return [f"{float(n):,.2f}" for n in values]
+    return [f"{float(n):,.{int(d)}f}" for n, d in zip(values, decimals)]
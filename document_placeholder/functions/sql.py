@@ -1,11 +1,23 @@
 from __future__ import annotations
 
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
 
+from document_placeholder.budget import BudgetExceededError, sql_deadline
 from document_placeholder.functions import FunctionRegistry
+from document_placeholder.profiling import measure
 
 _db_path: str = "data.db"
 _connection: sqlite3.Connection | None = None
+# Placeholders may be evaluated on several threads (see
+# :mod:`document_placeholder.scheduler`); they share the connection, one
+# statement at a time.
+_lock = threading.RLock()
+# SQLite virtual machine instructions between two deadline checks.
+_PROGRESS_INTERVAL = 1000
 
 
 def init(db_path: str = "data.db") -> None:
@@ -17,36 +29,59 @@ def init(db_path: str = "data.db") -> None:
 
 def get_connection() -> sqlite3.Connection:
     global _connection
-    if _connection is None:
-        _connection = sqlite3.connect(_db_path)
-    return _connection
+    with _lock:
+        if _connection is None:
+            _connection = sqlite3.connect(_db_path, check_same_thread=False)
+        return _connection
 
 
 def close() -> None:
     global _connection
-    if _connection is not None:
-        _connection.close()
-        _connection = None
+    with _lock:
+        if _connection is not None:
+            _connection.close()
+            _connection = None
 
 
-@FunctionRegistry.register("SQL")
+@contextmanager
+def _time_limit(conn: sqlite3.Connection, query: str) -> Iterator[None]:
+    """Interrupt *query* when the active budget's SQL deadline passes."""
+    deadline = sql_deadline()
+    if deadline is None:
+        yield
+        return
+    start = time.monotonic()
+    conn.set_progress_handler(lambda: time.monotonic() > deadline, _PROGRESS_INTERVAL)
+    try:
+        yield
+    except sqlite3.OperationalError as exc:
+        if time.monotonic() <= deadline:
+            raise
+        conn.rollback()
+        raise BudgetExceededError(
+            f"SQL query interrupted after {time.monotonic() - start:.2f}s: {query}"
+        ) from exc
+    finally:
+        conn.set_progress_handler(None, 0)
+
+
+# Not memoized: a query may write, or read what another one wrote.
+@FunctionRegistry.register("SQL", arity=1, cost=100)
 def sql(query: str):
     """Execute a SQL query and return the result.
 
     * ``SELECT`` → first column of first row (or ``None``)
     * Everything else → ``None`` (side-effect only)
     """
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(query)
+    with _lock, measure("sql", query):
+        conn = get_connection()
+        cursor = conn.cursor()
+        upper = query.strip().upper()
+        with _time_limit(conn, query):
+            cursor.execute(query)
+            row = cursor.fetchone() if upper.startswith("SELECT") else None
 
-    upper = query.strip().upper()
-    if upper.startswith("SELECT"):
-        row = cursor.fetchone()
         conn.commit()
         if row is None:
             return None
         return row[0] if len(row) == 1 else row
-
-    conn.commit()
-    return None
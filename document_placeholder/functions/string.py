@@ -2,66 +2,71 @@
 
 from __future__ import annotations
 
+from document_placeholder.budget import reserve
 from document_placeholder.functions import FunctionRegistry
 
 _reg = FunctionRegistry.register
 
 
-@_reg("UPPER")
+@_reg("UPPER", pure=True)
 def upper(text) -> str:
     """Convert *text* to uppercase."""
     return str(text).upper()
 
 
-@_reg("LOWER")
+@_reg("LOWER", pure=True)
 def lower(text) -> str:
     """Convert *text* to lowercase."""
     return str(text).lower()
 
 
-@_reg("CAPITALIZE")
+@_reg("CAPITALIZE", pure=True)
 def capitalize(text) -> str:
     """Capitalize the first letter."""
     return str(text).capitalize()
 
 
-@_reg("TITLE")
+@_reg("TITLE", pure=True)
 def title(text) -> str:
     """Title-case every word."""
     return str(text).title()
 
 
-@_reg("TRIM")
+@_reg("TRIM", pure=True)
 def trim(text) -> str:
     """Strip leading/trailing whitespace."""
     return str(text).strip()
 
 
-@_reg("TRIM_LEFT")
+@_reg("TRIM_LEFT", pure=True)
 def trim_left(text) -> str:
     """Strip leading whitespace."""
     return str(text).lstrip()
 
 
-@_reg("TRIM_RIGHT")
+@_reg("TRIM_RIGHT", pure=True)
 def trim_right(text) -> str:
     """Strip trailing whitespace."""
     return str(text).rstrip()
 
 
-@_reg("LEN")
+@_reg("LEN", pure=True)
 def len_fn(text) -> int:
     """Return the length of *text*."""
     return len(str(text))
 
 
-@_reg("REPLACE")
+@_reg("REPLACE", pure=True)
 def replace(text, old, new) -> str:
     """Replace every occurrence of *old* with *new* in *text*."""
-    return str(text).replace(str(old), str(new))
+    text, old, new = str(text), str(old), str(new)
+    if len(new) > len(old):
+        count = text.count(old) if old else len(text) + 1
+        reserve(len(text) + count * (len(new) - len(old)))
+    return text.replace(old, new)
 
 
-@_reg("SUBSTR")
+@_reg("SUBSTR", pure=True)
 def substr(text, start, length=None) -> str:
     """Return a substring starting at *start* (0-based) with optional *length*."""
     s = str(text)
@@ -71,79 +76,130 @@ def substr(text, start, length=None) -> str:
     return s[start : start + int(length)]
 
 
-@_reg("LEFT")
+@_reg("LEFT", pure=True)
 def left(text, n) -> str:
     """Return the first *n* characters."""
     return str(text)[: int(n)]
 
 
-@_reg("RIGHT")
+@_reg("RIGHT", pure=True)
 def right(text, n) -> str:
     """Return the last *n* characters."""
     return str(text)[-int(n) :]
 
 
-@_reg("PAD_LEFT")
+@_reg("PAD_LEFT", pure=True)
 def pad_left(text, width, char=" ") -> str:
     """Right-justify *text* in a field of *width*, padding with *char*."""
+    reserve(int(width))
     return str(text).rjust(int(width), str(char)[0])
 
 
-@_reg("PAD_RIGHT")
+@_reg("PAD_RIGHT", pure=True)
 def pad_right(text, width, char=" ") -> str:
     """Left-justify *text* in a field of *width*, padding with *char*."""
+    reserve(int(width))
     return str(text).ljust(int(width), str(char)[0])
 
 
-@_reg("REPEAT")
+@_reg("REPEAT", pure=True)
 def repeat(text, n) -> str:
     """Repeat *text* *n* times."""
-    return str(text) * int(n)
+    text = str(text)
+    reserve(len(text) * int(n))
+    return text * int(n)
 
 
-@_reg("CONCAT")
+@_reg("CONCAT", pure=True)
 def concat(*args) -> str:
     """Concatenate all arguments into one string."""
     return "".join(str(a) for a in args)
 
 
-@_reg("JOIN")
+@_reg("JOIN", pure=True)
 def join(sep, *args) -> str:
     """Join arguments with *sep* separator."""
     return str(sep).join(str(a) for a in args)
 
 
-@_reg("CONTAINS")
+@_reg("CONTAINS", pure=True)
 def contains(text, sub) -> bool:
     """Return ``True`` if *text* contains *sub*."""
     return str(sub) in str(text)
 
 
-@_reg("STARTS_WITH")
+@_reg("STARTS_WITH", pure=True)
 def starts_with(text, prefix) -> bool:
     """Return ``True`` if *text* starts with *prefix*."""
     return str(text).startswith(str(prefix))
 
 
-@_reg("ENDS_WITH")
+@_reg("ENDS_WITH", pure=True)
 def ends_with(text, suffix) -> bool:
     """Return ``True`` if *text* ends with *suffix*."""
     return str(text).endswith(str(suffix))
 
 
-@_reg("SPLIT")
+@_reg("SPLIT", pure=True)
 def split(text, sep, index) -> str:
     """Split *text* by *sep* and return the part at *index*."""
     return str(text).split(str(sep))[int(index)]
 
 
-@_reg("REVERSE")
+@_reg("REVERSE", pure=True)
 def reverse(text) -> str:
     """Reverse *text*."""
     return str(text)[::-1]
 
 
-@_reg("COUNT_SUBSTR")
+@_reg("COUNT_SUBSTR", pure=True)
 def count_substr(text, sub) -> int:
     """Count non-overlapping occurrences of *sub* in *text*."""
     return str(text).count(str(sub))
+
+
+# ---------------------------------------------------------------------------
+# Column kernels (see document_placeholder.vectorized)
+# ---------------------------------------------------------------------------
+
+_kernel = FunctionRegistry.kernel
+
+
+@_kernel("UPPER")
+def _upper_column(texts: list) -> list[str]:
+    return [str(t).upper() for t in texts]
+
+
+@_kernel("LOWER")
+def _lower_column(texts: list) -> list[str]:
+    return [str(t).lower() for t in texts]
+
+
+@_kernel("CAPITALIZE")
+def _capitalize_column(texts: list) -> list[str]:
+    return [str(t).capitalize() for t in texts]
+
+
+@_kernel("TITLE")
+def _title_column(texts: list) -> list[str]:
+    return [str(t).title() for t in texts]
+
+
+@_kernel("TRIM")
+def _trim_column(texts: list) -> list[str]:
+    return [str(t).strip() for t in texts]
+
+
+@_kernel("LEN")
+def _len_column(texts: list) -> list[int]:
+    return [len(str(t)) for t in texts]
+
+
+@_kernel("REPLACE")
+def _replace_column(texts: list, olds: list, news: list) -> list[str]:
+    return [str(t).replace(str(o), str(n)) for t, o, n in zip(texts, olds, news)]
+
+
+@_kernel("CONCAT")
+def _concat_column(*columns: list) -> list[str]:
+    return ["".join(map(str, row)) for row in zip(*columns)]
@@ -594,15 +594,14 @@ class App(ctk.CTk):
 
             keys = list(config.placeholders.keys())
             pad = max((len(k) for k in keys), default=0)
-            values: dict[str, object] = {}
+            errors: dict[str, Exception] = {}
+            values = evaluator.evaluate_placeholders(config.placeholders, errors=errors)
             lines: list[str] = []
             for key in keys:
-                try:
-                    val = evaluator.evaluate_value(config.placeholders[key])
-                    values[key] = val
-                    lines.append(f"{key:<{pad}}  =  {val}")
-                except Exception as exc:
-                    lines.append(f"{key:<{pad}}  =  ERROR: {exc}")
+                if key in errors:
+                    lines.append(f"{key:<{pad}}  =  ERROR: {errors[key]}")
+                else:
+                    lines.append(f"{key:<{pad}}  =  {values[key]}")
 
             # Show output name & formats
             output_path = Path(self.output_var.get())
@@ -653,12 +652,11 @@ class App(ctk.CTk):
             for expr in config.on_start:
                 evaluator.evaluate_value(expr)
 
-            values: dict[str, object] = {}
-            keys = list(config.placeholders.keys())
+            values = evaluator.evaluate_placeholders(config.placeholders)
+            keys = list(values)
             pad = max((len(k) for k in keys), default=0)
             lines: list[str] = []
             for key in keys:
-                values[key] = evaluator.evaluate_value(config.placeholders[key])
                 lines.append(f"{key:<{pad}}  =  {values[key]}")
 
             # Resolve output name and formats
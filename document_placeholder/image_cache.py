@@ -0,0 +1,519 @@
+"""Two-level cache for images loaded by ``IMAGE()``.
+
+Fetching a URL or rasterising an SVG on every render is wasteful when the
+same logo appears on every invoice. :class:`ImageCache` keeps the final
+(raster) bytes:
+
+* in memory — a small LRU layer for hot images;
+* on disk — content-addressed files named after a hash of the source and the
+  conversion parameters, evicted least-recently-used once the directory
+  grows beyond ``max_bytes``.
+
+Remote images are downloaded over keep-alive connections that are reused
+across requests to the same host (through urllib when a proxy applies to the
+URL). URL entries remember their ``ETag`` / ``Last-Modified`` headers and are
+revalidated with a conditional request at most every ``revalidate_after``
+seconds; when the server is unreachable or fails (5xx) a cached copy is
+served instead. Plain local images are only kept in memory (the file already
+is on disk). The disk layer is best-effort: when the directory cannot be
+written, images are still returned and kept in memory.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import http.client
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import OrderedDict
+from dataclasses import dataclass
+from email.message import Message
+from pathlib import Path
+from typing import Callable, Mapping
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MEMORY_BYTES = 32 * 1024 * 1024
+DEFAULT_REVALIDATE_AFTER = 300.0
+
+USER_AGENT = "DocumentPlaceholder/1.0"
+
+logger = logging.getLogger(__name__)
+
+
+def default_cache_dir() -> Path:
+    """``$DOCPLACEHOLDER_CACHE_DIR`` or ``$XDG_CACHE_HOME/document-placeholder``."""
+    env = os.environ.get("DOCPLACEHOLDER_CACHE_DIR")
+    if env:
+        return Path(env) / "images"
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "document-placeholder" / "images"
+
+
+def is_url(source: str) -> bool:
+    return source.startswith(("http://", "https://"))
+
+
+@dataclass(frozen=True)
+class ImageCacheInfo:
+    memory_hits: int
+    disk_hits: int
+    misses: int
+    revalidated: int
+    disk_bytes: int
+    memory_bytes: int
+
+
+@dataclass
+class _MemoryEntry:
+    data: bytes
+    checked_at: float
+
+
+class ImageCache:
+    """Memory + disk cache of rasterised images (thread-safe).
+
+    *directory* ``None`` keeps the memory layer only.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path | None = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        memory_bytes: int = DEFAULT_MEMORY_BYTES,
+        revalidate_after: float = DEFAULT_REVALIDATE_AFTER,
+    ) -> None:
+        self.directory = Path(directory) if directory is not None else None
+        self.max_bytes = max_bytes
+        self.memory_limit = memory_bytes
+        self.revalidate_after = revalidate_after
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[str, _MemoryEntry] = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_index: dict[str, int] | None = None  # key -> size
+        self._disk_bytes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self._write_error_logged = False
+
+    # -- public API -----------------------------------------------------------
+
+    def load(
+        self,
+        source: str,
+        convert: Callable[[bytes, str], bytes],
+        params: str = "",
+    ) -> bytes:
+        """Return ``convert(raw_bytes, source)`` for *source*, cached.
+
+        *params* describes the conversion (e.g. target size); different
+        parameters are cached separately.
+        """
+        source = source.strip()
+        if is_url(source):
+            return self._load_url(source, convert, params)
+        return self._load_file(source, convert, params)
+
+    def info(self) -> ImageCacheInfo:
+        with self._lock:
+            self._ensure_index()
+            return ImageCacheInfo(
+                memory_hits=self.memory_hits,
+                disk_hits=self.disk_hits,
+                misses=self.misses,
+                revalidated=self.revalidated,
+                disk_bytes=self._disk_bytes,
+                memory_bytes=self._memory_bytes,
+            )
+
+    def clear_memory(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+
+    # -- local files ----------------------------------------------------------
+
+    def _load_file(
+        self,
+        source: str,
+        convert: Callable[[bytes, str], bytes],
+        params: str,
+    ) -> bytes:
+        path = Path(source)
+        if not path.exists():
+            raise FileNotFoundError(source)
+        st = path.stat()
+        mem_key = self._key(
+            "file", str(path.resolve()), st.st_mtime_ns, st.st_size, params
+        )
+        entry = self._memory_get(mem_key)
+        if entry is not None:
+            return entry.data
+
+        raw = path.read_bytes()
+        key = self._key("content", hashlib.sha256(raw).hexdigest(), params)
+        data = self._disk_read(key)
+        if data is None:
+            with self._lock:
+                self.misses += 1
+            data = convert(raw, source)
+            # Unconverted files are already on disk; do not duplicate them.
+            if data != raw:
+                self._disk_write(key, data, {"source": source})
+        self._memory_put(mem_key, data)
+        return data
+
+    # -- URLs -----------------------------------------------------------------
+
+    def _load_url(
+        self,
+        source: str,
+        convert: Callable[[bytes, str], bytes],
+        params: str,
+    ) -> bytes:
+        key = self._key("url", source, params)
+        entry = self._memory_get(key)
+        now = time.time()
+        if entry is not None and now - entry.checked_at < self.revalidate_after:
+            return entry.data
+
+        meta = self._meta_read(key)
+        cached = entry.data if entry is not None else None
+        if cached is None and meta is not None:
+            cached = self._disk_read(key, count_hit=False)
+            if cached is None:
+                meta = None
+        if meta is not None and now - meta.get("checked_at", 0) < self.revalidate_after:
+            with self._lock:
+                self.disk_hits += 1
+            self._memory_put(key, cached, meta["checked_at"])
+            return cached
+
+        headers = {"User-Agent": USER_AGENT}
+        if cached is not None and meta is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        try:
+            status, raw, response_headers = self._fetch(source, headers)
+        except OSError as exc:
+            client_error = isinstance(exc, urllib.error.HTTPError) and exc.code < 500
+            if cached is not None and not client_error:
+                return cached  # serve stale rather than fail the render
+            raise
+
+        if status == 304 and cached is not None:
+            with self._lock:
+                self.revalidated += 1
+            if meta is not None:
+                meta["checked_at"] = now
+                self._meta_write(key, meta)
+            self._memory_put(key, cached, now)
+            return cached
+
+        with self._lock:
+            self.misses += 1
+        data = convert(raw, source)
+        self._disk_write(
+            key,
+            data,
+            {
+                "source": source,
+                "etag": _header(response_headers, "ETag"),
+                "last_modified": _header(response_headers, "Last-Modified"),
+                "checked_at": now,
+            },
+        )
+        self._memory_put(key, data, now)
+        return data
+
+    @staticmethod
+    def _fetch(
+        url: str, headers: dict[str, str]
+    ) -> tuple[int, bytes, Mapping[str, str]]:
+        return _http.get(url, headers)
+
+    # -- memory layer ---------------------------------------------------------
+
+    def _memory_get(self, key: str) -> _MemoryEntry | None:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+            return entry
+
+    def _memory_put(self, key: str, data: bytes, checked_at: float = 0.0) -> None:
+        if len(data) > self.memory_limit:
+            return
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_bytes -= len(old.data)
+            self._memory[key] = _MemoryEntry(data, checked_at)
+            self._memory_bytes += len(data)
+            while self._memory_bytes > self.memory_limit:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted.data)
+
+    # -- disk layer -----------------------------------------------------------
+
+    def _path(self, key: str, suffix: str = ".bin") -> Path:
+        return self.directory / key[:2] / f"{key}{suffix}"
+
+    def _disk_read(self, key: str, count_hit: bool = True) -> bytes | None:
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return None
+        try:
+            os.utime(path)  # mark as recently used for LRU eviction
+        except OSError:
+            pass
+        if count_hit:
+            with self._lock:
+                self.disk_hits += 1
+        return data
+
+    def _disk_write(self, key: str, data: bytes, meta: dict) -> None:
+        if self.directory is None:
+            return
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._atomic_write(path, data)
+        except OSError as exc:
+            self._write_failed(exc)
+            return
+        self._meta_write(key, meta)
+        with self._lock:
+            self._ensure_index()
+            self._disk_bytes += len(data) - self._disk_index.get(key, 0)
+            self._disk_index[key] = len(data)
+            self._evict()
+
+    def _meta_read(self, key: str) -> dict | None:
+        if self.directory is None:
+            return None
+        try:
+            return json.loads(self._path(key, ".json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def _meta_write(self, key: str, meta: dict) -> None:
+        if self.directory is None:
+            return
+        path = self._path(key, ".json")
+        try:
+            self._atomic_write(path, json.dumps(meta).encode("utf-8"))
+        except OSError as exc:
+            self._write_failed(exc)
+
+    def _write_failed(self, exc: OSError) -> None:
+        """Log (once per cache) that the disk layer could not be written."""
+        with self._lock:
+            if self._write_error_logged:
+                return
+            self._write_error_logged = True
+        logger.warning("Image cache %s is not writable: %s", self.directory, exc)
+
+    def _ensure_index(self) -> None:
+        """Build the key -> size index from the directory (once)."""
+        if self._disk_index is not None:
+            return
+        self._disk_index = {}
+        self._disk_bytes = 0
+        if self.directory is None or not self.directory.exists():
+            return
+        for path in self.directory.glob("*/*.bin"):
+            try:
+                size = path.stat().st_size
+            except FileNotFoundError:
+                continue
+            self._disk_index[path.stem] = size
+            self._disk_bytes += size
+
+    def _evict(self) -> None:
+        if self._disk_bytes <= self.max_bytes:
+            return
+        by_age: list[tuple[float, str]] = []
+        for key in self._disk_index:
+            try:
+                by_age.append((self._path(key).stat().st_mtime, key))
+            except FileNotFoundError:
+                by_age.append((0.0, key))
+        for _, key in sorted(by_age):
+            if self._disk_bytes <= self.max_bytes:
+                break
+            self._disk_bytes -= self._disk_index.pop(key)
+            for suffix in (".bin", ".json"):
+                try:
+                    self._path(key, suffix).unlink()
+                except OSError:
+                    pass
+
+    @staticmethod
+    def _atomic_write(path: Path, data: bytes) -> None:
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    @staticmethod
+    def _key(*parts) -> str:
+        text = "\0".join(str(p) for p in parts)
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _header(headers: Mapping[str, str], name: str) -> str | None:
+    """Look up the header *name* in *headers*, ignoring case."""
+    name = name.lower()
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+class _HttpPool:
+    """Idle keep-alive HTTP(S) connections, grouped by host (thread-safe).
+
+    URLs that ``HTTP(S)_PROXY`` / ``NO_PROXY`` route through a proxy are
+    fetched with urllib instead, which knows how to talk to the proxy.
+    """
+
+    MAX_REDIRECTS = 5
+
+    def __init__(self, timeout: float = 30.0) -> None:
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._idle: dict[tuple[str, str, int | None], list] = {}
+
+    def get(self, url: str, headers: dict[str, str]) -> tuple[int, bytes, Message]:
+        """GET *url*, following redirects. Raises ``HTTPError`` for 4xx/5xx.
+
+        The response headers match names case-insensitively.
+        """
+        for _ in range(self.MAX_REDIRECTS + 1):
+            if _proxied(url):
+                return self._urlopen(url, headers)
+            status, body, response_headers = self._request(url, headers)
+            location = response_headers.get("Location")
+            if status in (301, 302, 303, 307, 308) and location:
+                url = urllib.parse.urljoin(url, location)
+                continue
+            if status >= 400:
+                raise urllib.error.HTTPError(
+                    url, status, f"HTTP {status}", response_headers, None
+                )
+            return status, body, response_headers
+        raise urllib.error.URLError(f"Too many redirects: {url}")
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+    def _urlopen(self, url: str, headers: dict[str, str]) -> tuple[int, bytes, Message]:
+        req = urllib.request.Request(url, headers=headers)
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                return resp.status, resp.read(), resp.headers
+        except urllib.error.HTTPError as exc:
+            if exc.code == 304:
+                return 304, b"", exc.headers
+            raise
+
+    def _request(self, url: str, headers: dict[str, str]) -> tuple[int, bytes, Message]:
+        parts = urllib.parse.urlsplit(url)
+        host = (parts.scheme, parts.hostname or "", parts.port)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+
+        conn, reused = self._acquire(host)
+        try:
+            conn.request("GET", path, headers=headers)
+            resp = conn.getresponse()
+            body = resp.read()
+        except (http.client.HTTPException, ConnectionError):
+            conn.close()
+            if not reused:
+                raise
+            # The server dropped an idle connection; retry on a fresh one.
+            conn, _ = self._acquire(host, fresh=True)
+            try:
+                conn.request("GET", path, headers=headers)
+                resp = conn.getresponse()
+                body = resp.read()
+            except BaseException:
+                conn.close()
+                raise
+        except BaseException:
+            conn.close()
+            raise
+
+        if resp.will_close:
+            conn.close()
+        else:
+            with self._lock:
+                self._idle.setdefault(host, []).append(conn)
+        return resp.status, body, resp.headers
+
+    def _acquire(self, host, fresh: bool = False):
+        if not fresh:
+            with self._lock:
+                conns = self._idle.get(host)
+                if conns:
+                    return conns.pop(), True
+        scheme, hostname, port = host
+        if scheme == "https":
+            conn = http.client.HTTPSConnection(hostname, port, timeout=self.timeout)
+        else:
+            conn = http.client.HTTPConnection(hostname, port, timeout=self.timeout)
+        return conn, False
+
+
+def _proxied(url: str) -> bool:
+    """Whether the proxy settings of the environment apply to *url*."""
+    parts = urllib.parse.urlsplit(url)
+    return parts.scheme in urllib.request.getproxies() and not (
+        urllib.request.proxy_bypass(parts.hostname or "")
+    )
+
+
+_http = _HttpPool()
+
+_default_cache: ImageCache | None = None
+
+
+def get_image_cache() -> ImageCache:
+    """Return the process-wide cache used by the document processor."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ImageCache(default_cache_dir())
+    return _default_cache
+
+
+def set_image_cache(cache: ImageCache | None) -> None:
+    """Replace the process-wide cache (``None`` recreates the default lazily)."""
+    global _default_cache
+    _default_cache = cache
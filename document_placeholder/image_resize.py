@@ -0,0 +1,128 @@
+"""Downsample images to the size they are placed at.
+
+A 12 MP photo shown 5 cm wide only needs about 300 pixels at 150 DPI.
+:func:`fit_image` scales a raster image down to the placed size at the
+configured DPI and recompresses it (JPEG with the configured quality, other
+formats as optimised PNG). Images that are already small enough, or that do
+not get smaller, are returned unchanged.
+
+Resizing needs Pillow (``pip install document-placeholder[images]``); without
+it images are inserted as they are.
+"""
+
+from __future__ import annotations
+
+from io import BytesIO
+
+DEFAULT_DPI = 150
+DEFAULT_QUALITY = 85
+
+_CM_PER_INCH = 2.54
+# Modes PNG stores as they are; others are converted to RGB(A) first.
+_PNG_MODES = frozenset({"1", "L", "LA", "P", "RGB", "RGBA", "I;16"})
+
+_dpi: int | None = DEFAULT_DPI
+_quality: int = DEFAULT_QUALITY
+
+
+def set_image_resize(
+    dpi: int | None = DEFAULT_DPI, quality: int = DEFAULT_QUALITY
+) -> None:
+    """Resize inserted images to *dpi* at their placed size (``None`` disables).
+
+    *quality* (1-95) is used when recompressing JPEG images.
+    """
+    global _dpi, _quality
+    if dpi is not None and dpi < 1:
+        raise ValueError("Image DPI must be at least 1")
+    if not 1 <= quality <= 95:
+        raise ValueError("Image quality must be between 1 and 95")
+    _dpi = dpi
+    _quality = quality
+
+
+def get_image_resize() -> tuple[int | None, int]:
+    """Return the current ``(dpi, quality)`` settings."""
+    return _dpi, _quality
+
+
+def available() -> bool:
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def resize_params(width_cm: float | None, height_cm: float | None) -> str:
+    """Describe the resize applied for this placed size (for cache keys).
+
+    Returns ``""`` when images are not resized.
+    """
+    if _dpi is None or not available():
+        return ""
+    return f"fit:{width_cm}x{height_cm}@{_dpi}dpi,q{_quality}"
+
+
+def fit_image(data: bytes, width_cm: float | None, height_cm: float | None) -> bytes:
+    """Return *data* downsampled to the placed size, or unchanged."""
+    if _dpi is None or (width_cm is None and height_cm is None):
+        return data
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return data
+
+    try:
+        img = Image.open(BytesIO(data))
+        fmt = img.format
+        img = ImageOps.exif_transpose(img)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return data  # let python-docx deal with (or reject) the original
+
+    target = _target_size(img.size, width_cm, height_cm, _dpi)
+    if target[0] >= img.width and target[1] >= img.height:
+        return data
+    target = (min(target[0], img.width), min(target[1], img.height))
+
+    out = BytesIO()
+    try:
+        img = img.resize(target, Image.Resampling.LANCZOS)
+        if fmt == "JPEG":
+            if img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+            img.save(out, "JPEG", quality=_quality, optimize=True, dpi=(_dpi, _dpi))
+        else:
+            if img.mode not in _PNG_MODES:
+                # CMYK (print TIFFs), floating point, ...: PNG cannot hold them.
+                alpha = "A" in img.mode or "a" in img.mode
+                img = img.convert("RGBA" if alpha else "RGB")
+            img.save(out, "PNG", optimize=True, dpi=(_dpi, _dpi))
+    except (OSError, ValueError):
+        return data
+    result = out.getvalue()
+    return result if len(result) < len(data) else data
+
+
+def _target_size(
+    size: tuple[int, int],
+    width_cm: float | None,
+    height_cm: float | None,
+    dpi: int,
+) -> tuple[int, int]:
+    """Pixel size for showing an image of *size* at the placed size and *dpi*.
+
+    A missing dimension follows the aspect ratio, as it does in Word.
+    """
+    w, h = size
+    if width_cm is not None:
+        target_w = width_cm / _CM_PER_INCH * dpi
+        target_h = (
+            height_cm / _CM_PER_INCH * dpi
+            if height_cm is not None
+            else target_w * h / w
+        )
+    else:
+        target_h = height_cm / _CM_PER_INCH * dpi
+        target_w = target_h * w / h
+    return max(1, round(target_w)), max(1, round(target_h))
@@ -0,0 +1,107 @@
+"""Locked LRU storage shared by the template, parse and call caches.
+
+:class:`LRUCache` keeps the entries, the ``maxsize`` bound and the
+hit / miss / eviction counters reported as :class:`CacheInfo`. Subclasses
+decide what a lookup computes on a miss; they call :meth:`LRUCache._get` and
+:meth:`LRUCache._put` with ``self._lock`` held.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Hashable
+
+# Returned by LRUCache._get for keys that are not cached (None is a value).
+MISSING: Any = object()
+
+
+@dataclass(frozen=True)
+class CacheInfo:
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    maxsize: int
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups served from the cache (0.0 before any lookup)."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class LRUCache:
+    """Thread-safe least-recently-used store.
+
+    ``maxsize`` may be changed at any time; shrinking it evicts the least
+    recently used entries. A ``maxsize`` of ``0`` disables caching.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self._maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def maxsize(self) -> int:
+        return self._maxsize
+
+    @maxsize.setter
+    def maxsize(self, value: int) -> None:
+        with self._lock:
+            self._maxsize = max(0, int(value))
+            self._evict()
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                size=len(self._entries),
+                maxsize=self._maxsize,
+            )
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self._clear()
+            self.hits = self.misses = self.evictions = 0
+
+    # -- for subclasses (call with self._lock held) ----------------------------
+
+    def _get(self, key: Hashable) -> Any:
+        """Return the entry for *key* and count a hit, or :data:`MISSING`.
+
+        Misses are counted by the caller, which knows whether a failed
+        lookup ends in a computation.
+        """
+        value = self._entries.get(key, MISSING)
+        if value is not MISSING:
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return value
+
+    def _put(self, key: Hashable, value: Any) -> None:
+        if self._maxsize == 0:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        self._evict()
+
+    def _clear(self) -> None:
+        self._entries.clear()
+
+    def _evict(self) -> None:
+        while len(self._entries) > self._maxsize:
+            key, _ = self._entries.popitem(last=False)
+            self.evictions += 1
+            self._evicted(key)
+
+    def _evicted(self, key: Hashable) -> None:
+        """Called after *key* is evicted (e.g. to drop secondary indexes)."""
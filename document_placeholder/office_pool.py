@@ -0,0 +1,273 @@
+"""A pool of warm LibreOffice instances for PDF conversion.
+
+Starting ``libreoffice --headless`` costs seconds per document. The pool keeps
+*size* soffice processes running, each listening on its own local socket
+with its own user profile, and drives conversions over UNO. Instances are
+health-checked whenever they are handed out and restarted automatically when
+they crash.
+
+The UNO bridge (``import uno``) ships with LibreOffice's Python and is only
+imported when a real instance starts. Tests and other environments can plug in
+any object implementing :class:`OfficeInstance` through *factory*.
+"""
+
+from __future__ import annotations
+
+import queue
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Protocol
+
+
+class OfficeInstance(Protocol):
+    """Interface of a single converter process managed by :class:`OfficePool`."""
+
+    def start(self) -> None: ...
+
+    def is_alive(self) -> bool: ...
+
+    def convert(self, input_path: Path, output_path: Path) -> None: ...
+
+    def stop(self) -> None: ...
+
+
+class UnoOfficeInstance:
+    """A headless soffice process driven over a UNO socket connection."""
+
+    def __init__(
+        self,
+        binary: str = "libreoffice",
+        startup_timeout: float = 30.0,
+    ) -> None:
+        self.binary = binary
+        self.startup_timeout = startup_timeout
+        self._process: subprocess.Popen | None = None
+        self._profile: str | None = None
+        self._desktop = None
+
+    def start(self) -> None:
+        try:
+            import uno  # noqa: F401
+        except ImportError:
+            raise RuntimeError(
+                "The office pool needs the 'uno' module from LibreOffice's Python"
+            )
+
+        port = self._free_port()
+        self._profile = tempfile.mkdtemp(prefix="docplaceholder-lo-")
+        self._process = subprocess.Popen(
+            [
+                self.binary,
+                "--headless",
+                "--invisible",
+                "--nologo",
+                "--norestore",
+                "--nodefault",
+                f"-env:UserInstallation={Path(self._profile).as_uri()}",
+                f"--accept=socket,host=127.0.0.1,port={port};urp;",
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        self._desktop = self._connect(port)
+
+    def is_alive(self) -> bool:
+        if self._process is None or self._process.poll() is not None:
+            return False
+        try:
+            self._desktop.getFrames()
+        except Exception:
+            return False
+        return True
+
+    def convert(self, input_path: Path, output_path: Path) -> None:
+        import uno
+
+        doc = self._desktop.loadComponentFromURL(
+            uno.systemPathToFileUrl(str(Path(input_path).resolve())),
+            "_blank",
+            0,
+            (self._prop("Hidden", True),),
+        )
+        if doc is None:
+            raise RuntimeError(f"LibreOffice could not open {input_path}")
+        try:
+            doc.storeToURL(
+                uno.systemPathToFileUrl(str(Path(output_path).resolve())),
+                (self._prop("FilterName", "writer_pdf_Export"),),
+            )
+        finally:
+            doc.close(True)
+
+    def stop(self) -> None:
+        if self._desktop is not None:
+            try:
+                self._desktop.terminate()
+            except Exception:
+                pass
+            self._desktop = None
+        if self._process is not None:
+            try:
+                self._process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+                self._process.wait()
+            self._process = None
+        if self._profile is not None:
+            shutil.rmtree(self._profile, ignore_errors=True)
+            self._profile = None
+
+    # -- internals ------------------------------------------------------------
+
+    def _connect(self, port: int):
+        import uno
+
+        local = uno.getComponentContext()
+        resolver = local.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local
+        )
+        url = f"uno:socket,host=127.0.0.1,port={port};urp;StarOffice.ComponentContext"
+        deadline = time.monotonic() + self.startup_timeout
+        while True:
+            try:
+                ctx = resolver.resolve(url)
+                return ctx.ServiceManager.createInstanceWithContext(
+                    "com.sun.star.frame.Desktop", ctx
+                )
+            except Exception:
+                if self._process.poll() is not None:
+                    raise RuntimeError("LibreOffice exited during startup")
+                if time.monotonic() > deadline:
+                    self._process.kill()
+                    raise RuntimeError("Timed out waiting for LibreOffice to start")
+                time.sleep(0.25)
+
+    @staticmethod
+    def _prop(name: str, value):
+        from com.sun.star.beans import PropertyValue
+
+        prop = PropertyValue()
+        prop.Name = name
+        prop.Value = value
+        return prop
+
+    @staticmethod
+    def _free_port() -> int:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.bind(("127.0.0.1", 0))
+            return sock.getsockname()[1]
+
+
+class OfficePool:
+    """Hand conversions out to *size* warm :class:`OfficeInstance` objects.
+
+    ``convert`` blocks until an instance is free, so the pool may be shared by
+    several threads. An instance that fails its health check is restarted
+    before use; if it dies during a conversion, the conversion is retried
+    once on a fresh instance.
+    """
+
+    def __init__(
+        self,
+        size: int = 2,
+        factory: Callable[[], OfficeInstance] = UnoOfficeInstance,
+    ) -> None:
+        if size < 1:
+            raise ValueError("Office pool size must be at least 1")
+        self.size = size
+        self.factory = factory
+        self.restarts = 0
+        self._idle: queue.Queue[OfficeInstance] = queue.Queue()
+        self._instances: list[OfficeInstance] = []
+        self._lock = threading.Lock()
+        self._started = False
+
+    # -- lifecycle ------------------------------------------------------------
+
+    def start(self) -> None:
+        with self._lock:
+            if self._started:
+                return
+            for _ in range(self.size):
+                instance = self.factory()
+                instance.start()
+                self._instances.append(instance)
+                self._idle.put(instance)
+            self._started = True
+
+    def close(self) -> None:
+        with self._lock:
+            for instance in self._instances:
+                try:
+                    instance.stop()
+                except Exception:
+                    pass
+            self._instances.clear()
+            self._idle = queue.Queue()
+            self._started = False
+
+    def __enter__(self) -> OfficePool:
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    # -- conversion -----------------------------------------------------------
+
+    def convert(self, input_path: str | Path, output_path: str | Path) -> None:
+        """Convert *input_path* to PDF at *output_path*."""
+        self.start()
+        instance = self._idle.get()
+        try:
+            if not instance.is_alive():
+                instance = self._restart(instance)
+            try:
+                instance.convert(Path(input_path), Path(output_path))
+            except Exception:
+                if instance.is_alive():
+                    raise  # the document is at fault, not the instance
+                instance = self._restart(instance)
+                instance.convert(Path(input_path), Path(output_path))
+        finally:
+            # A dead instance whose restart failed goes back too; the next
+            # caller retries the restart.
+            self._idle.put(instance)
+
+    def check_health(self) -> int:
+        """Restart every idle instance that is no longer alive.
+
+        Returns the number of instances restarted.
+        """
+        restarted = 0
+        for _ in range(self._idle.qsize()):
+            try:
+                instance = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                if not instance.is_alive():
+                    instance = self._restart(instance)
+                    restarted += 1
+            finally:
+                self._idle.put(instance)
+        return restarted
+
+    # -- internals ------------------------------------------------------------
+
+    def _restart(self, instance: OfficeInstance) -> OfficeInstance:
+        try:
+            instance.stop()
+        except Exception:
+            pass
+        fresh = self.factory()
+        fresh.start()
+        with self._lock:
+            self._instances = [fresh if i is instance else i for i in self._instances]
+            self.restarts += 1
+        return fresh
@@ -0,0 +1,152 @@
+"""Optimisation passes over expression ASTs.
+
+:func:`fold_constants` replaces subtrees whose value cannot change between
+evaluations with a :class:`~document_placeholder.parser.Constant`:
+
+* arithmetic and comparisons on literals (``500 * 1.2``);
+* calls to functions registered with ``pure=True`` whose arguments are all
+  constant (``DAYS(7)``, ``UPPER('acme')``), or, for lazy functions, whose
+  arguments read for the result are (``IF(1 > 0, 'a', NAME)``).
+
+Arguments of lazy functions are folded only when the function reads them
+while being folded itself, so a branch that may never run is not evaluated
+at compile time: in ``IF(FLAG, REPEAT('x', 100000000), '')`` nothing is.
+
+Identifiers are never constant, since each evaluator (e.g. each batch record)
+may bind them differently, except where a function declares them as
+*keywords* (``CURRENT_DATE_NUM(year)``): those become the constant name, so
+a variable called ``year`` cannot change what the function receives. A
+subtree whose evaluation raises is left as it is, so the error still surfaces
+when the expression runs. Results of mutable types (lists, dicts, ...) are
+not folded because they would be shared between evaluations. Under an active
+:mod:`~document_placeholder.budget`, folding is metered like a render, so an
+over-budget subtree is left to fail when the expression runs.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from document_placeholder import budget
+from document_placeholder.call_cache import MUTABLE_TYPES
+from document_placeholder.compiler import BINARY_OPS
+from document_placeholder.functions import FunctionInfo, FunctionRegistry
+from document_placeholder.parser import (
+    BinaryOp,
+    Constant,
+    FunctionCall,
+    Identifier,
+    NumberLiteral,
+    StringLiteral,
+    UnaryOp,
+)
+
+_NOT_CONSTANT = object()
+
+
+def fold_constants(node: Any) -> Any:
+    """Return *node* with every constant subtree folded into a ``Constant``."""
+    with budget.metered():
+        return _fold(node)
+
+
+def _fold(node: Any) -> Any:
+    if isinstance(node, BinaryOp):
+        left = _fold(node.left)
+        right = _fold(node.right)
+        op = BINARY_OPS.get(node.op)
+        if op is not None:
+            folded = _try_fold(budget.checked_op(node.op, op), left, right)
+            if folded is not None:
+                return folded
+        return BinaryOp(node.op, left, right)
+
+    if isinstance(node, UnaryOp):
+        operand = _fold(node.operand)
+        if node.op == "-":
+            folded = _try_fold(lambda v: -v, operand)
+            if folded is not None:
+                return folded
+        return UnaryOp(node.op, operand)
+
+    if isinstance(node, FunctionCall):
+        info = FunctionRegistry.info(node.name)
+        keywords = info.keywords if info is not None else ()
+        args = [
+            (
+                Constant(arg.name)
+                if isinstance(arg, Identifier) and arg.name in keywords
+                else arg
+            )
+            for arg in node.args
+        ]
+        if info is not None and info.lazy:
+            return _fold_lazy_call(node.name, info, args)
+        args = [_fold(arg) for arg in args]
+        if info is not None and info.pure:
+            folded = _try_fold(budget.checked(info).func, *args)
+            if folded is not None:
+                return folded
+        return FunctionCall(node.name, args)
+
+    return node
+
+
+def _constant_value(node: Any) -> Any:
+    if isinstance(node, (NumberLiteral, StringLiteral, Constant)):
+        return node.value
+    return _NOT_CONSTANT
+
+
+class _NotConstant(BaseException):
+    """Raised by a thunk over a non-constant argument.
+
+    A ``BaseException``, so a lazy function catching ``Exception`` around an
+    argument cannot turn it into a folded fallback value.
+    """
+
+
+def _fold_lazy_call(name: str, info: FunctionInfo, args: list[Any]) -> Any:
+    """Fold a lazy call if the arguments it actually reads are constant.
+
+    ``IF(1 > 0, 'a', NAME)`` folds to ``'a'`` although ``NAME`` is not
+    constant: the function never asks for it. Only the arguments read are
+    folded; the others are left as they are, since they may never run.
+    """
+    if not info.pure:
+        return FunctionCall(name, args)
+    folded = list(args)
+    read: set[int] = set()
+
+    def thunk(index: int):
+        def get() -> Any:
+            if index not in read:
+                read.add(index)
+                folded[index] = _fold(args[index])
+            value = _constant_value(folded[index])
+            if value is _NOT_CONSTANT:
+                raise _NotConstant
+            return value
+
+        return get
+
+    try:
+        result = budget.checked(info).func(*[thunk(i) for i in range(len(args))])
+    except (_NotConstant, Exception):
+        return FunctionCall(name, folded)
+    if isinstance(result, MUTABLE_TYPES):
+        return FunctionCall(name, folded)
+    return Constant(result)
+
+
+def _try_fold(func, *operands: Any) -> Constant | None:
+    values = [_constant_value(operand) for operand in operands]
+    if any(value is _NOT_CONSTANT for value in values):
+        return None
+    try:
+        result = func(*values)
+    except Exception:
+        return None
+    if isinstance(result, MUTABLE_TYPES):
+        return None
+    return Constant(result)
@@ -0,0 +1,152 @@
+"""Process-wide LRU cache of parsed expressions and template strings.
+
+The same expression strings (placeholders, ``ON_START`` / ``ON_END`` hooks,
+``{expr}`` parts of templates) are evaluated again for every record of a
+batch. The cache maps expression text to its constant-folded AST and
+compiled closure, so it is tokenized, parsed, folded, and compiled only
+once. Text that is not a valid expression is cached too, as a syntax-error
+marker. Template strings are cached, as :class:`~.compiler.TemplateString`
+objects, in the same LRU.
+
+Raw config values are classified once as an expression, a template or plain
+text (see :meth:`ParseCache.classify`), so evaluating a value that is mostly
+prose does not raise and catch a ``SyntaxError`` on every render.
+"""
+
+from __future__ import annotations
+
+from typing import Any, NamedTuple
+
+from document_placeholder.compiler import (
+    Compiled,
+    TemplateString,
+    compile_ast,
+    compile_template,
+)
+from document_placeholder.functions import FunctionRegistry
+from document_placeholder.lru import MISSING, LRUCache
+from document_placeholder.optimizer import fold_constants
+from document_placeholder.parser import Parser, Tokenizer
+
+DEFAULT_MAXSIZE = 1024
+
+# Key prefixes separating template and raw value entries from expression
+# entries.
+_TEMPLATE = "template"
+_VALUE = "value"
+
+# Kinds of raw config values (see ParseCache.classify).
+LITERAL = "literal"
+EXPRESSION = "expression"
+TEMPLATE = "template"
+
+
+class RawValue(NamedTuple):
+    """How a raw config string is evaluated.
+
+    *node* is the AST of an expression (``None`` otherwise); *compiled* is
+    called with the variables, like every compiled form.
+    """
+
+    kind: str
+    node: Any
+    compiled: Compiled
+
+
+class _SyntaxErrorMarker:
+    __slots__ = ("message",)
+
+    def __init__(self, message: str) -> None:
+        self.message = message
+
+
+class ParseCache(LRUCache):
+    """Thread-safe LRU cache from expression text to AST and compiled code,
+    from template text to :class:`~.compiler.TemplateString`, and from raw
+    config values to their :class:`RawValue` classification.
+
+    ``maxsize`` may be changed at any time; shrinking it evicts the least
+    recently used entries. A ``maxsize`` of ``0`` disables caching.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE) -> None:
+        super().__init__(maxsize)
+        self._generation = FunctionRegistry.generation
+
+    # -- public API -----------------------------------------------------------
+
+    def parse(self, text: str) -> Any:
+        """Return the AST of *text*; raise ``SyntaxError`` if it is invalid."""
+        return self._lookup(text)[0]
+
+    def compile(self, text: str) -> Compiled:
+        """Return *text* compiled to a closure (see :mod:`~.compiler`)."""
+        return self._lookup(text)[1]
+
+    def template(self, text: str) -> TemplateString:
+        """Return *text* compiled as an ``{expr}`` template string."""
+        return self._lookup((_TEMPLATE, text))
+
+    def classify(self, text: str) -> RawValue:
+        """Return how the raw config value *text* is evaluated.
+
+        *text* is an expression if it parses as one, otherwise a template if
+        it contains ``{``, otherwise plain text. Never raises ``SyntaxError``:
+        invalid template fields raise it when the template is rendered.
+        """
+        return self._lookup((_VALUE, text))
+
+    # -- internals ------------------------------------------------------------
+
+    def _lookup(self, key: str | tuple[str, str]) -> Any:
+        with self._lock:
+            generation = FunctionRegistry.generation
+            if generation != self._generation:
+                # Compiled entries bind functions; re-registration drops them.
+                self._clear()
+                self._generation = generation
+            entry = self._get(key)
+            if entry is MISSING:
+                self.misses += 1
+
+        if entry is MISSING:
+            entry = self._build(key)
+            with self._lock:
+                if generation == self._generation:
+                    self._put(key, entry)
+
+        if isinstance(entry, _SyntaxErrorMarker):
+            raise SyntaxError(entry.message)
+        return entry
+
+    def _build(self, key: str | tuple[str, str]) -> Any:
+        if isinstance(key, tuple):
+            if key[0] == _VALUE:
+                return self._classify(key[1])
+            return compile_template(key[1], self.compile)
+        try:
+            return self._parse(key)
+        except SyntaxError as exc:
+            return _SyntaxErrorMarker(str(exc))
+
+    @staticmethod
+    def _parse(text: str) -> tuple[Any, Compiled]:
+        ast = fold_constants(Parser(Tokenizer(text).tokens).parse())
+        return (ast, compile_ast(ast))
+
+    def _classify(self, text: str) -> RawValue:
+        try:
+            ast, compiled = self._parse(text)
+        except SyntaxError:
+            if "{" in text:
+                return RawValue(TEMPLATE, None, self.template(text))
+            return RawValue(LITERAL, None, lambda variables: text)
+        return RawValue(EXPRESSION, ast, compiled)
+
+
+_default_cache = ParseCache()
+
+
+def get_parse_cache() -> ParseCache:
+    """Return the process-wide cache used by :class:`Evaluator`."""
+    return _default_cache
@@ -14,8 +14,9 @@ args           = expression (',' expression)*
 
 from __future__ import annotations
 
+import re
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, NamedTuple
 
 # ---------------------------------------------------------------------------
 # Tokens
@@ -43,8 +44,7 @@ class TokenType:
     EOF = "EOF"
 
 
-@dataclass
-class Token:
+class Token(NamedTuple):
     type: str
     value: Any
     pos: int
@@ -55,7 +55,48 @@ class Token:
 # ---------------------------------------------------------------------------
 
 
+# Leading whitespace belongs to the following token, so every token is one
+# match. Any other non-space character is an error; trailing whitespace is
+# simply left unmatched.
+_TOKEN_RE = re.compile(
+    r"""
+    \s*
+    (?:
+        (?P<NUMBER>\d+(?:\.\d*)?)
+      | (?P<IDENTIFIER>[^\W\d]\w*)
+      | (?P<STRING>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+      | (?P<OPERATOR>>=|<=|==|!=|[(),+\-*/%<>])
+      | (?P<UNTERMINATED>["'])
+      | (?P<ERROR>\S)
+    )
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+_ESCAPE_RE = re.compile(r"\\(.)", re.DOTALL)
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "\\": "\\"}
+
+_OPERATORS: dict[str, str] = {
+    ">=": TokenType.GTE,
+    "<=": TokenType.LTE,
+    "==": TokenType.EQ,
+    "!=": TokenType.NEQ,
+    "(": TokenType.LPAREN,
+    ")": TokenType.RPAREN,
+    ",": TokenType.COMMA,
+    "+": TokenType.PLUS,
+    "-": TokenType.MINUS,
+    "*": TokenType.STAR,
+    "/": TokenType.SLASH,
+    "%": TokenType.PERCENT,
+    ">": TokenType.GT,
+    "<": TokenType.LT,
+}
+
+
 class Tokenizer:
+    """Split an expression into tokens with a single precompiled regex scan."""
+
     def __init__(self, text: str) -> None:
         self.text = text
         self.pos = 0
@@ -72,100 +113,34 @@ class Tokenizer:
     # -- internals ------------------------------------------------------------
 
     def _tokenize(self) -> None:
-        while self.pos < len(self.text):
-            self._skip_whitespace()
-            if self.pos >= len(self.text):
-                break
-
-            ch = self.text[self.pos]
-
-            # Two-character operators (must be checked first)
-            two = self.text[self.pos : self.pos + 2]
-            two_char: dict[str, str] = {
-                ">=": TokenType.GTE,
-                "<=": TokenType.LTE,
-                "==": TokenType.EQ,
-                "!=": TokenType.NEQ,
-            }
-            if two in two_char:
-                self.tokens.append(Token(two_char[two], two, self.pos))
-                self.pos += 2
-                continue
-
-            simple: dict[str, str] = {
-                "(": TokenType.LPAREN,
-                ")": TokenType.RPAREN,
-                ",": TokenType.COMMA,
-                "+": TokenType.PLUS,
-                "-": TokenType.MINUS,
-                "*": TokenType.STAR,
-                "/": TokenType.SLASH,
-                "%": TokenType.PERCENT,
-                ">": TokenType.GT,
-                "<": TokenType.LT,
-            }
-
-            if ch in simple:
-                self.tokens.append(Token(simple[ch], ch, self.pos))
-                self.pos += 1
-            elif ch in ('"', "'"):
-                self._read_string(ch)
-            elif ch.isdigit():
-                self._read_number()
-            elif ch.isalpha() or ch == "_":
-                self._read_identifier()
+        tokens = self.tokens
+        append = tokens.append
+        new = tuple.__new__  # skips Token.__new__, which is Python code
+        for match in _TOKEN_RE.finditer(self.text):
+            kind = match.lastgroup
+            start = match.start(kind)
+            value = match[kind]
+            if kind == "OPERATOR":
+                append(new(Token, (_OPERATORS[value], value, start)))
+            elif kind == "IDENTIFIER":
+                append(new(Token, (TokenType.IDENTIFIER, value, start)))
+            elif kind == "NUMBER":
+                number: int | float = float(value) if "." in value else int(value)
+                append(new(Token, (TokenType.NUMBER, number, start)))
+            elif kind == "STRING":
+                body = value[1:-1]
+                if "\\" in body:
+                    body = _ESCAPE_RE.sub(lambda m: _ESCAPES.get(m[1], m[1]), body)
+                append(new(Token, (TokenType.STRING, body, start)))
+            elif kind == "UNTERMINATED":
+                self.pos = start
+                raise SyntaxError(f"Unterminated string starting at position {start}")
             else:
-                raise SyntaxError(f"Unexpected character '{ch}' at position {self.pos}")
-
-        self.tokens.append(Token(TokenType.EOF, None, self.pos))
+                self.pos = start
+                raise SyntaxError(f"Unexpected character '{value}' at position {start}")
 
-    def _skip_whitespace(self) -> None:
-        while self.pos < len(self.text) and self.text[self.pos].isspace():
-            self.pos += 1
-
-    def _read_string(self, quote: str) -> None:
-        start = self.pos
-        self.pos += 1
-        chars: list[str] = []
-        escape_map = {"n": "\n", "t": "\t", "r": "\r", "\\": "\\"}
-        while self.pos < len(self.text):
-            ch = self.text[self.pos]
-            if ch == "\\" and self.pos + 1 < len(self.text):
-                self.pos += 1
-                chars.append(escape_map.get(self.text[self.pos], self.text[self.pos]))
-            elif ch == quote:
-                self.pos += 1
-                self.tokens.append(Token(TokenType.STRING, "".join(chars), start))
-                return
-            else:
-                chars.append(ch)
-            self.pos += 1
-        raise SyntaxError(f"Unterminated string starting at position {start}")
-
-    def _read_number(self) -> None:
-        start = self.pos
-        has_dot = False
-        while self.pos < len(self.text):
-            ch = self.text[self.pos]
-            if ch.isdigit():
-                self.pos += 1
-            elif ch == "." and not has_dot:
-                has_dot = True
-                self.pos += 1
-            else:
-                break
-        text = self.text[start : self.pos]
-        value: int | float = float(text) if has_dot else int(text)
-        self.tokens.append(Token(TokenType.NUMBER, value, start))
-
-    def _read_identifier(self) -> None:
-        start = self.pos
-        while self.pos < len(self.text) and (
-            self.text[self.pos].isalnum() or self.text[self.pos] == "_"
-        ):
-            self.pos += 1
-        name = self.text[start : self.pos]
-        self.tokens.append(Token(TokenType.IDENTIFIER, name, start))
+        self.pos = len(self.text)
+        append(Token(TokenType.EOF, None, self.pos))
 
 
 # ---------------------------------------------------------------------------
@@ -183,6 +158,13 @@ class StringLiteral:
     value: str
 
 
+@dataclass
+class Constant:
+    """A precomputed value (produced by constant folding, never by the parser)."""
+
+    value: Any
+
+
 @dataclass
 class Identifier:
     name: str
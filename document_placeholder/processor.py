@@ -2,123 +2,278 @@
 
 from __future__ import annotations
 
-import urllib.request
+import bisect
+import copy
+import hashlib
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from io import BytesIO
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable, Iterator
 
 from docx import Document
-from docx.shared import Cm
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.oxml.shape import CT_Inline
+from docx.shared import Cm, Length
+from docx.text.paragraph import Paragraph
+from docx.text.run import Run
 
+from document_placeholder.image_cache import get_image_cache
+from document_placeholder.image_resize import fit_image, resize_params
 from document_placeholder.image_value import ImageValue
+from document_placeholder.template_cache import get_template_cache
+
+DEFAULT_PREFETCH_WORKERS = 8
+
+_PLACEHOLDER_RE = re.compile(r"\{([^{}]+)\}")
+_INVALID_XML_RE = re.compile("[^\t\n\r\x20-\ud7ff\ue000-\ufffd\U00010000-\U0010ffff]")
+
+
+@dataclass(frozen=True)
+class RunSpan:
+    """A stretch of consecutive runs that contains one or more placeholders.
+
+    *pieces* alternates literal text and placeholder keys, starting and ending
+    with a literal: ``("Total: ", "PRICE", " USD")``.
+    """
+
+    first_run: int
+    last_run: int
+    pieces: tuple[str, ...]
+
+    @property
+    def keys(self) -> tuple[str, ...]:
+        return self.pieces[1::2]
 
 
 class DocumentProcessor:
-    def __init__(self, template_path: str | Path) -> None:
-        self.doc = Document(str(template_path))
+    def __init__(self, template_path: str | Path, use_cache: bool = True) -> None:
+        if use_cache:
+            self.doc = get_template_cache().load(template_path)
+        else:
+            self.doc = Document(str(template_path))
 
     # -- public API -----------------------------------------------------------
 
     def replace_placeholders(self, values: dict[str, Any]) -> None:
         """Substitute every ``{KEY}`` found in paragraphs, tables, headers, and footers."""
+        pictures = _PictureSet(prefetch_images(values))
+        for paragraph in self.iter_paragraphs(self.doc):
+            self._replace_in_paragraph(paragraph, values, pictures)
+
+    def save(self, output_path: str | Path) -> None:
+        self.doc.save(str(output_path))
 
-        for paragraph in self.doc.paragraphs:
-            self._replace_in_paragraph(paragraph, values)
+    @property
+    def keys(self) -> frozenset[str]:
+        """Every placeholder key referenced by the template."""
+        return frozenset(
+            key
+            for paragraph in self.iter_paragraphs(self.doc)
+            for span in self._scan_runs([run.text for run in paragraph.runs])
+            for key in span.keys
+        )
 
-        for table in self.doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        self._replace_in_paragraph(paragraph, values)
+    @staticmethod
+    def iter_paragraphs(doc) -> Iterator[Paragraph]:
+        """Yield each paragraph of the body, tables, headers, and footers once."""
+        seen: set = set()
 
-        for section in self.doc.sections:
-            for paragraph in section.header.paragraphs:
-                self._replace_in_paragraph(paragraph, values)
-            for paragraph in section.footer.paragraphs:
-                self._replace_in_paragraph(paragraph, values)
+        def candidates() -> Iterator[Paragraph]:
+            yield from doc.paragraphs
+            for table in doc.tables:
+                for row in table.rows:
+                    for cell in row.cells:
+                        yield from cell.paragraphs
+            for section in doc.sections:
+                yield from section.header.paragraphs
+                yield from section.footer.paragraphs
 
-    def save(self, output_path: str | Path) -> None:
-        self.doc.save(str(output_path))
+        # Merged cells and linked headers hand out the same paragraph twice.
+        for paragraph in candidates():
+            if paragraph._p not in seen:
+                seen.add(paragraph._p)
+                yield paragraph
 
     # -- internals ------------------------------------------------------------
 
     @staticmethod
-    def _replace_in_paragraph(paragraph, values: dict[str, Any]) -> None:
+    def _replace_in_paragraph(
+        paragraph,
+        values: dict[str, Any],
+        pictures: _PictureSet | None = None,
+    ) -> None:
         runs = paragraph.runs
         if not runs:
             return
 
-        for key, value in values.items():
-            if not isinstance(value, ImageValue):
-                continue
-            placeholder = "{" + key + "}"
-            for run in runs:
-                if placeholder in run.text:
-                    run.text = run.text.replace(placeholder, "")
-                    try:
-                        stream = DocumentProcessor._load_image(value.source)
-                        w = value.width_cm if value.width_cm is not None else 5.0
-                        kwargs: dict[str, Any] = {"width": Cm(w)}
-                        if value.height_cm is not None:
-                            kwargs["height"] = Cm(value.height_cm)
-                        run.add_picture(stream, **kwargs)
-                    except (OSError, ValueError, KeyError):
-                        pass
-                    break
-
-        full_text = "".join(run.text for run in runs)
-        new_text = full_text
-        for key, value in values.items():
-            if isinstance(value, ImageValue):
+        texts = [run.text for run in runs]
+        spans = DocumentProcessor._scan_runs(texts, values)
+        if spans:
+            DocumentProcessor._apply_spans(paragraph, runs, spans, values, pictures)
+
+    @staticmethod
+    def _scan_runs(
+        texts: list[str],
+        values: dict[str, Any] | None = None,
+    ) -> list[RunSpan]:
+        """Find the ``{KEY}`` tokens in a paragraph's run *texts*.
+
+        A single regex scan over the joined text; tokens are matched against
+        *values* with a dict lookup (every token is kept when *values* is
+        ``None``). Tokens sharing a run are merged into one :class:`RunSpan`.
+        """
+        full_text = "".join(texts)
+        if "{" not in full_text:
+            return []
+
+        ends: list[int] = []
+        offset = 0
+        for text in texts:
+            offset += len(text)
+            ends.append(offset)
+
+        # [first_run, last_run, [match, ...]]
+        groups: list[list] = []
+        for match in _PLACEHOLDER_RE.finditer(full_text):
+            if values is not None and match.group(1) not in values:
                 continue
-            placeholder = "{" + key + "}"
-            if placeholder in new_text:
-                display = str(value) if value is not None else ""
-                display = DocumentProcessor._sanitize_xml_text(display)
-                new_text = new_text.replace(placeholder, display)
-
-        if new_text != full_text:
-            runs[0].text = DocumentProcessor._sanitize_xml_text(new_text)
-            for run in runs[1:]:
+            first = bisect.bisect_right(ends, match.start())
+            last = bisect.bisect_right(ends, match.end() - 1)
+            if groups and first <= groups[-1][1]:
+                groups[-1][1] = max(groups[-1][1], last)
+                groups[-1][2].append(match)
+            else:
+                groups.append([first, last, [match]])
+
+        spans: list[RunSpan] = []
+        for first, last, matches in groups:
+            start = ends[first] - len(texts[first])
+            pieces: list[str] = []
+            pos = start
+            for match in matches:
+                pieces.append(full_text[pos : match.start()])
+                pieces.append(match.group(1))
+                pos = match.end()
+            pieces.append(full_text[pos : ends[last]])
+            spans.append(RunSpan(first, last, tuple(pieces)))
+        return spans
+
+    @staticmethod
+    def _apply_spans(
+        paragraph,
+        runs: list[Run],
+        spans: Iterable[RunSpan],
+        values: dict[str, Any],
+        pictures: _PictureSet | None = None,
+    ) -> None:
+        """Write the values for *spans* into *runs*; other runs stay untouched.
+
+        The text of each span goes into its first run. Each image placeholder
+        closes the current text segment, so the picture lands between the
+        surrounding text and the remainder continues in a new run. Pictures
+        are embedded through *pictures* when given.
+        """
+        for span in spans:
+            segments: list[str] = []
+            image_values: list[ImageValue] = []
+            parts: list[str] = [span.pieces[0]]
+            for i in range(1, len(span.pieces), 2):
+                key = span.pieces[i]
+                if key not in values:
+                    parts.append("{" + key + "}")
+                else:
+                    value = values[key]
+                    if isinstance(value, ImageValue):
+                        segments.append("".join(parts))
+                        image_values.append(value)
+                        parts = []
+                    else:
+                        display = str(value) if value is not None else ""
+                        parts.append(DocumentProcessor._sanitize_xml_text(display))
+                parts.append(span.pieces[i + 1])
+            segments.append("".join(parts))
+
+            for run in runs[span.first_run + 1 : span.last_run + 1]:
                 run.text = ""
+            base = runs[span.first_run]
+            current = base
+            current.text = segments[0]
+            for image, text in zip(image_values, segments[1:]):
+                DocumentProcessor._insert_image(current, image, pictures)
+                if text:
+                    current = DocumentProcessor._add_run_after(paragraph, current, base)
+                    current.text = text
+
+    @staticmethod
+    def _insert_image(
+        run,
+        value: ImageValue,
+        pictures: _PictureSet | None = None,
+    ) -> None:
+        """Append the picture described by *value* to the end of *run*.
+
+        With *pictures*, the prefetched image is embedded through it;
+        otherwise it is loaded on the spot. Images that cannot be loaded are
+        silently dropped.
+        """
+        width_cm, height_cm = _placed_size(value)
+        width = Cm(width_cm)
+        height = Cm(height_cm) if height_cm is not None else None
+        try:
+            if pictures is not None:
+                pictures.add(run, _picture_key(value), width, height)
+            else:
+                stream = BytesIO(DocumentProcessor._load_picture(value))
+                run.add_picture(stream, width=width, height=height)
+        except (OSError, ValueError, KeyError):
+            pass
+
+    @staticmethod
+    def _add_run_after(paragraph, run, style_run) -> Run:
+        """Insert an empty run after *run*, formatted like *style_run*."""
+        new_r = copy.deepcopy(style_run._r)
+        new_r.clear_content()
+        run._r.addnext(new_r)
+        return Run(new_r, paragraph)
 
     @staticmethod
     def _sanitize_xml_text(text: str) -> str:
         """Удалить символы, недопустимые в XML (NULL, control chars)."""
         if not text:
             return ""
-        result = []
-        for c in str(text):
-            code = ord(c)
-            if code == 0x9 or code == 0xA or code == 0xD:
-                result.append(c)
-            elif 0x20 <= code <= 0xD7FF or 0xE000 <= code <= 0xFFFD:
-                result.append(c)
-            elif 0x10000 <= code <= 0x10FFFF:
-                result.append(c)
-            else:
-                result.append(" ")
-        return "".join(result)
+        return _INVALID_XML_RE.sub(" ", str(text))
 
     @staticmethod
     def _load_image(source: str) -> BytesIO:
-        """Загрузить изображение из URL или файла. SVG конвертируется в PNG."""
-        source = source.strip()
-        if source.startswith(("http://", "https://")):
-            req = urllib.request.Request(
-                source,
-                headers={"User-Agent": "DocumentPlaceholder/1.0"},
-            )
-            with urllib.request.urlopen(req, timeout=30) as resp:
-                data = resp.read()
-        else:
-            path = Path(source)
-            if path.exists():
-                data = path.read_bytes()
-            else:
-                raise FileNotFoundError(source)
+        """Загрузить изображение из URL или файла. SVG конвертируется в PNG.
 
-        return DocumentProcessor._ensure_raster(data, source)
+        Результат кэшируется (см. :mod:`document_placeholder.image_cache`).
+        """
+        data = get_image_cache().load(source, DocumentProcessor._rasterize)
+        return BytesIO(data)
+
+    @staticmethod
+    def _load_picture(value: ImageValue) -> bytes:
+        """Load *value* as raster bytes downsampled to its placed size.
+
+        Cached per source content, placed size, and resize settings.
+        """
+        width_cm, height_cm = _placed_size(value)
+        params = resize_params(width_cm, height_cm)
+        if not params:
+            return DocumentProcessor._load_image(value.source).getvalue()
+
+        def convert(data: bytes, source: str) -> bytes:
+            raster = DocumentProcessor._rasterize(data, source)
+            return fit_image(raster, width_cm, height_cm)
+
+        return get_image_cache().load(value.source, convert, params)
+
+    @staticmethod
+    def _rasterize(data: bytes, source: str) -> bytes:
+        return DocumentProcessor._ensure_raster(data, source).getvalue()
 
     @staticmethod
     def _ensure_raster(data: bytes, source: str = "") -> BytesIO:
@@ -142,3 +297,163 @@ class DocumentProcessor:
             return True
         start = data.lstrip()[:200].decode("utf-8", errors="ignore")
         return start.lstrip().startswith("<svg") or start.lstrip().startswith("<?xml")
+
+
+def _placed_size(value: ImageValue) -> tuple[float, float | None]:
+    """Width and height in cm the picture is shown at (5 cm wide by default)."""
+    width = value.width_cm if value.width_cm is not None else 5.0
+    return width, value.height_cm
+
+
+def _picture_key(value: ImageValue) -> tuple[str, float, float | None]:
+    return (value.source, *_placed_size(value))
+
+
+def prefetch_images(
+    values: dict[str, Any],
+    max_workers: int = DEFAULT_PREFETCH_WORKERS,
+) -> dict[tuple[str, float, float | None], bytes]:
+    """Load every distinct ``IMAGE()`` in *values* concurrently.
+
+    Returns the raster bytes (resized to the placed size, see
+    :mod:`document_placeholder.image_resize`) keyed by
+    ``(source, width_cm, height_cm)``. Images that cannot be loaded are left
+    out, so the placeholder is dropped like before.
+    """
+    pictures = {
+        _picture_key(v): v for v in values.values() if isinstance(v, ImageValue)
+    }
+    if not pictures:
+        return {}
+
+    def load(value: ImageValue) -> bytes | None:
+        try:
+            return DocumentProcessor._load_picture(value)
+        except (OSError, ValueError):
+            return None
+
+    keys = list(pictures)
+    if len(keys) == 1:
+        results = [load(pictures[keys[0]])]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(keys))) as pool:
+            results = list(pool.map(load, pictures.values()))
+    return {key: data for key, data in zip(keys, results) if data is not None}
+
+
+class _PictureSet:
+    """The pictures inserted while filling one document.
+
+    Each distinct image (by content hash) is stored once as a media part, and
+    every story part (body, header, footer) relates to it once; further
+    occurrences reuse that relationship ID. Drawing ids are allocated per
+    part without rescanning the part XML for every picture.
+    """
+
+    def __init__(self, images: dict[tuple, bytes]) -> None:
+        self._images = images
+        self._digests: dict[tuple, str] = {}  # picture key -> sha1
+        self._image_parts: dict[str, Any] = {}  # sha1 -> ImagePart
+        self._rids: dict[tuple[Any, str], str] = {}  # (story part, sha1) -> rId
+        self._next_ids: dict[Any, int] = {}  # story part -> next drawing id
+
+    def add(self, run, key: tuple, width: Length, height: Length | None) -> None:
+        """Append the prefetched image *key* to *run*; skip unknown keys."""
+        data = self._images.get(key)
+        if data is None:
+            return
+        digest = self._digests.get(key)
+        if digest is None:
+            digest = self._digests[key] = hashlib.sha1(data).hexdigest()
+
+        part = run.part
+        image_part = self._image_parts.get(digest)
+        if image_part is None:
+            image_part = part.package.get_or_add_image_part(BytesIO(data))
+            self._image_parts[digest] = image_part
+        rId = self._rids.get((part, digest))
+        if rId is None:
+            rId = self._rids[(part, digest)] = part.relate_to(image_part, RT.IMAGE)
+        shape_id = self._next_ids.get(part) or part.next_id
+        self._next_ids[part] = shape_id + 1
+
+        image = image_part.image
+        cx, cy = image.scaled_dimensions(width, height)
+        run._r.add_drawing(
+            CT_Inline.new_pic_inline(shape_id, rId, image.filename, cx, cy)
+        )
+
+
+@dataclass(frozen=True)
+class PlaceholderLocation:
+    """A paragraph containing placeholders, addressed inside the package.
+
+    *path* is the chain of child indexes leading from the root element of
+    part *partname* to the ``w:p`` element.
+    """
+
+    partname: str
+    path: tuple[int, ...]
+    spans: tuple[RunSpan, ...]
+
+
+class CompiledTemplate:
+    """A template scanned once and rendered many times.
+
+    Compiling records the location of every placeholder (part, paragraph, run
+    span); :meth:`render` deep-copies a parsed pristine package and only
+    visits those paragraphs. Instances are immutable, so one compiled template
+    can be shared across renders and threads.
+    """
+
+    def __init__(self, template_path: str | Path) -> None:
+        self.path = Path(template_path)
+        self._pristine = Document(str(self.path))
+
+        locations: list[PlaceholderLocation] = []
+        doc = copy.deepcopy(self._pristine)
+        for paragraph in DocumentProcessor.iter_paragraphs(doc):
+            spans = DocumentProcessor._scan_runs([run.text for run in paragraph.runs])
+            if not spans:
+                continue
+            part = paragraph.part
+            locations.append(
+                PlaceholderLocation(
+                    partname=str(part.partname),
+                    path=self._element_path(part.element, paragraph._p),
+                    spans=tuple(spans),
+                )
+            )
+        self.locations: tuple[PlaceholderLocation, ...] = tuple(locations)
+
+    @property
+    def keys(self) -> frozenset[str]:
+        """Every placeholder key referenced by the template."""
+        return frozenset(
+            key for loc in self.locations for span in loc.spans for key in span.keys
+        )
+
+    def render(self, values: dict[str, Any]):
+        """Return a new ``docx.Document`` with *values* substituted."""
+        pictures = _PictureSet(prefetch_images(values))
+        doc = copy.deepcopy(self._pristine)
+        parts = {str(part.partname): part for part in doc.part.package.iter_parts()}
+        for loc in self.locations:
+            part = parts[loc.partname]
+            element = part.element
+            for index in loc.path:
+                element = element[index]
+            paragraph = Paragraph(element, part)
+            DocumentProcessor._apply_spans(
+                paragraph, paragraph.runs, loc.spans, values, pictures
+            )
+        return doc
+
+    @staticmethod
+    def _element_path(root, element) -> tuple[int, ...]:
+        path: list[int] = []
+        while element is not root:
+            parent = element.getparent()
+            path.append(parent.index(element))
+            element = parent
+        return tuple(reversed(path))
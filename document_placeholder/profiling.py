@@ -0,0 +1,232 @@
+"""Where a render spends its time.
+
+A :class:`Profile` collects call counts, total and maximum durations in
+four sections:
+
+* ``stages`` — loading the config and template, ``ON_START``, placeholder
+  evaluation, ``replace``, ``save``, ``export`` and ``ON_END``;
+* ``keys`` — each placeholder key;
+* ``functions`` — each registry function called by compiled expressions
+  (times include nested calls and, for lazy functions, the arguments they
+  evaluate; memoized calls count only when the function actually runs);
+* ``sql`` — each query run by ``SQL()``.
+
+Nothing is measured unless a profile is active::
+
+    with profiling.collect(Profile()) as profile:
+        run_batch(...)
+    print(profile.format_table())
+
+Activating a profile drops the compiled expressions, which are compiled
+again with timed function calls; deactivating it does the same to remove
+them. In batch mode with process workers, each worker profiles its own
+renders and :func:`~document_placeholder.batch.run_batch` merges the
+timings it gets back into the active profile.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+from document_placeholder.functions import FunctionInfo, FunctionRegistry
+
+SECTIONS = ("stages", "keys", "functions", "sql")
+_TITLES = {"stages": "Stages", "keys": "Keys", "functions": "Functions", "sql": "SQL"}
+
+_active: Profile | None = None
+
+
+@dataclass
+class Timing:
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other: Timing) -> None:
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+
+class Profile:
+    """Timings by section and name; thread-safe and picklable."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.sections: dict[str, dict[str, Timing]] = {s: {} for s in SECTIONS}
+
+    def record(self, section: str, name: Any, seconds: float) -> None:
+        name = str(name)
+        with self._lock:
+            timings = self.sections[section]
+            timing = timings.get(name)
+            if timing is None:
+                timing = timings[name] = Timing()
+            timing.add(seconds)
+
+    def wrap(self, section: str, func: Callable, name: Any = None) -> Callable:
+        """Return *func* timed under *name* (default: its first argument)."""
+        record = self.record
+        clock = time.perf_counter
+
+        def timed(*args: Any) -> Any:
+            start = clock()
+            try:
+                return func(*args)
+            finally:
+                record(section, args[0] if name is None else name, clock() - start)
+
+        return timed
+
+    def merge(self, other: Profile) -> None:
+        """Add the timings of *other* (e.g. another batch worker's)."""
+        with other._lock:
+            sections = {
+                section: {name: Timing(**vars(t)) for name, t in timings.items()}
+                for section, timings in other.sections.items()
+            }
+        with self._lock:
+            for section, timings in sections.items():
+                own = self.sections.setdefault(section, {})
+                for name, timing in timings.items():
+                    if name in own:
+                        own[name].merge(timing)
+                    else:
+                        own[name] = timing
+
+    def drain(self) -> Profile:
+        """Return the timings collected so far and start over."""
+        drained = Profile()
+        with self._lock:
+            drained.sections = self.sections
+            self.sections = {s: {} for s in SECTIONS}
+        return drained
+
+    def to_dict(self) -> dict[str, dict[str, dict[str, float]]]:
+        with self._lock:
+            return {
+                section: {name: vars(t).copy() for name, t in timings.items()}
+                for section, timings in self.sections.items()
+            }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, dict[str, dict[str, float]]]) -> Profile:
+        profile = cls()
+        for section, timings in data.items():
+            profile.sections[section] = {
+                name: Timing(**timing) for name, timing in timings.items()
+            }
+        return profile
+
+    def write_json(self, path: str | Path) -> None:
+        Path(path).write_text(json.dumps(self.to_dict(), indent=2), encoding="utf-8")
+
+    def format_table(self, limit: int = 20) -> str:
+        """Render the timings as text; stages in the order they ran, other
+        sections by total time, at most *limit* rows each."""
+        data = self.to_dict()
+        lines: list[str] = []
+        for section in SECTIONS:
+            rows = list(data.get(section, {}).items())
+            if not rows:
+                continue
+            if section != "stages":
+                rows.sort(key=lambda row: row[1]["total"], reverse=True)
+            width = max(len(section), *(len(_shorten(n)) for n, _ in rows[:limit]))
+            if lines:
+                lines.append("")
+            lines.append(
+                f"  {_TITLES.get(section, section):<{width}}  {'Calls':>7}"
+                f"  {'Total ms':>10}  {'Max ms':>9}"
+            )
+            for name, t in rows[:limit]:
+                lines.append(
+                    f"  {_shorten(name):<{width}}  {t['count']:>7}"
+                    f"  {t['total'] * 1e3:>10.2f}  {t['max'] * 1e3:>9.2f}"
+                )
+            if len(rows) > limit:
+                lines.append(f"  ... {len(rows) - limit} more")
+        return "\n".join(lines)
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {"sections": self.to_dict()}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__init__()
+        self.sections.update(Profile.from_dict(state["sections"]).sections)
+
+
+def _shorten(name: str, width: int = 48) -> str:
+    name = " ".join(name.split())
+    return name if len(name) <= width else name[: width - 3] + "..."
+
+
+# ---------------------------------------------------------------------------
+# Activation
+# ---------------------------------------------------------------------------
+
+
+def get_profile() -> Profile | None:
+    """Return the active profile, if any."""
+    return _active
+
+
+def set_profile(profile: Profile | None) -> None:
+    """Collect timings in *profile* from now on (``None`` stops)."""
+    global _active
+    if profile is not _active:
+        _active = profile
+        FunctionRegistry.invalidate()
+
+
+@contextmanager
+def collect(profile: Profile | None) -> Iterator[Profile | None]:
+    """Collect timings in *profile* within the block.
+
+    ``collect(None)`` measures nothing, so callers need not branch.
+    """
+    previous = _active
+    if profile is not None:
+        set_profile(profile)
+    try:
+        yield profile
+    finally:
+        set_profile(previous)
+
+
+@contextmanager
+def measure(section: str, name: Any) -> Iterator[None]:
+    """Time the block under *name* in the active profile, if any."""
+    profile = _active
+    if profile is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.record(section, name, time.perf_counter() - start)
+
+
+def stage(name: str):
+    """Time the block as the render stage *name* (see :func:`measure`)."""
+    return measure("stages", name)
+
+
+def timed(info: FunctionInfo) -> FunctionInfo:
+    """Return *info* with its function timed, if a profile is active."""
+    if _active is None:
+        return info
+    return replace(info, func=_active.wrap("functions", info.func, info.name))
@@ -0,0 +1,156 @@
+"""Evaluate placeholder keys in dependency order, optionally on a thread pool.
+
+Keys that do not depend on each other can be evaluated at the same time;
+this pays off when they wait on I/O (``IMAGE`` downloads, ``ENV``, slow
+custom functions). A key is submitted once every key it uses is done, so it
+always sees their values. Results do not depend on timing: they come back in
+config order, and when errors are not collected the error raised is the one
+of the first failing key in evaluation order, as in a sequential run.
+
+Keys still run concurrently, so expressions with side effects on each other
+(e.g. two keys updating the same SQL counter) should keep the default of one
+worker.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable
+
+from document_placeholder.dependencies import DependencyGraph
+
+DEFAULT_MAX_WORKERS = 1
+
+_max_workers: int = DEFAULT_MAX_WORKERS
+
+
+def set_max_workers(limit: int) -> None:
+    """Evaluate at most *limit* placeholder keys at the same time.
+
+    The default of ``1`` evaluates the keys one after another in the
+    calling thread.
+    """
+    global _max_workers
+    if limit < 1:
+        raise ValueError("Evaluation concurrency limit must be at least 1")
+    _max_workers = limit
+
+
+def get_max_workers() -> int:
+    return _max_workers
+
+
+def evaluate_graph(
+    graph: DependencyGraph,
+    evaluate: Callable[[str], Any],
+    max_workers: int | None = None,
+    errors: dict[str, Exception] | None = None,
+) -> dict[str, Any]:
+    """Call ``evaluate(key)`` for every key of *graph*, dependencies first.
+
+    Returns the values by key in evaluation order. If *errors* is ``None``
+    the first error is raised; otherwise failed keys, and the keys that
+    depend on them, are recorded there and left out of the result.
+    """
+    workers = max_workers if max_workers is not None else _max_workers
+    failures: dict[str, Exception] = {}
+    if workers <= 1 or len(graph.order) <= 1:
+        results = _evaluate_sequential(graph, evaluate, failures, errors is None)
+    else:
+        results = _evaluate_parallel(graph, evaluate, workers, failures, errors is None)
+
+    if errors is None:
+        if failures:
+            raise failures[min(failures, key=graph.order.index)]
+    else:
+        errors.update(failures)
+    return {key: results[key] for key in graph.order if key in results}
+
+
+def _failed_dependency(
+    graph: DependencyGraph, key: str, failures: dict[str, Exception]
+) -> Exception | None:
+    for dep in graph.dependencies[key]:
+        if dep in failures:
+            return ValueError(f"{dep} could not be evaluated")
+    return None
+
+
+def _evaluate_sequential(
+    graph: DependencyGraph,
+    evaluate: Callable[[str], Any],
+    failures: dict[str, Exception],
+    stop_on_error: bool,
+) -> dict[str, Any]:
+    results: dict[str, Any] = {}
+    for key in graph.order:
+        failed = _failed_dependency(graph, key, failures)
+        if failed is not None:
+            failures[key] = failed
+            continue
+        try:
+            results[key] = evaluate(key)
+        except Exception as exc:
+            failures[key] = exc
+            if stop_on_error:
+                break
+    return results
+
+
+def _evaluate_parallel(
+    graph: DependencyGraph,
+    evaluate: Callable[[str], Any],
+    workers: int,
+    failures: dict[str, Exception],
+    stop_on_error: bool,
+) -> dict[str, Any]:
+    position = {key: i for i, key in enumerate(graph.order)}
+    waiting = {key: len(deps) for key, deps in graph.dependencies.items()}
+    dependents: dict[str, list[str]] = {key: [] for key in graph.order}
+    for key in graph.order:
+        for dep in graph.dependencies[key]:
+            dependents[dep].append(key)
+
+    results: dict[str, Any] = {}
+    running: dict[Future, str] = {}
+    # When stopping on the first error, keys after the earliest failure are
+    # not started: a sequential run would not have reached them.
+    stop_at = len(graph.order)
+
+    with ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="placeholder-eval"
+    ) as pool:
+
+        def start(key: str) -> None:
+            if position[key] < stop_at:
+                running[pool.submit(evaluate, key)] = key
+
+        def finish(key: str) -> None:
+            done = [key]
+            while done:
+                for dependent in dependents[done.pop()]:
+                    waiting[dependent] -= 1
+                    if waiting[dependent]:
+                        continue
+                    failed = _failed_dependency(graph, dependent, failures)
+                    if failed is None:
+                        start(dependent)
+                    else:
+                        failures[dependent] = failed
+                        done.append(dependent)
+
+        for key in graph.order:
+            if not waiting[key]:
+                start(key)
+        while running:
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in sorted(finished, key=lambda f: position[running[f]]):
+                key = running.pop(future)
+                try:
+                    results[key] = future.result()
+                except Exception as exc:
+                    failures[key] = exc
+                    if stop_on_error:
+                        stop_at = min(stop_at, position[key])
+                finish(key)
+    return results
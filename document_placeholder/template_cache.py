@@ -0,0 +1,93 @@
+"""Process-wide LRU cache of parsed Word templates.
+
+Parsing a .docx unpacks the zip and builds an XML tree for every part. The
+cache keeps one pristine parsed copy per template and hands out deep copies,
+which is considerably cheaper than reading the package from disk again.
+
+Entries are keyed by content hash; a ``(path, mtime, size)`` index avoids
+re-reading files that did not change on disk.
+"""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import os
+from io import BytesIO
+from pathlib import Path
+
+from docx import Document
+
+from document_placeholder.lru import CacheInfo  # noqa: F401 (re-exported)
+from document_placeholder.lru import MISSING, LRUCache
+
+DEFAULT_MAXSIZE = 16
+
+
+class TemplateCache(LRUCache):
+    """Thread-safe LRU cache of parsed templates.
+
+    ``maxsize`` may be changed at any time; shrinking it evicts the least
+    recently used entries. A ``maxsize`` of ``0`` disables caching.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE) -> None:
+        super().__init__(maxsize)
+        self._stat_index: dict[str, tuple[int, int, str]] = {}
+
+    # -- public API -----------------------------------------------------------
+
+    def load(self, template_path: str | Path):
+        """Return a private, modifiable ``docx.Document`` for *template_path*."""
+        path = os.path.abspath(template_path)
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+
+        with self._lock:
+            known = self._stat_index.get(path)
+            if known is not None and known[:2] == stamp:
+                pristine = self._get(known[2])
+                if pristine is not MISSING:
+                    return self._copy(pristine)
+
+        data = Path(path).read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+
+        with self._lock:
+            self._stat_index[path] = (*stamp, digest)
+            pristine = self._get(digest)
+            if pristine is not MISSING:
+                return self._copy(pristine)
+            self.misses += 1
+
+        pristine = Document(BytesIO(data))
+        with self._lock:
+            if self._maxsize == 0:
+                return pristine
+            self._put(digest, pristine)
+        return self._copy(pristine)
+
+    # -- internals ------------------------------------------------------------
+
+    def _clear(self) -> None:
+        super()._clear()
+        self._stat_index.clear()
+
+    def _evicted(self, digest: str) -> None:
+        for path, (_, _, d) in list(self._stat_index.items()):
+            if d == digest:
+                del self._stat_index[path]
+
+    @staticmethod
+    def _copy(pristine):
+        # The cached document is never handed out or touched, so its lazily
+        # created proxies (body, headers) cannot point into a stale tree.
+        return copy.deepcopy(pristine)
+
+
+_default_cache = TemplateCache()
+
+
+def get_template_cache() -> TemplateCache:
+    """Return the process-wide cache used by :class:`DocumentProcessor`."""
+    return _default_cache
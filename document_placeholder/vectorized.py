@@ -0,0 +1,409 @@
+"""Evaluate config values for many records at once, one column per field.
+
+:class:`~document_placeholder.evaluator.Evaluator` runs the compiled form of
+each value once per record. :class:`ColumnEvaluator` takes the records of a
+batch column-oriented (one list, or NumPy array, per field) and evaluates
+each value across all rows in one call:
+
+* arithmetic and comparisons run as NumPy array operations when NumPy is
+  installed and both operands are numeric, otherwise as one list
+  comprehension per operator;
+* functions with a column kernel (see :meth:`FunctionRegistry.kernel`; the
+  string and number built-ins) run once per column;
+* other functions are called row by row.
+
+Only values whose result cannot depend on the order the records are
+rendered in are vectorized: those calling pure functions or functions
+memoized per batch (``CURRENT_DATE_STR``). Values calling anything else
+(``SQL``, ``RANDOM_INT``, unknown functions) raise
+:class:`NotVectorizableError` and are left to the per-record evaluator.
+When a column operation raises, the value is evaluated row by row instead,
+so the error is the one that row would raise.
+
+Results equal those of :class:`Evaluator` row by row. NumPy is only used
+where its arithmetic matches Python's (no division by zero, integer columns
+of one type and small enough not to overflow), and results are converted
+back to Python objects.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Mapping, NamedTuple, Sequence
+
+from document_placeholder.call_cache import (
+    MUTABLE_TYPES,
+    CallCache,
+    activate,
+    deactivate,
+    memoize,
+)
+from document_placeholder.compiler import BINARY_OPS, TemplateString
+from document_placeholder.dependencies import DependencyGraph
+from document_placeholder.evaluator import Evaluator
+from document_placeholder.functions import SCOPE_BATCH, FunctionRegistry
+from document_placeholder.parse_cache import (
+    EXPRESSION,
+    TEMPLATE,
+    ParseCache,
+    get_parse_cache,
+)
+from document_placeholder.parser import (
+    BinaryOp,
+    Constant,
+    FunctionCall,
+    Identifier,
+    NumberLiteral,
+    StringLiteral,
+    UnaryOp,
+)
+
+try:
+    import numpy as np
+except ImportError:  # optional: list comprehensions are used instead
+    np = None
+
+# Integers of at most this magnitude cannot overflow int64 in one + - *.
+_INT_LIMIT = 2**31
+
+if np is not None:
+    _NUMPY_OPS: dict[str, Callable[[Any, Any], Any]] = {
+        "+": np.add,
+        "-": np.subtract,
+        "*": np.multiply,
+        "/": np.true_divide,
+        "%": np.remainder,
+        ">": np.greater,
+        "<": np.less,
+        ">=": np.greater_equal,
+        "<=": np.less_equal,
+        "==": np.equal,
+        "!=": np.not_equal,
+    }
+
+
+class NotVectorizableError(ValueError):
+    """A config value that cannot be evaluated column-wise."""
+
+
+class _Broadcast(NamedTuple):
+    """The same value in every row."""
+
+    value: Any
+
+
+ColumnCompiled = Callable[[Mapping[str, Any], int], Any]
+
+
+def available() -> bool:
+    """Whether NumPy is installed for the numeric kernels."""
+    return np is not None
+
+
+def compile_columns(node: Any) -> ColumnCompiled:
+    """Return ``f(columns, rows)`` evaluating *node* for every row at once.
+
+    *columns* maps names to lists (or NumPy arrays) of *rows* values. The
+    result is a list, an array, or a :class:`_Broadcast` value. Raises
+    :class:`NotVectorizableError` if *node* calls a function whose result
+    may change between rows for the same arguments.
+    """
+    if isinstance(node, (NumberLiteral, StringLiteral, Constant)):
+        constant = _Broadcast(node.value)
+        return lambda columns, rows: constant
+
+    if isinstance(node, Identifier):
+        name = node.name
+        fallback = _Broadcast(name)
+        return lambda columns, rows: columns.get(name, fallback)
+
+    if isinstance(node, FunctionCall):
+        return _compile_call(node)
+
+    if isinstance(node, BinaryOp) and node.op in BINARY_OPS:
+        symbol, op = node.op, BINARY_OPS[node.op]
+        left = compile_columns(node.left)
+        right = compile_columns(node.right)
+        return lambda columns, rows: _binary(
+            symbol, op, left(columns, rows), right(columns, rows), rows
+        )
+
+    if isinstance(node, UnaryOp) and node.op == "-":
+        operand = compile_columns(node.operand)
+        return lambda columns, rows: _negate(operand(columns, rows), rows)
+
+    raise NotVectorizableError(f"Unknown AST node: {type(node).__name__}")
+
+
+def _compile_call(node: FunctionCall) -> ColumnCompiled:
+    name = node.name
+    info = FunctionRegistry.info(name)
+    if info is None:
+        raise NotVectorizableError(f"Unknown function: {name}")
+    if not (info.pure or info.memo_scope == SCOPE_BATCH):
+        raise NotVectorizableError(f"{name} may differ between records")
+    if not info.accepts(len(node.args)):
+        raise NotVectorizableError(f"{name} called with the wrong arguments")
+
+    args = [compile_columns(arg) for arg in node.args]
+    kernel = FunctionRegistry.get_kernel(name)
+    lazy = info.lazy
+    func = info.func if lazy else memoize(info)
+
+    def call(columns: Mapping[str, Any], rows: int) -> Any:
+        # Lazy functions get every argument evaluated: the values are pure,
+        # and a column that raises sends the value down the per-row path.
+        values = [arg(columns, rows) for arg in args]
+        if all(type(value) is _Broadcast for value in values):
+            if lazy:
+                return _Broadcast(func(*[_thunk(value.value) for value in values]))
+            return _Broadcast(func(*[value.value for value in values]))
+        lists = [_rows(value, rows) for value in values]
+        if kernel is not None:
+            return kernel(*lists)
+        if lazy:
+            return [func(*map(_thunk, row)) for row in zip(*lists)]
+        return list(map(func, *lists))
+
+    return call
+
+
+def compile_template_columns(
+    template: TemplateString, parse: Callable[[str], Any]
+) -> ColumnCompiled:
+    """Column-wise counterpart of a compiled ``{expr}`` template string.
+
+    *parse* returns the AST of a field's text (e.g. :meth:`ParseCache.parse`).
+    """
+    parts: list[str | ColumnCompiled] = []
+    for part in template.parts:
+        if type(part) is str:
+            parts.append(part)
+            continue
+        if part.text is None:
+            raise NotVectorizableError("Unclosed '{' in template")
+        try:
+            parts.append(compile_columns(parse(part.text)))
+        except SyntaxError as exc:
+            raise NotVectorizableError(str(exc)) from None
+
+    def render(columns: Mapping[str, Any], rows: int) -> Any:
+        texts: list[Any] = []
+        for part in parts:
+            if type(part) is str:
+                texts.append(_Broadcast(part))
+                continue
+            value = part(columns, rows)
+            if type(value) is _Broadcast:
+                texts.append(_Broadcast(_text(value.value)))
+            else:
+                texts.append([_text(v) for v in _rows(value, rows)])
+        if all(type(text) is _Broadcast for text in texts):
+            return _Broadcast("".join(text.value for text in texts))
+        return ["".join(row) for row in zip(*[_rows(t, rows) for t in texts])]
+
+    return render
+
+
+class ColumnEvaluator:
+    """Evaluate config values for every row of a column-oriented record set.
+
+    *columns* maps field names to equally long sequences (lists or NumPy
+    arrays). Like :class:`Evaluator`, identifiers without a column evaluate
+    to their own name. Calls memoized per batch use *call_cache*, which
+    should be the one the per-record evaluators of the batch share.
+    """
+
+    def __init__(
+        self,
+        columns: Mapping[str, Sequence[Any]],
+        parse_cache: ParseCache | None = None,
+        call_cache: CallCache | None = None,
+    ) -> None:
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("All columns must have the same length")
+        self.rows: int = lengths.pop() if lengths else 0
+        self.parse_cache = parse_cache if parse_cache is not None else get_parse_cache()
+        self.call_cache = call_cache if call_cache is not None else CallCache()
+        # Row values as Python objects, and the form the kernels work on.
+        self.columns: dict[str, list[Any]] = {}
+        self._vectors: dict[str, Any] = {}
+        for name, values in columns.items():
+            self._bind(name, _rows(values, self.rows))
+
+    @classmethod
+    def from_records(
+        cls, records: Sequence[Mapping[str, Any]], **kwargs: Any
+    ) -> ColumnEvaluator:
+        """Build the columns from *records*, which must share their fields."""
+        fields = list(records[0]) if records else []
+        if any(record.keys() != set(fields) for record in records):
+            raise ValueError("Records must all have the same fields")
+        columns = {name: [record[name] for record in records] for name in fields}
+        return cls(columns, **kwargs)
+
+    def evaluate_value(self, value: Any) -> list[Any]:
+        """Evaluate a raw config value for every row; see
+        :meth:`Evaluator.evaluate_value`.
+
+        Raises :class:`NotVectorizableError` if the value cannot be
+        evaluated column-wise, or the error of the first failing row.
+        """
+        compiled = self._compile(value)
+        token = activate({SCOPE_BATCH: self.call_cache})
+        try:
+            result = compiled(self._vectors, self.rows)
+        except Exception:
+            return self._evaluate_rows(value)
+        finally:
+            deactivate(token)
+        if type(result) is _Broadcast and isinstance(result.value, MUTABLE_TYPES):
+            # Would be one object shared by every row.
+            raise NotVectorizableError("Mutable result")
+        return _rows(result, self.rows)
+
+    def evaluate_placeholders(
+        self,
+        placeholders: dict[str, Any],
+        graph: DependencyGraph | None = None,
+    ) -> dict[str, list[Any]]:
+        """Evaluate every placeholder key that can be vectorized.
+
+        Keys are evaluated dependencies first and become columns other keys
+        can refer to (fields keep precedence over keys of the same name).
+        Keys that cannot be vectorized, that fail for some row, or that use
+        such a key are left out of the result, for the caller to evaluate
+        record by record. The result is in config order.
+        """
+        if graph is None:
+            graph = DependencyGraph(placeholders, self.parse_cache, self.columns)
+
+        results: dict[str, list[Any]] = {}
+        for key in graph.order:
+            if any(dep not in results for dep in graph.dependencies[key]):
+                continue
+            try:
+                column = self.evaluate_value(placeholders[key])
+            except Exception:
+                continue
+            results[key] = column
+            if key not in self.columns:
+                self._bind(key, column)
+        return {key: results[key] for key in placeholders if key in results}
+
+    # -- internals ------------------------------------------------------------
+
+    def _compile(self, value: Any) -> ColumnCompiled:
+        if not isinstance(value, str):
+            constant = _Broadcast(value)
+            return lambda columns, rows: constant
+        raw = self.parse_cache.classify(value)
+        if raw.kind == EXPRESSION:
+            return compile_columns(raw.node)
+        if raw.kind == TEMPLATE:
+            return compile_template_columns(raw.compiled, self.parse_cache.parse)
+        constant = _Broadcast(value)
+        return lambda columns, rows: constant
+
+    def _evaluate_rows(self, value: Any) -> list[Any]:
+        names = list(self.columns)
+        results = []
+        for row in zip(*self.columns.values()) if names else [()] * self.rows:
+            evaluator = Evaluator(
+                dict(zip(names, row)), self.parse_cache, self.call_cache
+            )
+            results.append(evaluator.evaluate_value(value))
+        return results
+
+    def _bind(self, name: str, values: list[Any]) -> None:
+        self.columns[name] = values
+        self._vectors[name] = _vector(values)
+
+
+def _thunk(value: Any) -> Callable[[], Any]:
+    return lambda: value
+
+
+def _text(value: Any) -> str:
+    return str(value) if value is not None else ""
+
+
+def _rows(value: Any, rows: int) -> list[Any]:
+    """*value* as a list of Python objects, one per row."""
+    if type(value) is list:
+        return value
+    if type(value) is _Broadcast:
+        return [value.value] * rows
+    if np is not None and isinstance(value, np.ndarray):
+        return value.tolist()
+    return list(value)
+
+
+def _vector(values: list[Any]) -> Any:
+    """*values* as a NumPy array if they are all small ints or all floats."""
+    if np is None or not values:
+        return values
+    types = set(map(type, values))
+    if types == {float}:
+        return np.array(values, dtype=np.float64)
+    if types == {int} and max(map(abs, values)) < _INT_LIMIT:
+        return np.array(values, dtype=np.int64)
+    return values
+
+
+def _numeric(value: Any) -> Any:
+    """*value* as an operand of a NumPy kernel, or ``None`` if it is not one."""
+    if type(value) is _Broadcast:
+        v = value.value
+        if type(v) is float or (type(v) is int and abs(v) < _INT_LIMIT):
+            return v
+        return None
+    if isinstance(value, np.ndarray):
+        return value if value.dtype.kind in "if" else None
+    return None
+
+
+def _binary(symbol: str, op: Callable, a: Any, b: Any, rows: int) -> Any:
+    if type(a) is _Broadcast and type(b) is _Broadcast:
+        return _Broadcast(op(a.value, b.value))
+    if np is not None:
+        result = _numpy_binary(symbol, a, b)
+        if result is not None:
+            return result
+    if type(a) is _Broadcast:
+        x = a.value
+        return [op(x, y) for y in _rows(b, rows)]
+    if type(b) is _Broadcast:
+        y = b.value
+        return [op(x, y) for x in _rows(a, rows)]
+    return list(map(op, _rows(a, rows), _rows(b, rows)))
+
+
+def _numpy_binary(symbol: str, a: Any, b: Any) -> Any:
+    x, y = _numeric(a), _numeric(b)
+    if x is None or y is None:
+        return None
+    if not (_small(x) and _small(y)):
+        # int64 could overflow, or lose precision when mixed with floats,
+        # where Python ints do not.
+        return None
+    if symbol in ("/", "%") and np.any(np.equal(y, 0)):
+        return None  # Python raises ZeroDivisionError
+    return _NUMPY_OPS[symbol](x, y)
+
+
+def _small(operand: Any) -> bool:
+    if isinstance(operand, np.ndarray):
+        if operand.dtype.kind != "i" or not operand.size:
+            return True
+        # Not np.abs: it wraps for the smallest int64.
+        return -_INT_LIMIT < int(operand.min()) and int(operand.max()) < _INT_LIMIT
+    return True  # scalars are checked by _numeric
+
+
+def _negate(value: Any, rows: int) -> Any:
+    if type(value) is _Broadcast:
+        return _Broadcast(-value.value)
+    if np is not None and _numeric(value) is not None and _small(value):
+        return np.negative(value)
+    return [-v for v in _rows(value, rows)]
@@ -0,0 +1,75 @@
+"""Fixtures shared by the test modules."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Callable
+
+import pytest
+from docx import Document
+
+from document_placeholder.functions import FunctionRegistry
+
+
+@pytest.fixture()
+def make_project(tmp_path) -> Callable[[str, str], tuple[Path, Path, Path]]:
+    """Return a factory writing a config and a one-paragraph template.
+
+    ``make_project(config_text, paragraph)`` returns ``(config, template,
+    output)``, with *output* inside an existing ``out`` directory.
+    """
+
+    def _make(config_text: str, paragraph: str) -> tuple[Path, Path, Path]:
+        config = tmp_path / "config.yaml"
+        config.write_text(config_text, encoding="utf-8")
+        doc = Document()
+        doc.add_paragraph(paragraph)
+        template = tmp_path / "template.docx"
+        doc.save(str(template))
+        out_dir = tmp_path / "out"
+        out_dir.mkdir(exist_ok=True)
+        return config, template, out_dir / "output.docx"
+
+    return _make
+
+
+@pytest.fixture()
+def temp_function():
+    """Register functions for one test and remove them afterwards.
+
+    ``temp_function(name, func, **metadata)`` takes the keyword arguments of
+    :meth:`FunctionRegistry.register`.
+    """
+    names: list[str] = []
+
+    def _register(name: str, func: Callable, **metadata) -> None:
+        names.append(name)
+        FunctionRegistry.register(name, **metadata)(func)
+
+    yield _register
+    for name in names:
+        FunctionRegistry._functions.pop(name, None)
+        FunctionRegistry._pure.discard(name)
+        FunctionRegistry._lazy.discard(name)
+        FunctionRegistry._info.pop(name, None)
+    if names:
+        FunctionRegistry.invalidate()
+
+
+@pytest.fixture()
+def counted(temp_function):
+    """Register ``COUNTED(x)``, which returns *x*, with the given metadata.
+
+    ``counted(**metadata)`` returns the list of arguments it is called with.
+    """
+    calls: list = []
+
+    def _register(**metadata) -> list:
+        def counted_fn(x=None):
+            calls.append(x)
+            return x
+
+        temp_function("COUNTED", counted_fn, **metadata)
+        return calls
+
+    return _register
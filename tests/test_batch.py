@@ -0,0 +1,363 @@
+"""Tests for mail-merge batch rendering."""
+
+from __future__ import annotations
+
+import json
+import subprocess
+from datetime import date
+from pathlib import Path
+
+import pytest
+from docx import Document
+
+import document_placeholder.functions.sql as sql_mod
+from document_placeholder import exporter
+from document_placeholder.batch import (
+    BatchRenderer,
+    load_records,
+    query_records,
+    run_batch,
+)
+
+CONFIG = """\
+TOTAL: PRICE * 2
+GREETING: "Dear {UPPER(NAME)}"
+OUTPUT_NAME: "Invoice-{NAME}"
+OUTPUT_FORMAT: docx
+"""
+
+
+@pytest.fixture()
+def project(make_project):
+    """Config + template that use the NAME and PRICE record fields."""
+    return make_project(CONFIG, "{GREETING}, total {TOTAL} for {NAME}")
+
+
+RECORDS = [{"NAME": "acme", "PRICE": 10}, {"NAME": "globex", "PRICE": 21}]
+
+
+class TestRecordSources:
+
+    def test_csv(self, tmp_path):
+        path = tmp_path / "r.csv"
+        path.write_text("NAME,PRICE\nacme,10\nglobex,21\n", encoding="utf-8")
+        assert load_records(path) == [
+            {"NAME": "acme", "PRICE": "10"},
+            {"NAME": "globex", "PRICE": "21"},
+        ]
+
+    def test_jsonl(self, tmp_path):
+        path = tmp_path / "r.jsonl"
+        path.write_text(
+            "\n".join(json.dumps(r) for r in RECORDS) + "\n\n", encoding="utf-8"
+        )
+        assert load_records(path) == RECORDS
+
+    def test_jsonl_rejects_non_objects(self, tmp_path):
+        path = tmp_path / "r.jsonl"
+        path.write_text("[1, 2]\n", encoding="utf-8")
+        with pytest.raises(ValueError, match="JSON object"):
+            load_records(path)
+
+    def test_unsupported_extension(self, tmp_path):
+        with pytest.raises(ValueError, match="Unsupported"):
+            load_records(tmp_path / "r.xlsx")
+
+    def test_sql(self):
+        sql_mod.init(":memory:")
+        try:
+            conn = sql_mod.get_connection()
+            conn.execute("CREATE TABLE c (NAME TEXT, PRICE INTEGER)")
+            conn.executemany("INSERT INTO c VALUES (?, ?)", [("acme", 10), ("b", 2)])
+            assert query_records("SELECT NAME, PRICE FROM c ORDER BY rowid") == [
+                {"NAME": "acme", "PRICE": 10},
+                {"NAME": "b", "PRICE": 2},
+            ]
+        finally:
+            sql_mod.close()
+
+
+class TestRunBatch:
+
+    def _text(self, path) -> str:
+        return Document(str(path)).paragraphs[0].text
+
+    def test_single_worker(self, project, tmp_path):
+        config, template, output = project
+        results = run_batch(
+            config, template, RECORDS, output, str(tmp_path / "db"), workers=1
+        )
+        assert [r.error for r in results] == [None, None]
+        assert [r.base_name for r in results] == ["Invoice-acme", "Invoice-globex"]
+        assert self._text(results[0].generated[0]) == "Dear ACME, total 20 for acme"
+        assert self._text(results[1].generated[0]) == "Dear GLOBEX, total 42 for globex"
+
+    def test_process_pool(self, project, tmp_path):
+        config, template, output = project
+        records = [{"NAME": f"c{i}", "PRICE": i} for i in range(6)]
+        seen: list[int] = []
+        results = run_batch(
+            config,
+            template,
+            records,
+            output,
+            str(tmp_path / "db"),
+            workers=2,
+            on_result=lambda r: seen.append(r.index),
+        )
+        assert [r.index for r in results] == list(range(6))
+        assert sorted(seen) == list(range(6))
+        for i, result in enumerate(results):
+            assert (
+                self._text(result.generated[0]) == f"Dear C{i}, total {i * 2} for c{i}"
+            )
+
+    def test_error_is_reported_per_record(self, project, tmp_path):
+        config, template, output = project
+        records = [{"NAME": "ok", "PRICE": 1}, {"NAME": "bad", "PRICE": None}]
+        results = run_batch(
+            config, template, records, output, str(tmp_path / "db"), workers=1
+        )
+        assert results[0].error is None
+        assert results[1].error is not None
+
+    def test_keys_refer_to_each_other(self, project, tmp_path):
+        config, template, output = project
+        config.write_text(
+            'GREETING: "Dear {NAME} ({TOTAL})"\nTOTAL: NET + 1\nNET: PRICE * 2\n',
+            encoding="utf-8",
+        )
+        results = run_batch(
+            config, template, RECORDS, output, str(tmp_path / "db"), workers=1
+        )
+        assert self._text(results[1].generated[0]) == (
+            "Dear globex (43), total 43 for globex"
+        )
+
+    def test_lazy_skips_unused_keys(self, project, tmp_path):
+        config, template, output = project
+        config.write_text(
+            CONFIG + "UNUSED: SQL('SELECT * FROM no_such_table')\n", encoding="utf-8"
+        )
+        eager = run_batch(
+            config, template, RECORDS, output, str(tmp_path / "db"), workers=1
+        )
+        assert "no_such_table" in eager[0].error
+        lazy = run_batch(
+            config,
+            template,
+            RECORDS,
+            output,
+            str(tmp_path / "db"),
+            workers=1,
+            lazy=True,
+        )
+        assert [r.error for r in lazy] == [None, None]
+        assert self._text(lazy[0].generated[0]) == "Dear ACME, total 20 for acme"
+
+    def test_vectorized_matches_per_record(self, project, tmp_path):
+        config, template, output = project
+        config.write_text(
+            "ON_START: SQL('CREATE TABLE IF NOT EXISTS n (v INTEGER)')\n"
+            "ON_END: SQL('INSERT INTO n VALUES (1)')\n"
+            'GREETING: "Dear {UPPER(NAME)} #{SEQ}"\n'
+            "SEQ: SQL('SELECT COUNT(*) FROM n') + 1\n"
+            "TOTAL: ROUND(PRICE * 1.2, 2)\n"
+            'OUTPUT_NAME: "Invoice-{NAME}"\n',
+            encoding="utf-8",
+        )
+        records = [{"NAME": f"c{i}", "PRICE": i + 0.5} for i in range(4)]
+        texts = {}
+        for vectorize in (True, False):
+            results = run_batch(
+                config,
+                template,
+                records,
+                output,
+                str(tmp_path / f"db-{vectorize}"),
+                workers=1,
+                vectorize=vectorize,
+            )
+            assert [r.error for r in results] == [None] * 4
+            texts[vectorize] = [self._text(r.generated[0]) for r in results]
+        assert texts[True] == texts[False]
+        assert texts[True][3] == "Dear C3 #4, total 4.2 for c3"
+
+    def test_evaluate_columns(self, project):
+        config, template, output = project
+        config.write_text(
+            CONFIG + "ROLL: RANDOM_INT(1, 6)\nUNIT: 100 / PRICE\n", encoding="utf-8"
+        )
+        renderer = BatchRenderer(config, template, output)
+        records = RECORDS + [{"NAME": "zero", "PRICE": 0}]
+        precomputed = renderer.evaluate_columns(records)
+        assert precomputed[0] == {"TOTAL": 20, "GREETING": "Dear ACME"}
+        result = renderer.render(2, records[2], precomputed[2])
+        assert "division by zero" in result.error
+
+    def test_fields_named_like_date_components(self, project, tmp_path):
+        config, template, output = project
+        config.write_text(
+            CONFIG + "THIS_YEAR: CURRENT_DATE_NUM(year)\nBORN: year + 0\n",
+            encoding="utf-8",
+        )
+        records = [
+            {"NAME": "acme", "PRICE": 1, "year": 2020, "month": 3},
+            {"NAME": "globex", "PRICE": 2, "year": 1999, "month": 7},
+        ]
+        renderer = BatchRenderer(config, template, output)
+        precomputed = renderer.evaluate_columns(records)
+        assert precomputed[0]["THIS_YEAR"] == date.today().year
+        assert [p["BORN"] for p in precomputed] == [2020, 1999]
+        for vectorize in (True, False):
+            results = run_batch(
+                config,
+                template,
+                records,
+                output,
+                str(tmp_path / "db"),
+                workers=1,
+                vectorize=vectorize,
+            )
+            assert [r.error for r in results] == [None, None]
+
+    COUNTER = """\
+ON_START:
+  - SQL('CREATE TABLE IF NOT EXISTS doc (n INTEGER DEFAULT 0)')
+  - SQL('INSERT OR IGNORE INTO doc (rowid, n) VALUES (1, 0)')
+ON_END: SQL('UPDATE doc SET n = n + 1 WHERE rowid = 1')
+NUM: SQL('SELECT n FROM doc WHERE rowid = 1') + 1
+GREETING: NAME
+TOTAL: PRICE
+OUTPUT_NAME: "Invoice-{NUM}"
+OUTPUT_FORMAT: docx
+"""
+
+    def test_hooks_default_to_one_worker(self, project, tmp_path):
+        config, template, output = project
+        config.write_text(self.COUNTER, encoding="utf-8")
+        records = [{"NAME": f"c{i}", "PRICE": i} for i in range(6)]
+        results = run_batch(config, template, records, output, str(tmp_path / "db"))
+        assert [r.error for r in results] == [None] * 6
+        assert [r.base_name for r in results] == [f"Invoice-{i}" for i in range(1, 7)]
+
+    def test_repeated_output_name_fails(self, project, tmp_path):
+        config, template, output = project
+        config.write_text(self.COUNTER, encoding="utf-8")
+        records = [{"NAME": f"c{i}", "PRICE": i} for i in range(6)]
+        results = run_batch(
+            config, template, records, output, str(tmp_path / "db"), workers=3
+        )
+        ok = [r for r in results if r.error is None]
+        assert len({r.base_name for r in ok}) == len(ok)
+        for result in results:
+            if result.error is not None:
+                assert "is already used by record" in result.error
+                assert result.generated == []
+        for result in ok:
+            assert self._text(result.generated[0]).startswith(
+                f"{records[result.index]['NAME']}, "
+            )
+        files = sorted(p.name for p in output.parent.iterdir())
+        assert files == sorted(f"{r.base_name}.docx" for r in ok)
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_later_record_with_same_name_fails(self, project, tmp_path, workers):
+        config, template, output = project
+        records = [
+            {"NAME": "acme", "PRICE": 1},
+            {"NAME": "globex", "PRICE": 2},
+            {"NAME": "acme", "PRICE": 3},
+        ]
+        results = run_batch(
+            config, template, records, output, str(tmp_path / "db"), workers=workers
+        )
+        assert [r.error for r in results[:2]] == [None, None]
+        assert (
+            results[2].error == "Output name 'Invoice-acme' is already used by record 1"
+        )
+        assert self._text(results[0].generated[0]) == "Dear ACME, total 2 for acme"
+        assert len(list(output.parent.iterdir())) == 2
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_output_name_in_subdirectory(self, project, tmp_path, workers):
+        config, template, output = project
+        config.write_text(
+            CONFIG.replace('"Invoice-{NAME}"', '"{NAME}/Invoice-{NAME}"'),
+            encoding="utf-8",
+        )
+        results = run_batch(
+            config, template, RECORDS, output, str(tmp_path / "db"), workers=workers
+        )
+        assert [r.error for r in results] == [None, None]
+        for record, result in zip(RECORDS, results):
+            name = record["NAME"]
+            assert result.generated == [output.parent / name / f"Invoice-{name}.docx"]
+            assert [p.name for p in (output.parent / name).iterdir()] == [
+                f"Invoice-{name}.docx"
+            ]
+
+    def test_default_names_without_output_name(self, project, tmp_path):
+        config, template, output = project
+        config.write_text("TOTAL: PRICE\n", encoding="utf-8")
+        results = run_batch(
+            config, template, RECORDS, output, str(tmp_path / "db"), workers=1
+        )
+        assert [r.base_name for r in results] == ["output-1", "output-2"]
+
+    def test_exports_run_through_backend(self, project, tmp_path):
+        config, template, output = project
+        config.write_text(
+            CONFIG.replace("OUTPUT_FORMAT: docx", "OUTPUT_FORMAT: pdf"),
+            encoding="utf-8",
+        )
+        converted: list[str] = []
+
+        class Backend:
+            def convert(self, input_path, output_path):
+                converted.append(Path(output_path).name)
+                Path(output_path).write_bytes(b"%PDF")
+
+        exporter.set_pdf_backend(Backend())
+        try:
+            results = run_batch(
+                config, template, RECORDS, output, str(tmp_path / "db"), workers=2
+            )
+        finally:
+            exporter.set_pdf_backend(None)
+        assert sorted(converted) == ["Invoice-acme.pdf", "Invoice-globex.pdf"]
+        assert [r.generated[0].name for r in results] == converted
+        assert not any(r.docx_path.exists() for r in results)
+
+    def test_exports_are_bulk(self, project, tmp_path, monkeypatch):
+        config, template, output = project
+        config.write_text(
+            CONFIG.replace("OUTPUT_FORMAT: docx", "OUTPUT_FORMAT: [docx, pdf]"),
+            encoding="utf-8",
+        )
+        calls: list[list[str]] = []
+
+        def run(cmd, **kwargs):
+            calls.append(cmd)
+            outdir = Path(cmd[cmd.index("--outdir") + 1])
+            for arg in cmd[cmd.index("--outdir") + 2 :]:
+                (outdir / f"{Path(arg).stem}.pdf").write_bytes(b"%PDF")
+            return subprocess.CompletedProcess(cmd, 0, "", "")
+
+        monkeypatch.setattr(exporter.subprocess, "run", run)
+        monkeypatch.setattr(exporter, "_max_parallel", 1)
+        records = [{"NAME": f"c{i}", "PRICE": i} for i in range(5)]
+        results = run_batch(
+            config,
+            template,
+            records,
+            output,
+            str(tmp_path / "db"),
+            workers=1,
+            export_chunk_size=3,
+        )
+        assert len(calls) == 2
+        assert [[p.suffix for p in r.generated] for r in results] == [
+            [".docx", ".pdf"]
+        ] * 5
+        assert all(p.exists() for r in results for p in r.generated)
@@ -0,0 +1,197 @@
+"""Tests for per-render resource budgets."""
+
+from __future__ import annotations
+
+import time
+
+import pytest
+
+import document_placeholder.functions.logic  # noqa: F401
+import document_placeholder.functions.math  # noqa: F401
+import document_placeholder.functions.sql as sql_mod
+import document_placeholder.functions.string  # noqa: F401
+from document_placeholder import budget
+from document_placeholder.batch import BatchRenderer, run_batch
+from document_placeholder.budget import Budget, BudgetExceededError, limits
+from document_placeholder.call_cache import CallCache
+from document_placeholder.evaluator import Evaluator
+from document_placeholder.functions import FunctionRegistry
+from document_placeholder.parse_cache import ParseCache
+
+LOOP = (
+    "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) "
+    "SELECT max(x) FROM c"
+)
+
+
+@pytest.fixture()
+def sleepy(temp_function):
+    """Register ``SLEEPY()``, which takes 20 ms."""
+    temp_function("SLEEPY", lambda: time.sleep(0.02) or 1)
+
+
+class TestBudget:
+
+    def test_unlimited_by_default(self):
+        assert budget.get_budget() is None
+        assert Evaluator().meter is None
+
+    @pytest.mark.parametrize(
+        "limit", ["max_steps", "max_string_length", "timeout", "sql_timeout"]
+    )
+    def test_limits_must_be_positive(self, limit):
+        with pytest.raises(ValueError, match=f"{limit} must be positive"):
+            Budget(**{limit: 0})
+
+    def test_limits_restores_and_recompiles(self):
+        generation = FunctionRegistry.generation
+        with limits(Budget(max_steps=5)) as active:
+            assert budget.get_budget() is active
+            assert FunctionRegistry.generation > generation
+            with limits(None):
+                assert budget.get_budget() is active
+        assert budget.get_budget() is None
+
+
+class TestSteps:
+
+    def test_steps_counted_per_render(self):
+        with limits(Budget(max_steps=3)):
+            evaluator = Evaluator({"A": 1})
+            assert evaluator.evaluate_value("A + A + A") == 3
+            assert evaluator.meter.steps == 2
+            with pytest.raises(BudgetExceededError, match="limit of 3 steps"):
+                evaluator.evaluate_value("A + A + A")
+            assert Evaluator({"A": 1}).evaluate_value("A + A + A") == 3
+
+    def test_placeholders_share_the_budget(self):
+        placeholders = {"B": "A * 2", "C": "B * 2", "D": "C * 2"}
+        with limits(Budget(max_steps=2)):
+            with pytest.raises(BudgetExceededError):
+                Evaluator({"A": 1}).evaluate_placeholders(placeholders)
+        assert Evaluator({"A": 1}).evaluate_placeholders(placeholders)["D"] == 8
+
+    def test_folded_constants_cost_nothing(self):
+        with limits(Budget(max_steps=1)):
+            assert Evaluator().evaluate_value("UPPER('a') + LOWER('B') + 'c'") == (
+                "Abc"
+            )
+
+    def test_memoized_as_without_budget(self, temp_function):
+        temp_function("SHOUT", lambda x: x.upper(), scope="batch")
+        placeholders = {"X": "SHOUT(A)", "Y": "SHOUT(A) + '!'", "Z": "SHOUT('b')"}
+        infos = []
+        for active in (None, Budget(max_steps=100)):
+            with limits(active):
+                parse_cache, call_cache = ParseCache(), CallCache()
+                for record in ({"A": "a"}, {"A": "a"}, {"A": "c"}):
+                    Evaluator(
+                        record, parse_cache=parse_cache, call_cache=call_cache
+                    ).evaluate_placeholders(placeholders)
+                infos.append(call_cache.info())
+        assert infos[0] == infos[1]
+        assert infos[0].hits > 0
+
+
+class TestStringLength:
+
+    @pytest.mark.parametrize(
+        "value",
+        [
+            "REPEAT('x', 1000000000)",
+            "REPEAT(TEXT, N)",
+            "TEXT * N",
+            "N * TEXT",
+            "PAD_LEFT(TEXT, N)",
+            "PAD_RIGHT('x', 1000000000)",
+            "REPLACE(REPEAT(TEXT, 90), TEXT, REPEAT(TEXT, 90))",
+            "CONCAT(REPEAT(TEXT, 60), REPEAT(TEXT, 60))",
+            "{REPEAT(TEXT, 60)}{REPEAT(TEXT, 60)}",
+        ],
+    )
+    def test_rejected_before_building(self, value):
+        with limits(Budget(max_string_length=100)):
+            evaluator = Evaluator({"TEXT": "x", "N": 10**9})
+            with pytest.raises(BudgetExceededError, match="exceeds the limit of 100"):
+                evaluator.evaluate_value(value)
+
+    def test_within_limit(self):
+        with limits(Budget(max_string_length=100)):
+            evaluator = Evaluator({"TEXT": "ab", "N": 50})
+            assert evaluator.evaluate_value("REPEAT(TEXT, N)") == "ab" * 50
+            assert evaluator.evaluate_value("PAD_LEFT(TEXT, 5, '0')") == "000ab"
+
+
+class TestTimeout:
+
+    def test_slow_value_stopped(self, sleepy):
+        with limits(Budget(timeout=0.05)):
+            evaluator = Evaluator()
+            with pytest.raises(BudgetExceededError, match="timeout of 0.05s"):
+                evaluator.evaluate_value("SLEEPY() + SLEEPY() + SLEEPY() + SLEEPY()")
+            # The timeout applies to each value separately.
+            assert evaluator.evaluate_value("SLEEPY() + SLEEPY()") == 2
+
+    def test_sql_interrupted(self):
+        sql_mod.init(":memory:")
+        try:
+            with limits(Budget(sql_timeout=0.1)):
+                evaluator = Evaluator()
+                start = time.monotonic()
+                with pytest.raises(BudgetExceededError, match="SQL query interrupted"):
+                    evaluator.evaluate_value(f'SQL("{LOOP}")')
+                assert time.monotonic() - start < 5
+                assert evaluator.evaluate_value("SQL('SELECT 1')") == 1
+        finally:
+            sql_mod.close()
+
+    def test_sql_stopped_by_value_timeout(self):
+        sql_mod.init(":memory:")
+        try:
+            with limits(Budget(timeout=0.1)):
+                with pytest.raises(BudgetExceededError):
+                    Evaluator().evaluate_value(f'SQL("{LOOP}")')
+        finally:
+            sql_mod.close()
+
+    def test_sql_errors_unchanged(self):
+        sql_mod.init(":memory:")
+        try:
+            with limits(Budget(sql_timeout=1)):
+                with pytest.raises(Exception, match="no such table"):
+                    Evaluator().evaluate_value("SQL('SELECT * FROM missing')")
+        finally:
+            sql_mod.close()
+
+
+@pytest.fixture()
+def project(make_project):
+    return make_project("LINE: REPEAT(NAME, TIMES)\n", "{LINE}")
+
+
+class TestBatch:
+
+    RECORDS = [{"NAME": "ab", "TIMES": 3}, {"NAME": "cd", "TIMES": 10**9}]
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_over_budget_record_fails_alone(self, project, tmp_path, workers):
+        config, template, output = project
+        with limits(Budget(max_string_length=1000)):
+            results = run_batch(
+                config,
+                template,
+                self.RECORDS,
+                output,
+                str(tmp_path / "db"),
+                workers=workers,
+            )
+        assert results[0].error is None
+        assert "exceeds the limit of 1000" in results[1].error
+
+    def test_no_column_evaluation_under_budget(self, project):
+        config, template, output = project
+        renderer = BatchRenderer(config, template, output)
+        records = [{"NAME": "ab", "TIMES": 1}, {"NAME": "cd", "TIMES": 2}]
+        assert renderer.evaluate_columns(records)[1] == {"LINE": "cdcd"}
+        with limits(Budget(max_steps=100)):
+            assert renderer.evaluate_columns(records) == [{}, {}]
@@ -0,0 +1,214 @@
+"""Tests for function metadata and scoped memoization of calls."""
+
+from __future__ import annotations
+
+import pytest
+from docx import Document
+
+import document_placeholder.functions.date  # noqa: F401
+import document_placeholder.functions.logic  # noqa: F401
+import document_placeholder.functions.math  # noqa: F401
+import document_placeholder.functions.sql  # noqa: F401
+import document_placeholder.functions.string  # noqa: F401
+from document_placeholder.batch import BatchRenderer
+from document_placeholder.call_cache import CallCache, use_caches
+from document_placeholder.evaluator import Evaluator
+from document_placeholder.functions import FunctionRegistry
+from document_placeholder.parse_cache import ParseCache
+
+
+class TestMetadata:
+
+    def test_builtin_scopes(self):
+        assert FunctionRegistry.info("CURRENT_DATE_STR").scope == "batch"
+        assert FunctionRegistry.info("TODAY").scope == "batch"
+        assert FunctionRegistry.info("RANDOM_INT").scope == "call"
+        assert FunctionRegistry.info("SQL").scope == "call"
+
+    def test_pure_defaults_to_batch_scope(self):
+        info = FunctionRegistry.info("UPPER")
+        assert info.pure
+        assert info.scope == "batch"
+
+    def test_arity_from_signature(self):
+        assert FunctionRegistry.info("UPPER").arity == (1, 1)
+        assert FunctionRegistry.info("IF").arity == (2, 3)
+        assert FunctionRegistry.info("CONCAT").arity == (0, None)
+        assert FunctionRegistry.info("SWITCH").arity == (1, None)
+
+    def test_declared_arity_and_cost(self):
+        info = FunctionRegistry.info("SQL")
+        assert info.arity == (1, 1)
+        assert info.cost == 100
+
+    def test_unknown_function(self):
+        assert FunctionRegistry.info("NO_SUCH_FUNCTION") is None
+
+    def test_unknown_scope_rejected(self):
+        with pytest.raises(ValueError, match="Unknown scope"):
+            FunctionRegistry.register("BAD", scope="forever")
+
+    def test_memo_scope(self, counted):
+        counted(scope="run")
+        assert FunctionRegistry.info("COUNTED").memo_scope == "run"
+        counted()
+        assert FunctionRegistry.info("COUNTED").memo_scope is None
+        counted(pure=True)
+        assert FunctionRegistry.info("COUNTED").memo_scope is None
+        counted(pure=True, cost=50)
+        assert FunctionRegistry.info("COUNTED").memo_scope == "batch"
+        assert FunctionRegistry.info("IF").memo_scope is None  # lazy
+
+
+class TestArity:
+
+    def test_too_few_arguments(self):
+        with pytest.raises(TypeError, match="UPPER expects 1 argument"):
+            Evaluator().evaluate_value("UPPER()")
+
+    def test_too_many_arguments(self):
+        with pytest.raises(TypeError, match="IF expects 2 to 3 argument"):
+            Evaluator().evaluate_value("IF(1, 2, 3, 4)")
+
+    def test_variadic_minimum(self):
+        with pytest.raises(TypeError, match="SWITCH expects at least 1"):
+            Evaluator().evaluate_value("SWITCH()")
+
+    def test_raised_only_when_run(self):
+        ev = Evaluator({"FLAG": 0})
+        assert ev.evaluate_value("IF(FLAG, UPPER(), 'ok')") == "ok"
+
+
+class TestCallCache:
+
+    def test_hit(self):
+        cache = CallCache()
+        calls = []
+
+        def double(x):
+            calls.append(x)
+            return x * 2
+
+        assert cache.call(double, (2,)) == 4
+        assert cache.call(double, (2,)) == 4
+        assert calls == [2]
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_argument_types_distinguished(self):
+        cache = CallCache()
+        assert cache.call(str, (1,)) == "1"
+        assert cache.call(str, (1.0,)) == "1.0"
+        assert cache.call(str, (True,)) == "True"
+
+    def test_unhashable_arguments_not_cached(self):
+        cache = CallCache()
+        assert cache.call(len, ([1, 2],)) == 2
+        assert cache.info().size == 0
+
+    def test_mutable_result_not_cached(self):
+        cache = CallCache()
+        first = cache.call(list, ("ab",))
+        first.append("c")
+        assert cache.call(list, ("ab",)) == ["a", "b"]
+
+    def test_lru_eviction(self):
+        cache = CallCache(maxsize=2)
+        for x in (1, 2, 3):
+            cache.call(abs, (x,))
+        info = cache.info()
+        assert (info.size, info.evictions) == (2, 1)
+
+    def test_clear(self):
+        cache = CallCache()
+        cache.call(abs, (1,))
+        cache.clear()
+        assert cache.info().size == 0
+        assert cache.hits == cache.misses == 0
+
+
+class TestMemoization:
+
+    def test_run_scope_per_evaluator(self, counted):
+        calls = counted(scope="run")
+        cache = ParseCache()
+        ev = Evaluator(parse_cache=cache)
+        assert ev.evaluate_value("COUNTED('a')") == "a"
+        assert ev.evaluate_value("'x' + COUNTED('a')") == "xa"
+        assert calls == ["a"]
+        assert Evaluator(parse_cache=cache).evaluate_value("COUNTED('a')") == "a"
+        assert calls == ["a", "a"]
+
+    def test_different_arguments_computed(self, counted):
+        calls = counted(scope="run")
+        ev = Evaluator(parse_cache=ParseCache())
+        ev.evaluate_value("COUNTED(1)")
+        ev.evaluate_value("COUNTED(2)")
+        assert calls == [1, 2]
+
+    def test_batch_scope_shared_cache(self, counted):
+        calls = counted(scope="batch")
+        parse_cache, call_cache = ParseCache(), CallCache()
+        for record in ({"A": 1}, {"A": 2}, {"A": 3}):
+            ev = Evaluator(record, parse_cache=parse_cache, call_cache=call_cache)
+            assert (
+                ev.evaluate_template("{A}-{COUNTED(month)}") == f"{record['A']}-month"
+            )
+        assert calls == ["month"]
+
+    def test_costly_pure_function_shared(self, counted):
+        calls = counted(pure=True, cost=50)
+        parse_cache, call_cache = ParseCache(), CallCache()
+        for record in ({"A": 1}, {"A": 2}, {"A": 1}):
+            ev = Evaluator(record, parse_cache=parse_cache, call_cache=call_cache)
+            ev.evaluate_value("COUNTED(A)")
+        assert calls == [1, 2]
+
+    def test_call_scope_not_memoized(self, counted):
+        calls = counted()
+        ev = Evaluator(parse_cache=ParseCache())
+        ev.evaluate_value("COUNTED(1)")
+        ev.evaluate_value("COUNTED(1)")
+        assert calls == [1, 1]
+
+    def test_output_name(self, counted):
+        calls = counted(scope="run")
+        ev = Evaluator(parse_cache=ParseCache())
+        ev.evaluate_value("COUNTED(1)")
+        assert ev.resolve_output_name("doc-{COUNTED(1)}", {}) == "doc-1"
+        assert calls == [1]
+
+    def test_use_caches(self, counted):
+        calls = counted(scope="batch")
+        compiled = ParseCache().compile("COUNTED(1)")
+        with use_caches({"batch": CallCache()}):
+            compiled({})
+            compiled({})
+        compiled({})
+        assert len(calls) == 2
+
+    def test_current_date_once_per_batch(self, tmp_path):
+        calls = []
+        original = FunctionRegistry.info("CURRENT_DATE_STR").func
+
+        def current_date_str(*args):
+            calls.append(args)
+            return original(*args)
+
+        config = tmp_path / "config.yaml"
+        config.write_text(
+            'MONTH: "CURRENT_DATE_STR(month)"\nOUTPUT_NAME: "doc-{NAME}"\n',
+            encoding="utf-8",
+        )
+        doc = Document()
+        doc.add_paragraph("{NAME}: {MONTH}")
+        template = tmp_path / "template.docx"
+        doc.save(str(template))
+
+        FunctionRegistry.register("CURRENT_DATE_STR", scope="batch")(current_date_str)
+        try:
+            renderer = BatchRenderer(config, template, tmp_path / "out.docx")
+            results = [renderer.render(i, {"NAME": f"n{i}"}) for i in range(20)]
+        finally:
+            FunctionRegistry.register("CURRENT_DATE_STR", scope="batch")(original)
+        assert all(result.error is None for result in results)
+        assert calls == [("month",)]
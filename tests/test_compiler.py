@@ -0,0 +1,142 @@
+"""Tests for compiling expression ASTs to closures."""
+
+from __future__ import annotations
+
+import pytest
+
+import document_placeholder.functions.date  # noqa: F401
+import document_placeholder.functions.logic  # noqa: F401
+import document_placeholder.functions.math  # noqa: F401
+import document_placeholder.functions.string  # noqa: F401
+from document_placeholder.compiler import compile_ast, compile_template
+from document_placeholder.evaluator import Evaluator
+from document_placeholder.functions import FunctionRegistry
+from document_placeholder.parse_cache import ParseCache
+from document_placeholder.parser import Parser, Tokenizer, UnaryOp
+
+
+def _ast(text: str):
+    return Parser(Tokenizer(text).tokens).parse()
+
+
+class TestMatchesInterpreter:
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "42",
+            "-3.5",
+            "'text'",
+            "2 + 3 * 4 - 1",
+            "(2 + 3) * 4 % 7",
+            "10 / 4",
+            "--5",
+            "1 < 2",
+            "2 >= 2",
+            "3 != 3",
+            "'a' == 'a'",
+            "'abc' + UPPER('d')",
+            "ROUND(10 / 3, 2)",
+            "MAX(1, 5, 3, 2)",
+            "IF(PRICE > 100, 'big', 'small')",
+            "PRICE * QTY",
+            "UNKNOWN_WORD",
+            "CURRENT_DATE_NUM(year)",
+            "JOIN('-', 'a', 'b', 'c')",
+        ],
+    )
+    def test_same_result(self, text):
+        variables = {"PRICE": 150, "QTY": 3}
+        expected = Evaluator(variables).evaluate(_ast(text))
+        assert compile_ast(_ast(text))(variables) == expected
+
+    def test_unknown_function_fails_at_run_time(self):
+        compiled = compile_ast(_ast("NO_SUCH_FUNC(1)"))
+        with pytest.raises(ValueError, match="Unknown function: NO_SUCH_FUNC"):
+            compiled({})
+
+    def test_function_registered_after_compile(self, temp_function):
+        compiled = compile_ast(_ast("LATE_FUNC(2)"))
+        temp_function("LATE_FUNC", lambda x: x * 10)
+        assert compiled({}) == 20
+
+    def test_lazy_function_registered_after_compile(self):
+        compiled = compile_ast(_ast("LATE_LAZY(1, NO_SUCH_FUNC())"))
+        FunctionRegistry.register("LATE_LAZY", lazy=True)(lambda a, b: a())
+        try:
+            assert compiled({}) == 1
+        finally:
+            FunctionRegistry._functions.pop("LATE_LAZY", None)
+            FunctionRegistry._lazy.discard("LATE_LAZY")
+
+    def test_unknown_operator_rejected(self):
+        with pytest.raises(ValueError, match="Unknown AST node"):
+            compile_ast(UnaryOp("!", _ast("1")))
+
+    def test_errors_propagate(self):
+        with pytest.raises(ZeroDivisionError):
+            compile_ast(_ast("1 / 0"))({})
+
+
+class TestEvaluatorUsesCompiledCode:
+
+    def test_compiled_once_per_text(self):
+        cache = ParseCache()
+        ev = Evaluator({"A": 2}, parse_cache=cache)
+        assert ev.evaluate_expression("A * 3") == 6
+        assert cache.compile("A * 3") is cache.compile("A * 3")
+
+    def test_reregistration_recompiles(self, temp_function):
+        cache = ParseCache()
+        ev = Evaluator(parse_cache=cache)
+        temp_function("SWAPPED", lambda: "old")
+        assert ev.evaluate_expression("SWAPPED()") == "old"
+        temp_function("SWAPPED", lambda: "new")
+        assert ev.evaluate_expression("SWAPPED()") == "new"
+
+
+class TestTemplateString:
+
+    def _template(self, text: str):
+        return compile_template(text, ParseCache().compile)
+
+    def test_segments(self):
+        parts = self._template("Total: {A * 2} EUR").parts
+        assert parts[0] == "Total: "
+        assert parts[1].text == "A * 2"
+        assert parts[2] == " EUR"
+
+    def test_render(self):
+        assert self._template("{A} + {A * 2}!")({"A": 3}) == "3 + 6!"
+
+    def test_plain_text(self):
+        template = self._template("no fields }")
+        assert template.fields == []
+        assert template({}) == "no fields }"
+
+    def test_none_renders_empty(self):
+        assert self._template("[{X}]")({"X": None}) == "[]"
+
+    def test_braces_in_strings(self):
+        assert self._template("{'}' + '{'}")({}) == "}{"
+
+    def test_substitutions(self):
+        template = self._template("{A}-{A + 1}")
+        assert template({"A": 1}, {"A": "x"}) == "x-2"
+
+    def test_errors_raised_in_order(self, temp_function):
+        calls = []
+        temp_function("MARK", lambda: calls.append(1) or "m")
+        template = self._template("{MARK()} {1 +} {oops")
+        assert calls == []
+        with pytest.raises(SyntaxError, match="Unexpected token"):
+            template({})
+        assert calls == [1]
+
+    def test_unmatched_brace(self):
+        with pytest.raises(SyntaxError, match="Unmatched '\\{' at position 2"):
+            self._template("a {b")({})
+
+    def test_cached(self):
+        cache = ParseCache()
+        assert cache.template("x {1}") is cache.template("x {1}")
@@ -0,0 +1,154 @@
+"""Tests for references between config keys."""
+
+from __future__ import annotations
+
+import pytest
+
+import document_placeholder.functions.logic  # noqa: F401
+import document_placeholder.functions.math  # noqa: F401
+import document_placeholder.functions.string  # noqa: F401
+from document_placeholder.config import Config
+from document_placeholder.dependencies import (
+    CircularReferenceError,
+    DependencyGraph,
+    references,
+    used_keys,
+)
+from document_placeholder.evaluator import Evaluator
+
+
+class TestReferences:
+
+    def test_expression(self):
+        assert references("ROUND(PRICE * QTY, 2)") == {"PRICE", "QTY"}
+
+    def test_template(self):
+        assert references("Total: {TOTAL} for {UPPER(NAME)}") == {"TOTAL", "NAME"}
+
+    def test_names_inside_strings_ignored(self):
+        assert references("SQL('SELECT PRICE FROM t')") == set()
+
+    def test_plain_text(self):
+        assert references("just some words") == set()
+
+    def test_non_string(self):
+        assert references(42) == set()
+
+
+class TestDependencyGraph:
+
+    def test_dependencies_first(self):
+        graph = DependencyGraph({"TOTAL": "PRICE * 1.2", "PRICE": "100"})
+        assert graph.order == ["PRICE", "TOTAL"]
+        assert graph.dependencies == {"TOTAL": ["PRICE"], "PRICE": []}
+
+    def test_config_order_kept_for_independent_keys(self):
+        graph = DependencyGraph({"C": "1", "B": "A + 1", "A": "2", "D": "3"})
+        assert graph.order == ["C", "A", "B", "D"]
+
+    def test_self_reference_is_not_a_dependency(self):
+        graph = DependencyGraph({"NAME": "UPPER(NAME)"})
+        assert graph.dependencies == {"NAME": []}
+
+    def test_excluded_names(self):
+        graph = DependencyGraph({"A": "B", "B": "1"}, exclude={"B"})
+        assert graph.dependencies["A"] == []
+
+    def test_cycle(self):
+        with pytest.raises(CircularReferenceError, match="A -> B -> C -> A") as info:
+            DependencyGraph({"X": "A", "A": "B + 1", "B": "C", "C": "{A}!"})
+        assert info.value.cycle == ["A", "B", "C", "A"]
+
+    def test_cycle_is_value_error(self):
+        with pytest.raises(ValueError, match="Circular reference"):
+            DependencyGraph({"A": "B", "B": "A"})
+
+
+class TestLazySelection:
+
+    CONFIG = """\
+BASE: SQL('SELECT 1')
+NET: BASE * 2
+UNUSED: SQL('SELECT 2')
+ALSO_UNUSED: UNUSED + 1
+NUM: 7
+COUNTER: 0
+OUTPUT_NAME: "Invoice-{NUM}"
+ON_END: COUNTER + 1
+"""
+
+    def test_used_keys(self):
+        config = Config.from_string(self.CONFIG)
+        assert used_keys(config, {"NET", "NOT_A_KEY"}) == {"NET", "NUM", "COUNTER"}
+
+    def test_subgraph(self):
+        config = Config.from_string(self.CONFIG)
+        graph = DependencyGraph(config.placeholders).subgraph({"NET", "NUM"})
+        assert graph.order == ["BASE", "NET", "NUM"]
+        assert set(graph.dependencies) == {"BASE", "NET", "NUM"}
+
+    def test_closure(self):
+        graph = DependencyGraph({"A": "B + C", "B": "C", "C": "1", "D": "A"})
+        assert graph.closure(["B", "X"]) == {"B", "C"}
+
+    def test_evaluate_subgraph_only(self, counted):
+        calls = counted()
+        placeholders = {"A": "COUNTED(1)", "B": "COUNTED(2)", "C": "A + 1"}
+        graph = DependencyGraph(placeholders).subgraph({"C"})
+        values = Evaluator().evaluate_placeholders(placeholders, graph)
+        assert values == {"A": 1, "C": 2}
+        assert calls == [1]
+
+
+class TestEvaluatePlaceholders:
+
+    def test_reference(self):
+        config = Config.from_string("TOTAL: PRICE * 2\nPRICE: 50\nLABEL: 'x{TOTAL}'\n")
+        values = Evaluator().evaluate_placeholders(config.placeholders)
+        assert values == {"TOTAL": 100, "PRICE": 50, "LABEL": "x100"}
+
+    def test_template_reference(self):
+        values = Evaluator().evaluate_placeholders(
+            {"LABEL": "Total: {TOTAL}", "TOTAL": "PRICE * 2", "PRICE": 50}
+        )
+        assert values["LABEL"] == "Total: 100"
+
+    def test_each_key_evaluated_once(self, counted):
+        calls = counted()
+        values = Evaluator().evaluate_placeholders(
+            {"A": "COUNTED(2)", "B": "A * 3", "C": "A + B", "D": "{A}-{C}"}
+        )
+        assert values == {"A": 2, "B": 6, "C": 8, "D": "2-8"}
+        assert calls == [2]
+
+    def test_record_field_takes_precedence(self):
+        ev = Evaluator({"PRICE": 10})
+        values = ev.evaluate_placeholders({"PRICE": "PRICE * 100", "TOTAL": "PRICE"})
+        assert values == {"PRICE": 1000, "TOTAL": 10}
+
+    def test_unknown_name_is_its_own_name(self):
+        assert Evaluator().evaluate_placeholders({"A": "year"}) == {"A": "year"}
+
+    def test_values_visible_to_later_expressions(self):
+        ev = Evaluator()
+        ev.evaluate_placeholders({"PRICE": 5})
+        assert ev.evaluate_value("PRICE * 2") == 10
+
+    def test_first_error_raised(self):
+        with pytest.raises(ZeroDivisionError):
+            Evaluator().evaluate_placeholders({"A": "1 / 0", "B": "A + 1"})
+
+    def test_errors_collected(self):
+        errors: dict = {}
+        values = Evaluator().evaluate_placeholders(
+            {"A": "1 / 0", "B": "A + 1", "C": "2"}, errors=errors
+        )
+        assert values == {"C": 2}
+        assert isinstance(errors["A"], ZeroDivisionError)
+        assert str(errors["B"]) == "A could not be evaluated"
+
+    def test_cycle_raised_before_evaluation(self, counted):
+        calls = counted()
+        with pytest.raises(CircularReferenceError):
+            Evaluator().evaluate_placeholders({"A": "COUNTED(B)", "B": "A"})
+        assert calls == []
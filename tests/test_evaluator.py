@@ -11,6 +11,7 @@ import document_placeholder.functions.math  # noqa: F401
 import document_placeholder.functions.string  # noqa: F401
 
 from document_placeholder.evaluator import Evaluator
+from document_placeholder.functions import FunctionRegistry
 
 
 @pytest.fixture()
@@ -178,3 +179,42 @@ class TestResolveOutputName:
             {},
         )
         assert result == "report-DRAFT"
+
+    def test_key_and_expression_fields(self):
+        ev = Evaluator({"N": 1})
+        result = ev.resolve_output_name("{N}-{N + 1}", {"N": "x"})
+        assert result == "x-2"
+
+    def test_value_with_braces_is_evaluated(self, ev: Evaluator):
+        result = ev.resolve_output_name("doc-{A}", {"A": "{1 + 1}"})
+        assert result == "doc-2"
+
+    def test_nested_placeholder(self, ev: Evaluator):
+        result = ev.resolve_output_name("{UPPER('{A}')}", {"A": "x"})
+        assert result == "X"
+
+    def test_expression_evaluated_once(self, ev: Evaluator):
+        calls = []
+        FunctionRegistry.register("COUNTED")(lambda: calls.append(1) or 1)
+        try:
+            ev.resolve_output_name("{COUNTED()}-{A}", {"A": "{B}"})
+        finally:
+            FunctionRegistry._functions.pop("COUNTED", None)
+        assert calls == [1]
+
+
+# ── variables ───────────────────────────────────────────────────────────────
+
+
+class TestVariables:
+
+    def test_identifier_without_variable_is_its_name(self, ev: Evaluator):
+        assert ev.evaluate_expression("year") == "year"
+
+    def test_identifier_resolves_variable(self):
+        ev = Evaluator({"PRICE": 500})
+        assert ev.evaluate_expression("PRICE * 2") == 1000
+
+    def test_variable_in_template(self):
+        ev = Evaluator({"NAME": "ACME"})
+        assert ev.evaluate_value("Client: {UPPER(NAME)}") == "Client: ACME"
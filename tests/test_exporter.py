@@ -0,0 +1,180 @@
+"""Tests for document export (LibreOffice is replaced by a fake ``subprocess.run``)."""
+
+from __future__ import annotations
+
+import subprocess
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from document_placeholder import exporter
+from document_placeholder.exporter import ExportError, export_documents
+
+
+@pytest.fixture(autouse=True)
+def _serial_exports():
+    """Run with one conversion slot unless a test raises the limit."""
+    previous = exporter._max_parallel
+    exporter.set_max_parallel(1)
+    yield
+    exporter.set_max_parallel(previous)
+
+
+@pytest.fixture()
+def fake_soffice(monkeypatch):
+    """Record soffice invocations and "convert" every input except *.bad.docx."""
+    calls: list[list[str]] = []
+
+    def run(cmd, **kwargs):
+        calls.append(cmd)
+        outdir = Path(cmd[cmd.index("--outdir") + 1])
+        for arg in cmd[cmd.index("--outdir") + 2 :]:
+            src = Path(arg)
+            if not src.name.endswith(".bad.docx"):
+                (outdir / f"{src.stem}.pdf").write_bytes(b"%PDF " + src.read_bytes())
+        return subprocess.CompletedProcess(cmd, 0, "", "")
+
+    monkeypatch.setattr(exporter.subprocess, "run", run)
+    return calls
+
+
+def _docx(directory: Path, name: str) -> Path:
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / name
+    path.write_bytes(name.encode())
+    return path
+
+
+class TestExportDocuments:
+
+    def test_single_invocation_for_many_files(self, tmp_path, fake_soffice):
+        inputs = [_docx(tmp_path, f"doc{i}.docx") for i in range(5)]
+        outputs = export_documents(inputs, "pdf")
+        assert len(fake_soffice) == 1
+        assert outputs == [p.with_suffix(".pdf") for p in inputs]
+        assert outputs[3].read_bytes() == b"%PDF doc3.docx"
+
+    def test_chunking(self, tmp_path, fake_soffice):
+        inputs = [_docx(tmp_path, f"doc{i}.docx") for i in range(5)]
+        export_documents(inputs, "pdf", chunk_size=2)
+        assert len(fake_soffice) == 3
+
+    def test_outputs_mapped_to_targets(self, tmp_path, fake_soffice):
+        inputs = [_docx(tmp_path, "a.docx"), _docx(tmp_path, "b.docx")]
+        targets = [tmp_path / "out" / "first.pdf", tmp_path / "out" / "second.pdf"]
+        targets[0].parent.mkdir()
+        assert export_documents(inputs, "pdf", targets) == targets
+        assert targets[0].read_bytes() == b"%PDF a.docx"
+        assert targets[1].read_bytes() == b"%PDF b.docx"
+
+    def test_same_name_inputs_split_into_chunks(self, tmp_path, fake_soffice):
+        inputs = [_docx(tmp_path / "x", "a.docx"), _docx(tmp_path / "y", "a.docx")]
+        targets = [tmp_path / "x.pdf", tmp_path / "y.pdf"]
+        export_documents(inputs, "pdf", targets)
+        assert len(fake_soffice) == 2
+        assert targets[0].read_bytes() == b"%PDF a.docx"
+
+    def test_partial_failure(self, tmp_path, fake_soffice):
+        good = _docx(tmp_path, "good.docx")
+        bad = _docx(tmp_path, "x.bad.docx")
+        with pytest.raises(ExportError) as info:
+            export_documents([good, bad], "pdf")
+        assert list(info.value.failures) == [bad.with_suffix(".pdf")]
+        assert good.with_suffix(".pdf").exists()
+
+    def test_docx_copies(self, tmp_path):
+        src = _docx(tmp_path, "a.docx")
+        target = tmp_path / "copy.docx"
+        export_documents([src], "docx", [target])
+        assert target.read_bytes() == b"a.docx"
+
+    def test_backend_used_per_file(self, tmp_path, fake_soffice):
+        converted: list[Path] = []
+
+        class Backend:
+            def convert(self, input_path, output_path):
+                converted.append(output_path)
+                output_path.write_bytes(b"%PDF")
+
+        exporter.set_pdf_backend(Backend())
+        try:
+            export_documents([_docx(tmp_path, "a.docx")], "pdf")
+        finally:
+            exporter.set_pdf_backend(None)
+        assert converted == [tmp_path / "a.pdf"]
+        assert fake_soffice == []
+
+    def test_unsupported_format(self, tmp_path):
+        with pytest.raises(ValueError, match="Unsupported"):
+            export_documents([_docx(tmp_path, "a.docx")], "odt")
+
+    def test_length_mismatch(self, tmp_path):
+        with pytest.raises(ValueError):
+            export_documents([_docx(tmp_path, "a.docx")], "pdf", [])
+
+
+class TestExportDocument:
+
+    def test_pdf(self, tmp_path, fake_soffice):
+        src = _docx(tmp_path, "a.docx")
+        exporter.export_document(src, tmp_path / "named.pdf")
+        assert (tmp_path / "named.pdf").read_bytes() == b"%PDF a.docx"
+
+    def test_pdf_failure(self, tmp_path, fake_soffice):
+        src = _docx(tmp_path, "x.bad.docx")
+        with pytest.raises(RuntimeError, match="LibreOffice conversion failed"):
+            exporter.export_document(src, tmp_path / "out.pdf")
+
+
+class TestParallelExports:
+
+    def test_each_run_gets_a_profile(self, tmp_path, fake_soffice):
+        export_documents([_docx(tmp_path, "a.docx")], "pdf")
+        profiles = [
+            a for a in fake_soffice[0] if a.startswith("-env:UserInstallation=")
+        ]
+        assert len(profiles) == 1
+        assert profiles[0].startswith("-env:UserInstallation=file://")
+
+    def test_profiles_are_reused(self, tmp_path, fake_soffice):
+        export_documents([_docx(tmp_path, "a.docx")], "pdf")
+        export_documents([_docx(tmp_path, "b.docx")], "pdf")
+        assert fake_soffice[0][1] == fake_soffice[1][1]
+
+    def test_runs_in_parallel_up_to_limit(self, tmp_path, monkeypatch):
+        lock = threading.Lock()
+        active = {"now": 0, "max": 0}
+        profiles: set[str] = set()
+
+        def run(cmd, **kwargs):
+            with lock:
+                active["now"] += 1
+                active["max"] = max(active["max"], active["now"])
+                profiles.add(cmd[1])
+            time.sleep(0.05)
+            outdir = Path(cmd[cmd.index("--outdir") + 1])
+            for arg in cmd[cmd.index("--outdir") + 2 :]:
+                (outdir / f"{Path(arg).stem}.pdf").write_bytes(b"%PDF")
+            with lock:
+                active["now"] -= 1
+            return subprocess.CompletedProcess(cmd, 0, "", "")
+
+        monkeypatch.setattr(exporter.subprocess, "run", run)
+        exporter.set_max_parallel(3)
+        inputs = [_docx(tmp_path, f"doc{i}.docx") for i in range(9)]
+        outputs = export_documents(inputs, "pdf")
+        assert all(p.exists() for p in outputs)
+        assert active["max"] == 3
+        assert len(profiles) == 3
+
+    def test_small_batch_spread_over_slots(self, tmp_path, fake_soffice):
+        exporter.set_max_parallel(2)
+        inputs = [_docx(tmp_path, f"doc{i}.docx") for i in range(4)]
+        export_documents(inputs, "pdf")
+        assert sorted(len(c) - c.index("--outdir") - 2 for c in fake_soffice) == [2, 2]
+
+    def test_invalid_limit(self):
+        with pytest.raises(ValueError):
+            exporter.set_max_parallel(0)
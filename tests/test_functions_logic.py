@@ -8,11 +8,34 @@ import pytest
 
 import document_placeholder.functions.logic  # noqa: F401 — register functions
 
+from document_placeholder.evaluator import Evaluator
 from document_placeholder.functions import FunctionRegistry
+from document_placeholder.parse_cache import ParseCache
+from document_placeholder.parser import Parser, Tokenizer
 
 call = FunctionRegistry.call
 
 
+@pytest.fixture()
+def boom():
+    """BOOM() counts its calls and raises; TICK(x) counts and returns x."""
+    calls: list[str] = []
+
+    def boom():
+        calls.append("BOOM")
+        raise AssertionError("argument should not be evaluated")
+
+    def tick(x):
+        calls.append(x)
+        return x
+
+    FunctionRegistry.register("BOOM")(boom)
+    FunctionRegistry.register("TICK")(tick)
+    yield calls
+    FunctionRegistry._functions.pop("BOOM", None)
+    FunctionRegistry._functions.pop("TICK", None)
+
+
 class TestIf:
     def test_true_branch(self):
         assert call("IF", [True, "yes", "no"]) == "yes"
@@ -153,6 +176,9 @@ class TestSwitch:
         result = call("SWITCH", ["c", "a", "Alpha", "b", "Beta", "Default"])
         assert result == "Default"
 
+    def test_none_result_is_not_a_default(self):
+        assert call("SWITCH", ["b", "a", None, "b", "Beta"]) == "Beta"
+
 
 class TestEnv:
     def test_existing_var(self):
@@ -167,3 +193,45 @@ class TestEnv:
 
     def test_custom_fallback(self):
         assert call("ENV", ["_DP_NONEXISTENT_VAR_12345", "fallback"]) == "fallback"
+
+
+class TestShortCircuit:
+    """Only the arguments that decide the result are evaluated."""
+
+    @pytest.mark.parametrize(
+        "text, expected",
+        [
+            ("IF(FLAG, 'yes', BOOM())", "yes"),
+            ("IF(NOT(FLAG), BOOM(), 'no')", "no"),
+            ("COALESCE(NONE_VAR, 'x', BOOM())", "x"),
+            ("DEFAULT('set', BOOM())", "set"),
+            ("AND(NOT(FLAG), BOOM())", False),
+            ("OR(FLAG, BOOM())", True),
+            ("CHOOSE(1, BOOM(), 'b', BOOM())", "b"),
+            ("SWITCH('b', 'a', BOOM(), 'b', 'B', BOOM())", "B"),
+        ],
+    )
+    def test_unselected_not_evaluated(self, boom, text, expected):
+        variables = {"FLAG": True, "NONE_VAR": None}
+        compiled = Evaluator(variables, parse_cache=ParseCache())
+        assert compiled.evaluate_expression(text) == expected
+        interpreted = Evaluator(variables).evaluate(
+            Parser(Tokenizer(text).tokens).parse()
+        )
+        assert interpreted == expected
+        assert boom == []
+
+    def test_evaluated_in_order_until_decided(self, boom):
+        ev = Evaluator(parse_cache=ParseCache())
+        assert ev.evaluate_expression("OR(TICK(0), TICK(''), TICK(3), TICK(4))")
+        assert boom == [0, "", 3]
+
+    def test_switch_cases_evaluated_until_match(self, boom):
+        ev = Evaluator(parse_cache=ParseCache())
+        text = "SWITCH(2, TICK(1), 'one', TICK(2), 'two', TICK(3), 'three')"
+        assert ev.evaluate_expression(text) == "two"
+        assert boom == [1, 2]
+
+    def test_is_lazy(self):
+        assert FunctionRegistry.is_lazy("IF")
+        assert not FunctionRegistry.is_lazy("NOT")
@@ -0,0 +1,345 @@
+"""Tests for the memory + disk image cache."""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import urllib.error
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from document_placeholder.image_cache import ImageCache, _HttpPool
+
+
+class Converter:
+    """Fake rasteriser that counts its calls."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def __call__(self, data: bytes, source: str) -> bytes:
+        self.calls += 1
+        return b"PNG:" + data
+
+
+@pytest.fixture()
+def convert() -> Converter:
+    return Converter()
+
+
+@pytest.fixture()
+def svg_file(tmp_path):
+    path = tmp_path / "logo.svg"
+    path.write_bytes(b"<svg/>")
+    return path
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    body = b"image-v1"
+    etag = '"v1"'
+    requests: list[dict] = []
+    clients: list = []
+    targets: list[str] = []
+
+    def do_GET(self):
+        _Handler.requests.append(dict(self.headers))
+        _Handler.clients.append(self.client_address)
+        _Handler.targets.append(self.path)
+        path = urllib.parse.urlsplit(self.path).path  # absolute when proxied
+        if path in ("/old.png", "/lower.png"):
+            self.send_response(301)
+            self.send_header(
+                "Location" if path == "/old.png" else "location", "/logo.png"
+            )
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if path != "/logo.png":
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.headers.get("If-None-Match") == _Handler.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", _Handler.etag)
+        self.send_header("Content-Length", str(len(_Handler.body)))
+        self.end_headers()
+        self.wfile.write(_Handler.body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def server():
+    _Handler.body = b"image-v1"
+    _Handler.etag = '"v1"'
+    _Handler.requests = []
+    _Handler.clients = []
+    _Handler.targets = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(
+        target=httpd.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+    )
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}/logo.png"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+class TestLocalFiles:
+
+    def test_converted_once(self, tmp_path, svg_file, convert):
+        cache = ImageCache(tmp_path / "cache")
+        assert cache.load(str(svg_file), convert) == b"PNG:<svg/>"
+        assert cache.load(str(svg_file), convert) == b"PNG:<svg/>"
+        assert convert.calls == 1
+        assert cache.info().memory_hits == 1
+
+    def test_disk_survives_new_instance(self, tmp_path, svg_file, convert):
+        ImageCache(tmp_path / "cache").load(str(svg_file), convert)
+        cache = ImageCache(tmp_path / "cache")
+        assert cache.load(str(svg_file), convert) == b"PNG:<svg/>"
+        assert convert.calls == 1
+        assert cache.info().disk_hits == 1
+
+    def test_params_cached_separately(self, tmp_path, svg_file, convert):
+        cache = ImageCache(tmp_path / "cache")
+        cache.load(str(svg_file), convert, params="5x5")
+        cache.load(str(svg_file), convert, params="10x10")
+        assert convert.calls == 2
+
+    def test_modified_file_reloaded(self, tmp_path, svg_file, convert):
+        cache = ImageCache(tmp_path / "cache")
+        cache.load(str(svg_file), convert)
+        svg_file.write_bytes(b"<svg version='2'/>")
+        assert cache.load(str(svg_file), convert) == b"PNG:<svg version='2'/>"
+
+    def test_unconverted_files_not_copied_to_disk(self, tmp_path):
+        path = tmp_path / "pixel.png"
+        path.write_bytes(b"png")
+        cache = ImageCache(tmp_path / "cache")
+        assert cache.load(str(path), lambda data, source: data) == b"png"
+        assert cache.info().disk_bytes == 0
+
+    def test_missing_file(self, tmp_path, convert):
+        with pytest.raises(FileNotFoundError):
+            ImageCache(tmp_path / "cache").load(str(tmp_path / "nope.svg"), convert)
+
+    def test_memory_only(self, svg_file, convert):
+        cache = ImageCache(None)
+        cache.load(str(svg_file), convert)
+        cache.load(str(svg_file), convert)
+        assert convert.calls == 1
+
+
+class TestEviction:
+
+    def test_disk_lru(self, tmp_path, convert):
+        cache = ImageCache(tmp_path / "cache", max_bytes=30)
+        files = []
+        for i in range(3):
+            path = tmp_path / f"{i}.svg"
+            path.write_bytes(str(i).encode() * 10)  # 14 bytes once converted
+            files.append(path)
+        cache.load(str(files[0]), convert)
+        cache.load(str(files[1]), convert)
+        # Make the entry of file 0 the least recently used one.
+        (entry,) = [
+            p
+            for p in (tmp_path / "cache").glob("*/*.bin")
+            if p.read_bytes() == b"PNG:" + b"0" * 10
+        ]
+        os.utime(entry, (0, 0))
+        cache.load(str(files[2]), convert)
+        assert cache.info().disk_bytes <= 30
+        assert len(list((tmp_path / "cache").glob("*/*.bin"))) == 2
+        assert not entry.exists()
+        assert not entry.with_suffix(".json").exists()
+
+    def test_memory_limit(self, tmp_path, convert):
+        cache = ImageCache(None, memory_bytes=20)
+        for i in range(3):
+            path = tmp_path / f"{i}.svg"
+            path.write_bytes(b"x" * 10)
+            cache.load(str(path), convert)
+        assert cache.info().memory_bytes <= 20
+
+
+class TestUrls:
+
+    def test_fetched_once_within_revalidation_window(self, tmp_path, server, convert):
+        cache = ImageCache(tmp_path / "cache")
+        assert cache.load(server, convert) == b"PNG:image-v1"
+        assert cache.load(server, convert) == b"PNG:image-v1"
+        assert len(_Handler.requests) == 1
+
+    def test_revalidated_with_etag(self, tmp_path, server, convert):
+        cache = ImageCache(tmp_path / "cache", revalidate_after=0)
+        cache.load(server, convert)
+        assert cache.load(server, convert) == b"PNG:image-v1"
+        assert _Handler.requests[-1]["If-None-Match"] == '"v1"'
+        assert convert.calls == 1
+        assert cache.info().revalidated == 1
+
+    def test_changed_resource_refetched(self, tmp_path, server, convert):
+        cache = ImageCache(tmp_path / "cache", revalidate_after=0)
+        cache.load(server, convert)
+        _Handler.body, _Handler.etag = b"image-v2", '"v2"'
+        assert cache.load(server, convert) == b"PNG:image-v2"
+
+    def test_revalidation_across_instances(self, tmp_path, server, convert):
+        ImageCache(tmp_path / "cache").load(server, convert)
+        cache = ImageCache(tmp_path / "cache", revalidate_after=0)
+        assert cache.load(server, convert) == b"PNG:image-v1"
+        assert convert.calls == 1
+        assert "If-None-Match" in _Handler.requests[-1]
+
+    def test_stale_copy_served_when_offline(self, tmp_path, server, convert):
+        cache = ImageCache(tmp_path / "cache", revalidate_after=0)
+        cache.load(server, convert)
+        cache._fetch = _offline
+        assert cache.load(server, convert) == b"PNG:image-v1"
+
+    def test_validators_read_in_any_case(self, tmp_path, convert):
+        requests = []
+
+        def fetch(url, headers):
+            requests.append(headers)
+            if "If-None-Match" in headers:
+                return 304, b"", {}
+            return 200, b"image", {"etag": '"v1"', "last-modified": "Mon, 1 Jan"}
+
+        cache = ImageCache(tmp_path / "cache", revalidate_after=0)
+        cache._fetch = fetch
+        cache.load("http://example.com/logo.png", convert)
+        assert cache.load("http://example.com/logo.png", convert) == b"PNG:image"
+        assert requests[-1]["If-None-Match"] == '"v1"'
+        assert requests[-1]["If-Modified-Since"] == "Mon, 1 Jan"
+
+    @pytest.mark.parametrize("code", [500, 503])
+    def test_stale_copy_served_on_server_error(self, tmp_path, server, convert, code):
+        cache = ImageCache(tmp_path / "cache", revalidate_after=0)
+        cache.load(server, convert)
+        cache._fetch = _failing(code)
+        assert cache.load(server, convert) == b"PNG:image-v1"
+
+    @pytest.mark.parametrize("code", [403, 404, 410])
+    def test_client_error_not_hidden(self, tmp_path, server, convert, code):
+        cache = ImageCache(tmp_path / "cache", revalidate_after=0)
+        cache.load(server, convert)
+        cache._fetch = _failing(code)
+        with pytest.raises(urllib.error.HTTPError):
+            cache.load(server, convert)
+
+    def test_not_modified_without_metadata(self, convert):
+        responses = iter([(200, b"image", {}), (304, b"", {})])
+        cache = ImageCache(None, revalidate_after=0)
+        cache._fetch = lambda url, headers: next(responses)
+        cache.load("http://example.com/logo.png", convert)
+        assert cache.load("http://example.com/logo.png", convert) == b"PNG:image"
+        assert cache.info().revalidated == 1
+
+
+class TestUnwritableDirectory:
+
+    @pytest.fixture()
+    def cache(self, tmp_path):
+        blocker = tmp_path / "file"
+        blocker.write_bytes(b"")
+        return ImageCache(blocker / "cache")
+
+    def test_local_file(self, cache, svg_file, convert, caplog):
+        with caplog.at_level(logging.WARNING):
+            assert cache.load(str(svg_file), convert) == b"PNG:<svg/>"
+            assert cache.load(str(svg_file), convert) == b"PNG:<svg/>"
+        assert convert.calls == 1
+        assert "not writable" in caplog.text
+
+    def test_url(self, cache, server, convert, caplog):
+        with caplog.at_level(logging.WARNING):
+            assert cache.load(server, convert) == b"PNG:image-v1"
+            cache.clear_memory()
+            assert cache.load(server, convert) == b"PNG:image-v1"
+        assert len(caplog.records) == 1
+        assert cache.info().disk_bytes == 0
+
+
+class TestHttpPool:
+
+    def test_connection_reused(self, server):
+        pool = _HttpPool()
+        try:
+            for _ in range(3):
+                status, body, _ = pool.get(server, {})
+                assert (status, body) == (200, b"image-v1")
+        finally:
+            pool.close()
+        assert len(set(_Handler.clients)) == 1
+
+    def test_redirect_followed(self, server):
+        pool = _HttpPool()
+        try:
+            status, body, _ = pool.get(server.replace("logo", "old"), {})
+        finally:
+            pool.close()
+        assert (status, body) == (200, b"image-v1")
+
+    def test_lowercase_redirect_followed(self, server):
+        pool = _HttpPool()
+        try:
+            status, body, headers = pool.get(server.replace("logo", "lower"), {})
+        finally:
+            pool.close()
+        assert (status, body) == (200, b"image-v1")
+        assert headers["etag"] == '"v1"'
+
+    def test_proxy_used(self, server, monkeypatch):
+        proxy = server.rsplit("/", 1)[0]
+        monkeypatch.setenv("http_proxy", proxy)
+        monkeypatch.delenv("no_proxy", raising=False)
+        monkeypatch.delenv("NO_PROXY", raising=False)
+        pool = _HttpPool()
+        try:
+            status, body, _ = pool.get("http://images.invalid/logo.png", {})
+        finally:
+            pool.close()
+        assert (status, body) == (200, b"image-v1")
+        assert _Handler.targets == ["http://images.invalid/logo.png"]
+
+    def test_no_proxy_connects_directly(self, server, monkeypatch):
+        monkeypatch.setenv("http_proxy", "http://127.0.0.1:9")
+        monkeypatch.setenv("no_proxy", "127.0.0.1")
+        pool = _HttpPool()
+        try:
+            status, _, _ = pool.get(server, {})
+        finally:
+            pool.close()
+        assert status == 200
+        assert _Handler.targets == ["/logo.png"]
+
+    def test_http_error(self, server):
+        pool = _HttpPool()
+        try:
+            with pytest.raises(urllib.error.HTTPError):
+                pool.get(server.replace("logo", "missing"), {})
+        finally:
+            pool.close()
+
+
+def _offline(url, headers):
+    raise OSError("network unreachable")
+
+
+def _failing(code: int):
+    def fetch(url, headers):
+        raise urllib.error.HTTPError(url, code, f"HTTP {code}", {}, None)
+
+    return fetch
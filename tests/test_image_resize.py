@@ -0,0 +1,147 @@
+"""Tests for downsampling images to their placed size."""
+
+from __future__ import annotations
+
+import zipfile
+from io import BytesIO
+
+import pytest
+from docx import Document
+
+from document_placeholder import image_resize
+from document_placeholder.image_cache import ImageCache, set_image_cache
+from document_placeholder.image_resize import fit_image, set_image_resize
+from document_placeholder.image_value import ImageValue
+from document_placeholder.processor import DocumentProcessor
+
+Image = pytest.importorskip("PIL.Image")
+
+
+@pytest.fixture(autouse=True)
+def _defaults(tmp_path):
+    set_image_resize()
+    set_image_cache(ImageCache(tmp_path / "cache"))
+    yield
+    set_image_resize()
+    set_image_cache(None)
+
+
+def _image(size: tuple[int, int], fmt: str, mode: str = "RGB") -> bytes:
+    img = Image.effect_noise(size, 64).convert(mode)
+    out = BytesIO()
+    img.save(out, fmt, quality=95) if fmt == "JPEG" else img.save(out, fmt)
+    return out.getvalue()
+
+
+def _size(data: bytes) -> tuple[int, int]:
+    return Image.open(BytesIO(data)).size
+
+
+class TestFitImage:
+
+    def test_large_jpeg_downsampled(self):
+        data = _image((1200, 900), "JPEG")
+        result = fit_image(data, 5.0, None)
+        # 5 cm at 150 DPI = 295 px; height follows the aspect ratio.
+        assert _size(result) == (295, 221)
+        assert Image.open(BytesIO(result)).format == "JPEG"
+        assert len(result) < len(data)
+
+    def test_explicit_height(self):
+        result = fit_image(_image((1000, 1000), "JPEG"), 5.0, 2.54)
+        assert _size(result) == (295, 150)
+
+    def test_height_only(self):
+        result = fit_image(_image((1000, 2000), "JPEG"), None, 5.0)
+        assert _size(result) == (148, 295)
+
+    def test_png_keeps_format_and_alpha(self):
+        result = fit_image(_image((600, 600), "PNG", "RGBA"), 2.54, None)
+        img = Image.open(BytesIO(result))
+        assert (img.format, img.mode, img.size) == ("PNG", "RGBA", (150, 150))
+
+    def test_small_image_unchanged(self):
+        data = _image((100, 100), "PNG")
+        assert fit_image(data, 5.0, None) is data
+
+    def test_dpi_setting(self):
+        set_image_resize(dpi=300)
+        assert _size(fit_image(_image((1000, 500), "JPEG"), 2.54, None)) == (300, 150)
+
+    def test_quality_setting(self):
+        data = _image((1000, 1000), "JPEG")
+        set_image_resize(quality=90)
+        high = fit_image(data, 5.0, None)
+        set_image_resize(quality=20)
+        low = fit_image(data, 5.0, None)
+        assert len(low) < len(high)
+
+    def test_disabled(self):
+        set_image_resize(dpi=None)
+        data = _image((1200, 900), "JPEG")
+        assert fit_image(data, 5.0, None) is data
+        assert image_resize.resize_params(5.0, None) == ""
+
+    @pytest.mark.parametrize("mode", ["CMYK", "F"])
+    def test_modes_png_cannot_hold(self, mode):
+        data = _image((600, 600), "TIFF", mode)
+        result = fit_image(data, 2.54, None)
+        img = Image.open(BytesIO(result))
+        assert (img.format, img.mode, img.size) == ("PNG", "RGB", (150, 150))
+
+    def test_not_an_image(self):
+        assert fit_image(b"not an image", 5.0, None) == b"not an image"
+
+    @pytest.mark.parametrize("dpi, quality", [(0, 85), (150, 0), (150, 96)])
+    def test_invalid_settings(self, dpi, quality):
+        with pytest.raises(ValueError):
+            set_image_resize(dpi, quality)
+
+
+class TestInsertion:
+
+    @pytest.fixture()
+    def photo(self, tmp_path) -> str:
+        path = tmp_path / "photo.jpg"
+        path.write_bytes(_image((1200, 900), "JPEG"))
+        return str(path)
+
+    @pytest.fixture()
+    def template(self, tmp_path) -> str:
+        doc = Document()
+        doc.add_paragraph("{PHOTO}")
+        path = tmp_path / "template.docx"
+        doc.save(str(path))
+        return str(path)
+
+    @staticmethod
+    def _media_sizes(path) -> list[tuple[int, int]]:
+        with zipfile.ZipFile(path) as zf:
+            return [
+                _size(zf.read(n)) for n in zf.namelist() if n.startswith("word/media/")
+            ]
+
+    def test_inserted_image_is_downsampled(self, template, photo, tmp_path):
+        proc = DocumentProcessor(template)
+        proc.replace_placeholders({"PHOTO": ImageValue(photo, 5.0)})
+        proc.save(tmp_path / "out.docx")
+        assert self._media_sizes(tmp_path / "out.docx") == [(295, 221)]
+        assert round(proc.doc.inline_shapes[0].width.cm, 2) == 5.0
+
+    def test_cmyk_tiff_inserted(self, template, tmp_path):
+        path = tmp_path / "print.tif"
+        path.write_bytes(_image((1200, 900), "TIFF", "CMYK"))
+        proc = DocumentProcessor(template)
+        proc.replace_placeholders({"PHOTO": ImageValue(str(path), 5.0)})
+        proc.save(tmp_path / "out.docx")
+        assert self._media_sizes(tmp_path / "out.docx") == [(295, 221)]
+
+    def test_resized_versions_cached_per_size(self, template, photo):
+        cache = ImageCache(None)
+        set_image_cache(cache)
+        for width in (5.0, 5.0, 2.0):
+            DocumentProcessor(template).replace_placeholders(
+                {"PHOTO": ImageValue(photo, width)}
+            )
+        assert cache.info().misses == 2
+        assert cache.info().memory_hits == 1
@@ -0,0 +1,64 @@
+"""Tests for the LRU storage shared by the caches."""
+
+from __future__ import annotations
+
+from document_placeholder.lru import MISSING, CacheInfo, LRUCache
+
+
+class Recorder(LRUCache):
+    """Exposes the protected helpers and records evicted keys."""
+
+    def __init__(self, maxsize: int) -> None:
+        super().__init__(maxsize)
+        self.evicted: list = []
+
+    def get(self, key):
+        with self._lock:
+            return self._get(key)
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self._put(key, value)
+
+    def _evicted(self, key) -> None:
+        self.evicted.append(key)
+
+
+class TestLRUCache:
+
+    def test_least_recently_used_evicted(self):
+        cache = Recorder(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        assert cache.get("a") == 1
+        cache.put("c", 3)
+        assert cache.evicted == ["b"]
+        assert cache.get("b") is MISSING
+        assert cache.info() == CacheInfo(1, 0, 1, 2, 2)
+
+    def test_none_is_a_value(self):
+        cache = Recorder(2)
+        cache.put("a", None)
+        assert cache.get("a") is None
+        assert cache.hits == 1
+
+    def test_shrinking_evicts(self):
+        cache = Recorder(3)
+        for key in "abc":
+            cache.put(key, key)
+        cache.maxsize = 1
+        assert cache.evicted == ["a", "b"]
+        assert cache.info().size == 1
+
+    def test_zero_maxsize_stores_nothing(self):
+        cache = Recorder(0)
+        cache.put("a", 1)
+        assert cache.get("a") is MISSING
+        assert cache.info().evictions == 0
+
+    def test_clear_resets_counters(self):
+        cache = Recorder(2)
+        cache.put("a", 1)
+        cache.get("a")
+        cache.clear()
+        assert cache.info() == CacheInfo(0, 0, 0, 0, 2)
@@ -0,0 +1,160 @@
+"""Tests for the warm LibreOffice pool (with a stub converter instead of soffice)."""
+
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from document_placeholder import exporter
+from document_placeholder.office_pool import OfficePool
+
+
+class StubInstance:
+    """Pretends to be soffice: "converts" by copying bytes with a PDF header."""
+
+    started: list[StubInstance] = []
+
+    def __init__(self) -> None:
+        self.alive = False
+        self.conversions = 0
+        self.crash_next = False
+        self.busy = threading.Lock()
+
+    def start(self) -> None:
+        self.alive = True
+        StubInstance.started.append(self)
+
+    def is_alive(self) -> bool:
+        return self.alive
+
+    def convert(self, input_path: Path, output_path: Path) -> None:
+        if not self.busy.acquire(blocking=False):
+            raise AssertionError("instance used by two conversions at once")
+        try:
+            if self.crash_next:
+                self.alive = False
+                raise RuntimeError("soffice crashed")
+            if not input_path.exists():
+                raise FileNotFoundError(input_path)
+            output_path.write_bytes(b"%PDF-stub\n" + input_path.read_bytes())
+            self.conversions += 1
+        finally:
+            self.busy.release()
+
+    def stop(self) -> None:
+        self.alive = False
+
+
+@pytest.fixture(autouse=True)
+def _reset_stub():
+    StubInstance.started = []
+    yield
+
+
+@pytest.fixture()
+def docx_file(tmp_path) -> Path:
+    path = tmp_path / "in.docx"
+    path.write_bytes(b"docx-bytes")
+    return path
+
+
+class TestPoolLifecycle:
+
+    def test_start_creates_size_instances(self):
+        with OfficePool(3, factory=StubInstance):
+            assert len(StubInstance.started) == 3
+            assert all(i.alive for i in StubInstance.started)
+        assert not any(i.alive for i in StubInstance.started)
+
+    def test_lazy_start_on_convert(self, docx_file, tmp_path):
+        pool = OfficePool(1, factory=StubInstance)
+        assert StubInstance.started == []
+        pool.convert(docx_file, tmp_path / "out.pdf")
+        assert len(StubInstance.started) == 1
+        pool.close()
+
+    def test_invalid_size(self):
+        with pytest.raises(ValueError):
+            OfficePool(0, factory=StubInstance)
+
+
+class TestConversion:
+
+    def test_convert(self, docx_file, tmp_path):
+        with OfficePool(1, factory=StubInstance) as pool:
+            pool.convert(docx_file, tmp_path / "out.pdf")
+        assert (tmp_path / "out.pdf").read_bytes() == b"%PDF-stub\ndocx-bytes"
+
+    def test_instances_are_reused(self, docx_file, tmp_path):
+        with OfficePool(1, factory=StubInstance) as pool:
+            for i in range(5):
+                pool.convert(docx_file, tmp_path / f"{i}.pdf")
+        assert len(StubInstance.started) == 1
+        assert StubInstance.started[0].conversions == 5
+
+    def test_concurrent_conversions(self, docx_file, tmp_path):
+        with OfficePool(2, factory=StubInstance) as pool:
+            with ThreadPoolExecutor(max_workers=6) as threads:
+                list(
+                    threads.map(
+                        lambda i: pool.convert(docx_file, tmp_path / f"{i}.pdf"),
+                        range(20),
+                    )
+                )
+        assert sum(i.conversions for i in StubInstance.started) == 20
+
+    def test_document_error_propagates_without_restart(self, tmp_path):
+        with OfficePool(1, factory=StubInstance) as pool:
+            with pytest.raises(FileNotFoundError):
+                pool.convert(tmp_path / "missing.docx", tmp_path / "out.pdf")
+            assert pool.restarts == 0
+
+
+class TestHealth:
+
+    def test_crash_during_conversion_restarts_and_retries(self, docx_file, tmp_path):
+        with OfficePool(1, factory=StubInstance) as pool:
+            StubInstance.started[0].crash_next = True
+            pool.convert(docx_file, tmp_path / "out.pdf")
+            assert pool.restarts == 1
+        assert (tmp_path / "out.pdf").exists()
+        assert len(StubInstance.started) == 2
+
+    def test_dead_instance_restarted_on_acquire(self, docx_file, tmp_path):
+        with OfficePool(1, factory=StubInstance) as pool:
+            StubInstance.started[0].alive = False
+            pool.convert(docx_file, tmp_path / "out.pdf")
+            assert pool.restarts == 1
+
+    def test_check_health(self):
+        with OfficePool(3, factory=StubInstance) as pool:
+            StubInstance.started[1].alive = False
+            assert pool.check_health() == 1
+            assert pool.check_health() == 0
+            assert pool.restarts == 1
+
+
+class TestExporterBackend:
+
+    def test_pdf_routed_through_backend(self, docx_file, tmp_path):
+        pool = OfficePool(1, factory=StubInstance)
+        exporter.set_pdf_backend(pool)
+        try:
+            exporter.export_document(docx_file, tmp_path / "out.pdf")
+        finally:
+            exporter.set_pdf_backend(None)
+            pool.close()
+        assert (tmp_path / "out.pdf").read_bytes().startswith(b"%PDF-stub")
+
+    def test_docx_copy_bypasses_backend(self, docx_file, tmp_path):
+        pool = OfficePool(1, factory=StubInstance)
+        exporter.set_pdf_backend(pool)
+        try:
+            exporter.export_document(docx_file, tmp_path / "copy.docx")
+        finally:
+            exporter.set_pdf_backend(None)
+        assert StubInstance.started == []
+        assert (tmp_path / "copy.docx").read_bytes() == b"docx-bytes"
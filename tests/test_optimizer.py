@@ -0,0 +1,165 @@
+"""Tests for constant folding of expression ASTs."""
+
+from __future__ import annotations
+
+from datetime import timedelta
+
+import pytest
+
+import document_placeholder.functions.date  # noqa: F401
+import document_placeholder.functions.logic  # noqa: F401
+import document_placeholder.functions.math  # noqa: F401
+import document_placeholder.functions.string  # noqa: F401
+from document_placeholder.evaluator import Evaluator
+from document_placeholder.functions import FunctionRegistry
+from document_placeholder.optimizer import fold_constants
+from document_placeholder.parse_cache import ParseCache
+from document_placeholder.parser import (
+    BinaryOp,
+    Constant,
+    FunctionCall,
+    Identifier,
+    NumberLiteral,
+    Parser,
+    StringLiteral,
+    Tokenizer,
+)
+
+
+def _fold(text: str):
+    return fold_constants(Parser(Tokenizer(text).tokens).parse())
+
+
+class TestLiteralFolding:
+
+    def test_arithmetic(self):
+        assert _fold("500 * 1.2") == Constant(600.0)
+
+    def test_nested(self):
+        assert _fold("(2 + 3) * 4 - -1") == Constant(21)
+
+    def test_comparison(self):
+        assert _fold("2 > 1") == Constant(True)
+
+    def test_partial(self):
+        node = _fold("PRICE * (1 + 0.2)")
+        assert node == BinaryOp("*", Identifier("PRICE"), Constant(1.2))
+
+    def test_identifiers_not_folded(self):
+        assert _fold("A + 1") == BinaryOp("+", Identifier("A"), _fold("1"))
+
+    def test_error_left_for_run_time(self):
+        assert isinstance(_fold("1 / 0"), BinaryOp)
+        with pytest.raises(ZeroDivisionError):
+            Evaluator().evaluate_expression("1 / 0")
+
+
+class TestPureFunctionFolding:
+
+    def test_pure_call(self):
+        assert _fold("UPPER('acme')") == Constant("ACME")
+
+    def test_pure_call_in_arithmetic(self):
+        assert _fold("ROUND(10 / 3, 2) * 3") == Constant(9.99)
+
+    def test_date_functions(self):
+        assert _fold("DAYS(7)") == Constant(timedelta(days=7))
+
+    @pytest.mark.parametrize("text", ["TODAY()", "RANDOM_INT(1, 6)", "ENV('HOME')"])
+    def test_impure_not_folded(self, text):
+        assert isinstance(_fold(text), FunctionCall)
+
+    def test_non_constant_argument(self):
+        node = _fold("UPPER(NAME)")
+        assert node == FunctionCall("UPPER", [Identifier("NAME")])
+
+    def test_constant_arguments_of_impure_call_folded(self):
+        assert _fold("SQL(1 + 1)") == FunctionCall("SQL", [Constant(2)])
+
+    def test_mutable_result_not_folded(self, temp_function):
+        temp_function("PAIR", lambda a, b: [a, b], pure=True)
+        assert isinstance(_fold("PAIR(1, 2)"), FunctionCall)
+
+    def test_lazy_call_with_constant_branch(self):
+        assert _fold("IF(1 > 0, 'a', NAME)") == Constant("a")
+        assert _fold("COALESCE('x', SQL('SELECT 1'))") == Constant("x")
+
+    def test_lazy_call_reading_non_constant(self):
+        assert isinstance(_fold("IF(NAME, 1, 2)"), FunctionCall)
+        assert isinstance(_fold("IF(0, 'a', NAME)"), FunctionCall)
+
+    def test_branches_not_read_left_unfolded(self, temp_function):
+        calls = []
+        temp_function("BIG", lambda n: calls.append(n) or "x" * n, pure=True)
+        node = _fold("IF(FLAG, BIG(3), UPPER('b'))")
+        assert calls == []
+        assert node.args[1] == FunctionCall("BIG", [NumberLiteral(3)])
+        assert node.args[2] == FunctionCall("UPPER", [StringLiteral("b")])
+
+    def test_arguments_read_are_folded(self):
+        node = _fold("IF(1 + 1 > NAME, UPPER('a'), 'b')")
+        assert node.args[0] == BinaryOp(">", Constant(2), Identifier("NAME"))
+        assert isinstance(node.args[1], FunctionCall)
+        assert _fold("IF(1 > 0, UPPER('a'), BIG(3))") == Constant("A")
+
+    def test_lazy_function_catching_errors_not_folded(self, temp_function):
+        def safe(arg, fallback):
+            try:
+                return arg()
+            except Exception:
+                return fallback()
+
+        temp_function("SAFE", safe, pure=True, lazy=True)
+        assert isinstance(_fold("SAFE(NAME, 'x')"), FunctionCall)
+
+    def test_unregistered_is_not_pure(self):
+        assert isinstance(_fold("NOT_REGISTERED(1)"), FunctionCall)
+
+    def test_reregistering_as_impure(self, temp_function):
+        temp_function("FLIP", lambda: 1, pure=True)
+        temp_function("FLIP", lambda: 2)
+        assert not FunctionRegistry.is_pure("FLIP")
+
+
+class TestKeywords:
+
+    def test_keyword_becomes_constant(self):
+        assert _fold("CURRENT_DATE_NUM(year)") == FunctionCall(
+            "CURRENT_DATE_NUM", [Constant("year")]
+        )
+
+    def test_other_identifiers_kept(self):
+        assert _fold("CURRENT_DATE_NUM(YEAR)") == FunctionCall(
+            "CURRENT_DATE_NUM", [Identifier("YEAR")]
+        )
+        assert _fold("UPPER(year)") == FunctionCall("UPPER", [Identifier("year")])
+
+    def test_variable_does_not_shadow_keyword(self):
+        evaluator = Evaluator({"year": 2020}, parse_cache=ParseCache())
+        assert evaluator.evaluate_value("CURRENT_DATE_NUM(year)") != 2020
+        assert evaluator.evaluate_value("year") == 2020
+
+
+class TestEvaluatedOncePerConfig:
+
+    def test_pure_call_runs_once_across_records(self, temp_function):
+        calls = []
+
+        def expensive(x):
+            calls.append(x)
+            return x * 2
+
+        temp_function("EXPENSIVE", expensive, pure=True)
+        cache = ParseCache()
+        for record in ({"A": 1}, {"A": 2}, {"A": 3}):
+            ev = Evaluator(record, parse_cache=cache)
+            assert ev.evaluate_value("A + EXPENSIVE(21)") == record["A"] + 42
+        assert calls == [21]
+
+    def test_impure_call_runs_every_time(self, temp_function):
+        calls = []
+        temp_function("TICK", lambda: calls.append(1) or len(calls))
+        cache = ParseCache()
+        for _ in range(3):
+            Evaluator(parse_cache=cache).evaluate_value("TICK()")
+        assert len(calls) == 3
@@ -0,0 +1,154 @@
+"""Tests for the expression parse cache."""
+
+from __future__ import annotations
+
+import pytest
+
+import document_placeholder.functions.math  # noqa: F401
+import document_placeholder.functions.string  # noqa: F401
+from document_placeholder.evaluator import Evaluator
+from document_placeholder.parse_cache import (
+    EXPRESSION,
+    LITERAL,
+    TEMPLATE,
+    ParseCache,
+    get_parse_cache,
+)
+
+
+@pytest.fixture()
+def cache() -> ParseCache:
+    return ParseCache()
+
+
+@pytest.fixture()
+def ev(cache) -> Evaluator:
+    return Evaluator(parse_cache=cache)
+
+
+class TestParseCache:
+
+    def test_repeated_text_parsed_once(self, cache):
+        first = cache.parse("1 + 2")
+        assert cache.parse("1 + 2") is first
+        info = cache.info()
+        assert (info.hits, info.misses, info.size) == (1, 1, 1)
+
+    def test_syntax_error_cached(self, cache):
+        with pytest.raises(SyntaxError) as first:
+            cache.parse("1 +")
+        with pytest.raises(SyntaxError) as second:
+            cache.parse("1 +")
+        assert str(second.value) == str(first.value)
+        assert cache.info().hits == 1
+
+    def test_lru_eviction(self):
+        cache = ParseCache(maxsize=2)
+        cache.parse("1")
+        cache.parse("2")
+        cache.parse("1")  # "2" is now least recently used
+        cache.parse("3")
+        assert cache.info().evictions == 1
+        cache.parse("1")
+        assert cache.info().hits == 2
+        cache.parse("2")
+        assert cache.info().misses == 4
+
+    def test_shrinking_maxsize_evicts(self, cache):
+        for i in range(5):
+            cache.parse(str(i))
+        cache.maxsize = 2
+        assert cache.info().size == 2
+
+    def test_disabled(self):
+        cache = ParseCache(maxsize=0)
+        cache.parse("1")
+        cache.parse("1")
+        assert cache.info().hits == 0
+        assert cache.info().size == 0
+
+    def test_hit_rate(self, cache):
+        assert cache.info().hit_rate == 0.0
+        for _ in range(4):
+            cache.parse("UPPER('a')")
+        assert cache.info().hit_rate == 0.75
+
+    def test_clear(self, cache):
+        cache.parse("1")
+        cache.clear()
+        assert cache.info() == ParseCache().info()
+
+    @pytest.mark.parametrize(
+        "text, kind",
+        [
+            ("1 + 2", EXPRESSION),
+            ("UPPER(NAME)", EXPRESSION),
+            ("Dear {NAME}", TEMPLATE),
+            ("Unclosed {NAME", TEMPLATE),
+            ("Hello, world!", LITERAL),
+            ("", LITERAL),
+        ],
+    )
+    def test_classify(self, cache, text, kind):
+        assert cache.classify(text).kind == kind
+
+    def test_classify_cached(self, cache):
+        raw = cache.classify("Hello, world!")
+        assert cache.classify("Hello, world!") is raw
+        assert raw.compiled({}) == "Hello, world!"
+        assert raw.node is None
+        assert cache.info().misses == 1
+
+    def test_classify_expression(self, cache):
+        raw = cache.classify("A * 2")
+        assert raw.node is not None
+        assert raw.compiled({"A": 4}) == 8
+
+    def test_default_cache_used_by_evaluator(self):
+        assert Evaluator().parse_cache is get_parse_cache()
+
+
+class TestEvaluatorSharing:
+
+    def test_evaluate_value(self, ev, cache):
+        for _ in range(3):
+            assert ev.evaluate_value("2 * 3") == 6
+        assert cache.info().hits == 2
+
+    def test_plain_string_probe_cached(self, ev, cache):
+        for _ in range(3):
+            assert ev.evaluate_value("Hello world") == "Hello world"
+        assert cache.info().misses == 1
+
+    def test_plain_string_not_reparsed(self, ev, cache, monkeypatch):
+        ev.evaluate_value("Hello world")
+
+        def fail(text):
+            raise AssertionError("parsed again")
+
+        monkeypatch.setattr(ParseCache, "_parse", staticmethod(fail))
+        assert ev.evaluate_value("Hello world") == "Hello world"
+
+    def test_invalid_template_field_raises_when_rendered(self, ev, cache):
+        assert cache.classify("Total {1 +}").kind == TEMPLATE
+        with pytest.raises(SyntaxError):
+            ev.evaluate_value("Total {1 +}")
+
+    def test_template_parts(self, ev, cache):
+        ev.evaluate_value("Total: {1 + 1}")
+        assert ev.evaluate_value("Total: {1 + 1}") == "Total: 2"
+        # The classification, the template, and the inner expression.
+        assert cache.info().misses == 3
+
+    def test_output_name(self, ev, cache):
+        for _ in range(2):
+            name = ev.resolve_output_name("Invoice-{NUM}-{UPPER('x')}", {"NUM": 7})
+            assert name == "Invoice-7-X"
+        # The template and its two fields are compiled once; the second
+        # call is a single template hit.
+        assert cache.info().misses == 3
+        assert cache.info().hits == 1
+
+    def test_variables_not_cached_in_ast(self, cache):
+        assert Evaluator({"A": 1}, parse_cache=cache).evaluate_value("A + 1") == 2
+        assert Evaluator({"A": 5}, parse_cache=cache).evaluate_value("A + 1") == 6
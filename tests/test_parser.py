@@ -116,6 +116,26 @@ class TestTokenizer:
         with pytest.raises(SyntaxError, match="Unexpected character"):
             Tokenizer("@")
 
+    def test_unexpected_char_position(self):
+        with pytest.raises(SyntaxError, match="'@' at position 4"):
+            Tokenizer("1 + @")
+
+    def test_unterminated_string_position(self):
+        with pytest.raises(SyntaxError, match="starting at position 2"):
+            Tokenizer("a 'b\\'")
+
+    # -- positions ------------------------------------------------------------
+
+    def test_positions(self):
+        tokens = Tokenizer("  FOO(12, 'x')  ").tokens
+        assert [t.pos for t in tokens] == [2, 5, 6, 8, 10, 13, 16]
+
+    def test_trailing_dot_number(self):
+        assert self._values("5.") == [5.0, None]
+
+    def test_non_decimal_digit_is_not_a_number(self):
+        assert self._values("2²") == [2, "²", None]
+
     # -- consumed_all ---------------------------------------------------------
 
     def test_consumed_all_true(self):
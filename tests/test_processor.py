@@ -0,0 +1,337 @@
+"""Tests for the Word document processor."""
+
+from __future__ import annotations
+
+import base64
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from docx import Document
+
+from document_placeholder.image_value import ImageValue
+from document_placeholder.processor import (
+    CompiledTemplate,
+    DocumentProcessor,
+    prefetch_images,
+)
+
+# 1×1 red PNG
+PNG_BYTES = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAIAAACQd1PeAAAADElEQVR4nGP4z8AAAAMBAQDJ/pLvAAAAAElFTkSuQmCC"
+)
+
+
+@pytest.fixture()
+def make_template(tmp_path):
+    """Build a .docx whose body paragraphs consist of the given run texts."""
+
+    def _make(*paragraphs: list[str] | str) -> str:
+        doc = Document()
+        for runs in paragraphs:
+            if isinstance(runs, str):
+                runs = [runs]
+            para = doc.add_paragraph()
+            for text in runs:
+                para.add_run(text)
+        path = tmp_path / "template.docx"
+        doc.save(str(path))
+        return str(path)
+
+    return _make
+
+
+@pytest.fixture()
+def png_file(tmp_path) -> str:
+    path = tmp_path / "pixel.png"
+    path.write_bytes(PNG_BYTES)
+    return str(path)
+
+
+def _texts(processor: DocumentProcessor) -> list[str]:
+    return [p.text for p in processor.doc.paragraphs]
+
+
+def _picture_count(processor: DocumentProcessor) -> int:
+    return len(processor.doc.inline_shapes)
+
+
+class TestTextReplacement:
+
+    def test_single_placeholder(self, make_template):
+        proc = DocumentProcessor(make_template("Hello {NAME}!"))
+        proc.replace_placeholders({"NAME": "World"})
+        assert _texts(proc) == ["Hello World!"]
+
+    def test_multiple_placeholders(self, make_template):
+        proc = DocumentProcessor(make_template("{A} and {B}"))
+        proc.replace_placeholders({"A": 1, "B": 2})
+        assert _texts(proc) == ["1 and 2"]
+
+    def test_placeholder_split_across_runs(self, make_template):
+        proc = DocumentProcessor(make_template(["Total: {PR", "ICE} USD"]))
+        proc.replace_placeholders({"PRICE": 500})
+        assert _texts(proc) == ["Total: 500 USD"]
+
+    def test_unknown_placeholder_kept(self, make_template):
+        proc = DocumentProcessor(make_template("{KNOWN} {UNKNOWN}"))
+        proc.replace_placeholders({"KNOWN": "x"})
+        assert _texts(proc) == ["x {UNKNOWN}"]
+
+    def test_none_becomes_empty(self, make_template):
+        proc = DocumentProcessor(make_template("[{X}]"))
+        proc.replace_placeholders({"X": None})
+        assert _texts(proc) == ["[]"]
+
+    def test_value_is_not_rescanned(self, make_template):
+        proc = DocumentProcessor(make_template("{A}"))
+        proc.replace_placeholders({"A": "{B}", "B": "nope"})
+        assert _texts(proc) == ["{B}"]
+
+    def test_control_chars_sanitized(self, make_template):
+        proc = DocumentProcessor(make_template("{X}"))
+        proc.replace_placeholders({"X": "a\x00b"})
+        assert _texts(proc) == ["a b"]
+
+    def test_paragraph_without_placeholders_untouched(self, make_template):
+        proc = DocumentProcessor(make_template(["plain ", "text"]))
+        proc.replace_placeholders({"X": 1})
+        assert [r.text for r in proc.doc.paragraphs[0].runs] == ["plain ", "text"]
+
+    def test_table_cells(self, tmp_path):
+        doc = Document()
+        doc.add_table(rows=1, cols=1).cell(0, 0).text = "cell {V}"
+        path = tmp_path / "table.docx"
+        doc.save(str(path))
+        proc = DocumentProcessor(path)
+        proc.replace_placeholders({"V": 7})
+        assert proc.doc.tables[0].cell(0, 0).text == "cell 7"
+
+    def test_header_and_footer(self, tmp_path):
+        doc = Document()
+        doc.sections[0].header.paragraphs[0].text = "head {H}"
+        doc.sections[0].footer.paragraphs[0].text = "foot {F}"
+        path = tmp_path / "hf.docx"
+        doc.save(str(path))
+        proc = DocumentProcessor(path)
+        proc.replace_placeholders({"H": "1", "F": "2"})
+        section = proc.doc.sections[0]
+        assert section.header.paragraphs[0].text == "head 1"
+        assert section.footer.paragraphs[0].text == "foot 2"
+
+
+class TestKeys:
+
+    def test_keys(self, make_template):
+        proc = DocumentProcessor(make_template("{A} {B}", ["{C", "}"], "none {}"))
+        assert proc.keys == {"A", "B", "C"}
+
+    def test_header_and_table(self, tmp_path):
+        doc = Document()
+        doc.sections[0].header.paragraphs[0].text = "{HEAD}"
+        doc.add_table(rows=1, cols=1).cell(0, 0).text = "{CELL}"
+        path = tmp_path / "t.docx"
+        doc.save(str(path))
+        assert DocumentProcessor(str(path)).keys == {"HEAD", "CELL"}
+
+
+class TestImageReplacement:
+
+    def test_image_inserted(self, make_template, png_file):
+        proc = DocumentProcessor(make_template("Logo: {LOGO}"))
+        proc.replace_placeholders({"LOGO": ImageValue(png_file)})
+        assert _texts(proc) == ["Logo: "]
+        assert _picture_count(proc) == 1
+
+    def test_image_and_text_in_same_paragraph(self, make_template, png_file):
+        proc = DocumentProcessor(make_template("{NAME} {LOGO} {DATE}"))
+        proc.replace_placeholders(
+            {"NAME": "ACME", "LOGO": ImageValue(png_file), "DATE": "01.01.2026"}
+        )
+        assert _texts(proc) == ["ACME  01.01.2026"]
+        assert _picture_count(proc) == 1
+        runs = proc.doc.paragraphs[0].runs
+        assert runs[0].text == "ACME "
+        assert runs[-1].text == " 01.01.2026"
+
+    def test_image_split_across_runs(self, make_template, png_file):
+        proc = DocumentProcessor(make_template(["{LO", "GO}"]))
+        proc.replace_placeholders({"LOGO": ImageValue(png_file)})
+        assert _texts(proc) == [""]
+        assert _picture_count(proc) == 1
+
+    def test_missing_image_dropped(self, make_template, tmp_path):
+        proc = DocumentProcessor(make_template("a{LOGO}b"))
+        proc.replace_placeholders({"LOGO": ImageValue(str(tmp_path / "nope.png"))})
+        assert _texts(proc) == ["ab"]
+        assert _picture_count(proc) == 0
+
+    def test_image_size(self, make_template, png_file):
+        proc = DocumentProcessor(make_template("{LOGO}"))
+        proc.replace_placeholders({"LOGO": ImageValue(png_file, 2.0, 1.0)})
+        shape = proc.doc.inline_shapes[0]
+        assert round(shape.width.cm, 2) == 2.0
+        assert round(shape.height.cm, 2) == 1.0
+
+
+class TestRunSpans:
+
+    def test_untouched_runs_keep_their_text(self, make_template):
+        proc = DocumentProcessor(make_template(["Bold: ", "{X}", " tail"]))
+        proc.replace_placeholders({"X": "value"})
+        runs = proc.doc.paragraphs[0].runs
+        assert [r.text for r in runs] == ["Bold: ", "value", " tail"]
+
+    def test_scan_merges_tokens_sharing_a_run(self):
+        spans = DocumentProcessor._scan_runs(["a {X", "} b {Y}", " c {Z}"])
+        assert [(s.first_run, s.last_run, s.pieces) for s in spans] == [
+            (0, 1, ("a ", "X", " b ", "Y", "")),
+            (2, 2, (" c ", "Z", "")),
+        ]
+
+    def test_scan_filters_by_values(self):
+        spans = DocumentProcessor._scan_runs(["{A} {B}"], {"B": 1})
+        assert [s.pieces for s in spans] == [("{A} ", "B", "")]
+
+
+class TestCompiledTemplate:
+
+    def test_keys(self, make_template):
+        tpl = CompiledTemplate(make_template("{A} {B}", ["{C", "}"], "none"))
+        assert tpl.keys == {"A", "B", "C"}
+        assert len(tpl.locations) == 2
+
+    def test_render(self, make_template):
+        tpl = CompiledTemplate(make_template("Hello {NAME}!", "plain"))
+        doc = tpl.render({"NAME": "World"})
+        assert [p.text for p in doc.paragraphs] == ["Hello World!", "plain"]
+
+    def test_render_many_times(self, make_template):
+        tpl = CompiledTemplate(make_template("#{N}"))
+        first = tpl.render({"N": 1})
+        second = tpl.render({"N": 2})
+        assert first.paragraphs[0].text == "#1"
+        assert second.paragraphs[0].text == "#2"
+
+    def test_unknown_key_kept(self, make_template):
+        tpl = CompiledTemplate(make_template("{A}{B}"))
+        doc = tpl.render({"A": "x"})
+        assert doc.paragraphs[0].text == "x{B}"
+
+    def test_tables_headers_footers(self, tmp_path):
+        doc = Document()
+        doc.add_table(rows=1, cols=1).cell(0, 0).text = "cell {V}"
+        doc.sections[0].header.paragraphs[0].text = "head {H}"
+        doc.sections[0].footer.paragraphs[0].text = "foot {F}"
+        path = tmp_path / "full.docx"
+        doc.save(str(path))
+
+        out = CompiledTemplate(path).render({"V": 1, "H": 2, "F": 3})
+        assert out.tables[0].cell(0, 0).text == "cell 1"
+        assert out.sections[0].header.paragraphs[0].text == "head 2"
+        assert out.sections[0].footer.paragraphs[0].text == "foot 3"
+
+    def test_image(self, make_template, png_file):
+        tpl = CompiledTemplate(make_template("{LOGO}"))
+        doc = tpl.render({"LOGO": ImageValue(png_file)})
+        assert len(doc.inline_shapes) == 1
+
+    def test_concurrent_renders(self, make_template):
+        tpl = CompiledTemplate(make_template("{N}"))
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            docs = list(pool.map(lambda n: tpl.render({"N": n}), range(8)))
+        assert [d.paragraphs[0].text for d in docs] == [str(n) for n in range(8)]
+
+    def test_saved_output(self, make_template, tmp_path):
+        tpl = CompiledTemplate(make_template("{N}"))
+        out = tmp_path / "out.docx"
+        tpl.render({"N": 5}).save(str(out))
+        assert Document(str(out)).paragraphs[0].text == "5"
+
+
+class TestPrefetch:
+
+    def test_distinct_images_loaded_once(self, png_file, tmp_path):
+        other = tmp_path / "other.png"
+        other.write_bytes(PNG_BYTES)
+        images = prefetch_images(
+            {
+                "A": ImageValue(png_file),
+                "B": ImageValue(png_file),
+                "C": ImageValue(png_file, 2.0),
+                "D": ImageValue(str(other)),
+                "E": "text",
+            }
+        )
+        assert images == {
+            (png_file, 5.0, None): PNG_BYTES,
+            (png_file, 2.0, None): PNG_BYTES,
+            (str(other), 5.0, None): PNG_BYTES,
+        }
+
+    def test_failed_source_left_out(self, tmp_path):
+        assert prefetch_images({"A": ImageValue(str(tmp_path / "nope.png"))}) == {}
+
+    def test_insertion_reads_prefetched_bytes(
+        self, make_template, png_file, monkeypatch
+    ):
+        proc = DocumentProcessor(make_template("{A}{B}"))
+        loads = []
+        original = DocumentProcessor._load_picture
+
+        def counting_load(value):
+            loads.append(value.source)
+            return original(value)
+
+        monkeypatch.setattr(DocumentProcessor, "_load_picture", counting_load)
+        proc.replace_placeholders(
+            {"A": ImageValue(png_file), "B": ImageValue(png_file)}
+        )
+        assert loads == [png_file]
+        assert _picture_count(proc) == 2
+
+
+class TestPictureDedup:
+
+    @staticmethod
+    def _media(path) -> list[str]:
+        with zipfile.ZipFile(path) as zf:
+            return [n for n in zf.namelist() if n.startswith("word/media/")]
+
+    def test_identical_images_stored_once(self, tmp_path, png_file):
+        doc = Document()
+        for _ in range(3):
+            doc.add_paragraph("{LOGO}")
+        doc.sections[0].header.paragraphs[0].text = "{LOGO}"
+        template = tmp_path / "logos.docx"
+        doc.save(str(template))
+
+        out = tmp_path / "out.docx"
+        CompiledTemplate(template).render({"LOGO": ImageValue(png_file)}).save(out)
+
+        assert len(self._media(out)) == 1
+        result = Document(str(out))
+        assert len(result.inline_shapes) == 3
+        body_rids = set(result.element.body.xpath(".//a:blip/@r:embed"))
+        assert len(body_rids) == 1
+        header = result.sections[0].header
+        assert len(header._element.xpath(".//a:blip/@r:embed")) == 1
+
+    def test_same_bytes_from_different_sources(self, make_template, tmp_path, png_file):
+        copy_file = tmp_path / "copy.png"
+        copy_file.write_bytes(PNG_BYTES)
+        proc = DocumentProcessor(make_template("{A}", "{B}"))
+        proc.replace_placeholders(
+            {"A": ImageValue(png_file), "B": ImageValue(str(copy_file))}
+        )
+        out = tmp_path / "out.docx"
+        proc.save(out)
+        assert len(self._media(out)) == 1
+        assert _picture_count(proc) == 2
+
+    def test_drawing_ids_unique(self, make_template, png_file):
+        proc = DocumentProcessor(make_template("{A} {A}", "{A}"))
+        proc.replace_placeholders({"A": ImageValue(png_file)})
+        ids = proc.doc.element.body.xpath(".//wp:docPr/@id")
+        assert len(ids) == 3
+        assert len(set(ids)) == 3
@@ -0,0 +1,199 @@
+"""Tests for per-stage, per-key, per-function and SQL timings."""
+
+from __future__ import annotations
+
+import json
+import pickle
+
+import pytest
+
+import document_placeholder.functions.logic  # noqa: F401
+import document_placeholder.functions.math  # noqa: F401
+import document_placeholder.functions.sql as sql_mod
+import document_placeholder.functions.string  # noqa: F401
+from document_placeholder import profiling
+from document_placeholder.batch import run_batch
+from document_placeholder.evaluator import Evaluator
+from document_placeholder.functions import FunctionRegistry
+from document_placeholder.profiling import Profile, Timing, collect, measure
+
+
+class TestProfile:
+
+    def test_timing(self):
+        timing = Timing()
+        timing.add(0.5)
+        timing.add(0.25)
+        other = Timing(count=1, total=1.0, max=1.0)
+        timing.merge(other)
+        assert timing == Timing(count=3, total=1.75, max=1.0)
+
+    def test_wrap_names_by_first_argument(self):
+        profile = Profile()
+        upper = profile.wrap("keys", lambda key: key.upper())
+        assert upper("a") == "A"
+        upper("a")
+        upper("b")
+        assert profile.sections["keys"]["a"].count == 2
+        assert profile.sections["keys"]["b"].count == 1
+
+    def test_wrap_records_failures(self):
+        profile = Profile()
+        fail = profile.wrap("functions", lambda: 1 / 0, "DIV")
+        with pytest.raises(ZeroDivisionError):
+            fail()
+        assert profile.sections["functions"]["DIV"].count == 1
+
+    def test_merge(self):
+        first, second = Profile(), Profile()
+        first.record("stages", "save", 1.0)
+        second.record("stages", "save", 2.0)
+        second.record("sql", "SELECT 1", 0.5)
+        first.merge(second)
+        assert first.sections["stages"]["save"] == Timing(2, 3.0, 2.0)
+        assert first.sections["sql"]["SELECT 1"].count == 1
+        assert second.sections["stages"]["save"].count == 1
+
+    def test_drain(self):
+        profile = Profile()
+        profile.record("keys", "A", 1.0)
+        drained = profile.drain()
+        assert drained.sections["keys"]["A"].count == 1
+        assert profile.sections["keys"] == {}
+
+    def test_json_round_trip(self, tmp_path):
+        profile = Profile()
+        profile.record("functions", "UPPER", 0.001)
+        path = tmp_path / "profile.json"
+        profile.write_json(path)
+        data = json.loads(path.read_text(encoding="utf-8"))
+        assert data["functions"]["UPPER"] == {
+            "count": 1,
+            "total": 0.001,
+            "max": 0.001,
+        }
+        assert Profile.from_dict(data).to_dict() == profile.to_dict()
+
+    def test_pickle(self):
+        profile = Profile()
+        profile.record("stages", "evaluate", 0.1)
+        restored = pickle.loads(pickle.dumps(profile))
+        assert restored.to_dict() == profile.to_dict()
+        restored.record("stages", "evaluate", 0.1)
+
+    def test_format_table(self):
+        profile = Profile()
+        profile.record("stages", "template", 0.002)
+        profile.record("stages", "evaluate", 0.001)
+        for i in range(3):
+            profile.record("keys", f"K{i}", i / 1000)
+        table = profile.format_table(limit=2)
+        lines = table.splitlines()
+        assert lines[0].split() == ["Stages", "Calls", "Total", "ms", "Max", "ms"]
+        assert lines[1].split()[0] == "template"
+        assert lines[2].split()[0] == "evaluate"
+        assert [line.split()[0] for line in lines[5:7]] == ["K2", "K1"]
+        assert lines[7].strip() == "... 1 more"
+        assert "SQL" not in table
+
+
+class TestCollect:
+
+    def test_nothing_measured_by_default(self):
+        assert profiling.get_profile() is None
+        with measure("stages", "noop"):
+            pass
+
+    def test_collect_restores_previous(self):
+        outer, inner = Profile(), Profile()
+        with collect(outer):
+            with collect(inner):
+                assert profiling.get_profile() is inner
+            with collect(None):
+                assert profiling.get_profile() is outer
+        assert profiling.get_profile() is None
+
+    def test_activation_recompiles(self):
+        generation = FunctionRegistry.generation
+        with collect(Profile()):
+            assert FunctionRegistry.generation > generation
+            generation = FunctionRegistry.generation
+        assert FunctionRegistry.generation > generation
+
+    def test_keys_and_functions(self):
+        with collect(Profile()) as profile:
+            Evaluator({"RAW": "acme"}).evaluate_placeholders(
+                {"NAME": "UPPER(RAW)", "LINE": "CONCAT(NAME, '!')"}
+            )
+        assert set(profile.sections["keys"]) == {"NAME", "LINE"}
+        assert profile.sections["functions"]["UPPER"].count == 1
+        assert profile.sections["functions"]["CONCAT"].count == 1
+
+    def test_timed_only_while_active(self):
+        evaluator = Evaluator({"X": "A"})
+        evaluator.evaluate_value("LOWER(X)")
+        with collect(Profile()) as profile:
+            evaluator.evaluate_value("LOWER(X)")
+        assert profile.sections["functions"]["LOWER"].count == 1
+        evaluator.evaluate_value("LOWER(X)")
+        assert profile.sections["functions"]["LOWER"].count == 1
+
+    def test_memoized_across_values(self, counted):
+        calls = counted(scope="batch")
+        with collect(Profile()) as profile:
+            Evaluator({"A": 1}).evaluate_placeholders(
+                {"X": "COUNTED(A)", "Y": "COUNTED(A) + 1", "Z": "COUNTED(A) * 2"}
+            )
+        assert calls == [1]
+        # Cache hits are not timed: the count is of calls that ran.
+        assert profile.sections["functions"]["COUNTED"].count == 1
+
+    def test_sql(self):
+        sql_mod.init(":memory:")
+        try:
+            with collect(Profile()) as profile:
+                assert Evaluator().evaluate_value("SQL('SELECT 7')") == 7
+        finally:
+            sql_mod.close()
+        assert profile.sections["sql"]["SELECT 7"].count == 1
+        assert profile.sections["functions"]["SQL"].count == 1
+
+
+@pytest.fixture()
+def project(make_project):
+    return make_project(
+        'TOTAL: PRICE * 2\nGREETING: "Dear {UPPER(NAME)}"\n',
+        "{GREETING}, total {TOTAL}",
+    )
+
+
+class TestBatch:
+
+    RECORDS = [{"NAME": f"c{i}", "PRICE": i} for i in range(4)]
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_stages_aggregated(self, project, tmp_path, workers):
+        config, template, output = project
+        with collect(Profile()) as profile:
+            results = run_batch(
+                config,
+                template,
+                self.RECORDS,
+                output,
+                str(tmp_path / "db"),
+                workers=workers,
+                vectorize=False,
+            )
+        assert all(r.error is None and r.profile is None for r in results)
+        stages = profile.sections["stages"]
+        for name in ("on_start", "evaluate", "replace", "save", "on_end"):
+            assert stages[name].count == 4
+        assert profile.sections["keys"]["TOTAL"].count == 4
+        assert profile.sections["functions"]["UPPER"].count == 4
+
+    def test_vectorize_stage(self, project, tmp_path):
+        config, template, output = project
+        with collect(Profile()) as profile:
+            run_batch(config, template, self.RECORDS, output, str(tmp_path / "db"), 1)
+        assert profile.sections["stages"]["vectorize"].count == 1
+        assert "TOTAL" not in profile.sections["keys"]
@@ -0,0 +1,150 @@
+"""Tests for concurrent evaluation of independent placeholders."""
+
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+import document_placeholder.functions.math  # noqa: F401
+import document_placeholder.functions.sql as sql_mod
+from document_placeholder.dependencies import DependencyGraph
+from document_placeholder.evaluator import Evaluator
+from document_placeholder.functions import FunctionRegistry
+from document_placeholder.scheduler import (
+    evaluate_graph,
+    get_max_workers,
+    set_max_workers,
+)
+
+
+@pytest.fixture()
+def slow():
+    """SLOW(x, seconds) returns x after sleeping; records the thread used."""
+    threads: set[str] = set()
+
+    def slow(x, seconds=0):
+        threads.add(threading.current_thread().name)
+        time.sleep(seconds)
+        return x
+
+    FunctionRegistry.register("SLOW")(slow)
+    yield threads
+    FunctionRegistry._functions.pop("SLOW", None)
+
+
+@pytest.fixture()
+def rendezvous():
+    """MEET(x) blocks until two keys call it at the same time."""
+    barrier = threading.Barrier(2, timeout=5)
+
+    def meet(x):
+        barrier.wait()
+        return x
+
+    FunctionRegistry.register("MEET")(meet)
+    yield
+    FunctionRegistry._functions.pop("MEET", None)
+
+
+class TestSettings:
+
+    def test_default_is_sequential(self):
+        assert get_max_workers() == 1
+
+    def test_rejects_zero(self):
+        with pytest.raises(ValueError, match="at least 1"):
+            set_max_workers(0)
+
+    def test_set(self):
+        try:
+            set_max_workers(4)
+            assert get_max_workers() == 4
+        finally:
+            set_max_workers(1)
+
+
+class TestParallelEvaluation:
+
+    def test_independent_keys_run_concurrently(self, rendezvous):
+        values = Evaluator().evaluate_placeholders(
+            {"A": "MEET(1)", "B": "MEET(2)"}, max_workers=2
+        )
+        assert values == {"A": 1, "B": 2}
+
+    def test_sequential_runs_in_calling_thread(self, slow):
+        Evaluator().evaluate_placeholders({"A": "SLOW(1)", "B": "SLOW(2)"})
+        assert slow == {threading.current_thread().name}
+
+    def test_dependencies_respected(self, slow):
+        values = Evaluator().evaluate_placeholders(
+            {"C": "A + B", "A": "SLOW(1, 0.05)", "B": "SLOW(2)", "D": "C * 10"},
+            max_workers=4,
+        )
+        assert list(values) == ["C", "A", "B", "D"]
+        assert values == {"C": 3, "A": 1, "B": 2, "D": 30}
+
+    def test_first_error_in_order_is_raised(self, slow):
+        # B fails long before A; the error of A is raised regardless.
+        placeholders = {"A": "SLOW(1, 0.1) / 0", "B": "MISSING_FUNC()"}
+        with pytest.raises(ZeroDivisionError):
+            Evaluator().evaluate_placeholders(placeholders, max_workers=2)
+
+    def test_errors_per_key(self, slow):
+        errors: dict = {}
+        values = Evaluator().evaluate_placeholders(
+            {"A": "1 / 0", "B": "A + 1", "C": "SLOW(3)", "D": "C + 1"},
+            errors=errors,
+            max_workers=3,
+        )
+        assert values == {"C": 3, "D": 4}
+        assert list(errors) == ["A", "B"]
+        assert isinstance(errors["A"], ZeroDivisionError)
+        assert str(errors["B"]) == "A could not be evaluated"
+
+    def test_same_result_as_sequential(self, slow):
+        placeholders = {
+            f"K{i}": f"SLOW({i}, 0.001) + " + (f"K{i - 1}" if i % 3 else "0")
+            for i in range(20)
+        }
+        sequential = Evaluator().evaluate_placeholders(placeholders)
+        parallel = Evaluator().evaluate_placeholders(placeholders, max_workers=8)
+        assert list(parallel.items()) == list(sequential.items())
+
+    def test_evaluate_graph_calls_each_key_once(self):
+        graph = DependencyGraph({"A": "1", "B": "A", "C": "A"})
+        calls: list[str] = []
+        lock = threading.Lock()
+
+        def evaluate(key):
+            with lock:
+                calls.append(key)
+            return key.lower()
+
+        assert evaluate_graph(graph, evaluate, max_workers=3) == {
+            "A": "a",
+            "B": "b",
+            "C": "c",
+        }
+        assert sorted(calls) == ["A", "B", "C"]
+
+
+class TestSqlFromThreads:
+
+    def test_shared_connection(self):
+        sql_mod.init(":memory:")
+        try:
+            sql_mod.sql("CREATE TABLE t (v INTEGER)")
+            sql_mod.sql("INSERT INTO t VALUES (21)")
+            values = Evaluator().evaluate_placeholders(
+                {
+                    "A": "SQL('SELECT v FROM t')",
+                    "B": "SQL('SELECT v * 2 FROM t')",
+                    "C": "A + B",
+                },
+                max_workers=2,
+            )
+            assert values == {"A": 21, "B": 42, "C": 63}
+        finally:
+            sql_mod.close()
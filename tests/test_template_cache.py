@@ -0,0 +1,149 @@
+"""Tests for the parsed-template LRU cache."""
+
+from __future__ import annotations
+
+import os
+
+import pytest
+from docx import Document
+
+from document_placeholder.processor import DocumentProcessor
+from document_placeholder.template_cache import (
+    CacheInfo,
+    TemplateCache,
+    get_template_cache,
+)
+
+
+@pytest.fixture()
+def make_docx(tmp_path):
+    def _make(name: str, text: str) -> str:
+        doc = Document()
+        doc.add_paragraph(text)
+        path = tmp_path / name
+        doc.save(str(path))
+        return str(path)
+
+    return _make
+
+
+class TestHitsAndMisses:
+
+    def test_first_load_is_miss(self, make_docx):
+        cache = TemplateCache()
+        cache.load(make_docx("a.docx", "A"))
+        info = cache.info()
+        assert (info.hits, info.misses, info.size) == (0, 1, 1)
+
+    def test_second_load_is_hit(self, make_docx):
+        cache = TemplateCache()
+        path = make_docx("a.docx", "A")
+        cache.load(path)
+        cache.load(path)
+        assert (cache.info().hits, cache.info().misses) == (1, 1)
+
+    def test_same_content_different_path_shares_entry(self, make_docx, tmp_path):
+        cache = TemplateCache()
+        path = make_docx("a.docx", "A")
+        copy_path = tmp_path / "b.docx"
+        copy_path.write_bytes(open(path, "rb").read())
+        cache.load(path)
+        cache.load(copy_path)
+        assert cache.info().size == 1
+        assert cache.info().hits == 1
+
+    def test_modified_file_is_reloaded(self, make_docx):
+        cache = TemplateCache()
+        path = make_docx("a.docx", "old")
+        assert cache.load(path).paragraphs[0].text == "old"
+        make_docx("a.docx", "new text")
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+        assert cache.load(path).paragraphs[0].text == "new text"
+        assert cache.info().misses == 2
+
+    def test_touched_but_unchanged_is_hit(self, make_docx):
+        cache = TemplateCache()
+        path = make_docx("a.docx", "A")
+        cache.load(path)
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+        cache.load(path)
+        assert (cache.info().hits, cache.info().misses) == (1, 1)
+
+    def test_missing_file(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            TemplateCache().load(tmp_path / "nope.docx")
+
+
+class TestCopies:
+
+    def test_copies_are_independent(self, make_docx):
+        cache = TemplateCache()
+        path = make_docx("a.docx", "original")
+        first = cache.load(path)
+        first.paragraphs[0].text = "changed"
+        second = cache.load(path)
+        assert second.paragraphs[0].text == "original"
+
+    def test_copy_can_be_saved(self, make_docx, tmp_path):
+        cache = TemplateCache()
+        path = make_docx("a.docx", "A")
+        cache.load(path)
+        doc = cache.load(path)
+        doc.paragraphs[0].text = "saved"
+        out = tmp_path / "out.docx"
+        doc.save(str(out))
+        assert Document(str(out)).paragraphs[0].text == "saved"
+
+
+class TestEviction:
+
+    def test_lru_eviction(self, make_docx):
+        cache = TemplateCache(maxsize=2)
+        a = make_docx("a.docx", "A")
+        b = make_docx("b.docx", "B")
+        c = make_docx("c.docx", "C")
+        cache.load(a)
+        cache.load(b)
+        cache.load(a)  # a is now most recently used
+        cache.load(c)  # evicts b
+        assert cache.info().evictions == 1
+        cache.load(a)
+        assert cache.info().hits == 2
+        cache.load(b)
+        assert cache.info().misses == 4
+
+    def test_shrinking_maxsize_evicts(self, make_docx):
+        cache = TemplateCache(maxsize=4)
+        for name in ("a", "b", "c"):
+            cache.load(make_docx(f"{name}.docx", name))
+        cache.maxsize = 1
+        assert cache.info().size == 1
+        assert cache.info().evictions == 2
+
+    def test_zero_maxsize_disables_cache(self, make_docx):
+        cache = TemplateCache(maxsize=0)
+        path = make_docx("a.docx", "A")
+        cache.load(path)
+        cache.load(path)
+        assert (cache.info().hits, cache.info().misses, cache.info().size) == (0, 2, 0)
+
+    def test_clear(self, make_docx):
+        cache = TemplateCache()
+        cache.load(make_docx("a.docx", "A"))
+        cache.clear()
+        assert cache.info() == CacheInfo(0, 0, 0, 0, cache.maxsize)
+
+
+class TestDefaultCache:
+
+    def test_processor_uses_default_cache(self, make_docx):
+        cache = get_template_cache()
+        path = make_docx("a.docx", "{X}")
+        before = cache.info()
+        DocumentProcessor(path)
+        DocumentProcessor(path)
+        after = cache.info()
+        assert after.hits + after.misses - before.hits - before.misses == 2
+        assert after.hits > before.hits
@@ -0,0 +1,234 @@
+"""Tests for column-wise evaluation of config values."""
+
+from __future__ import annotations
+
+import random
+
+import pytest
+
+import document_placeholder.functions.date  # noqa: F401
+import document_placeholder.functions.logic  # noqa: F401
+import document_placeholder.functions.math  # noqa: F401
+import document_placeholder.functions.sql  # noqa: F401
+import document_placeholder.functions.string  # noqa: F401
+from document_placeholder import vectorized
+from document_placeholder.call_cache import CallCache
+from document_placeholder.evaluator import Evaluator
+from document_placeholder.functions import FunctionRegistry
+from document_placeholder.vectorized import ColumnEvaluator, NotVectorizableError
+
+RECORDS = [
+    {"NAME": "acme", "PRICE": 12.5, "QTY": 3, "CITY": " Berlin "},
+    {"NAME": "globex", "PRICE": 7.0, "QTY": -2, "CITY": "Paris"},
+    {"NAME": "initech", "PRICE": -0.5, "QTY": 0, "CITY": "Rome"},
+    {"NAME": "a", "PRICE": 1000.25, "QTY": 7, "CITY": ""},
+]
+
+
+def _rows(value, records=RECORDS):
+    return [Evaluator(record).evaluate_value(value) for record in records]
+
+
+@pytest.fixture()
+def columns():
+    return ColumnEvaluator.from_records(RECORDS)
+
+
+class TestMatchesRowByRow:
+
+    @pytest.mark.parametrize(
+        "value",
+        [
+            "PRICE * QTY",
+            "PRICE / 4",
+            "QTY % 3",
+            "-QTY + PRICE",
+            "PRICE > 10",
+            "QTY == 3",
+            "QTY * 1.5 - PRICE",
+            "UPPER(NAME)",
+            "TRIM(CITY)",
+            "LEN(NAME) * 2",
+            "REPLACE(NAME, 'a', 'o')",
+            "CONCAT(NAME, '-', QTY)",
+            "ROUND(PRICE * 1.2, 1)",
+            "FORMAT_NUM(PRICE)",
+            "SUBSTR(NAME, 1, 2)",
+            "IF(QTY > 2, 'many', 'few')",
+            "COALESCE(MISSING, NAME)",
+            "CURRENT_DATE_STR(month)",
+            "Dear {UPPER(NAME)}, {QTY} x {PRICE}",
+            "plain text",
+            42,
+            None,
+        ],
+    )
+    def test_value(self, columns, value):
+        result = columns.evaluate_value(value)
+        assert result == _rows(value)
+        assert [type(v) for v in result] == [type(v) for v in _rows(value)]
+
+    def test_large_integers_stay_exact(self):
+        records = [{"N": 2**40 + i} for i in range(3)]
+        evaluator = ColumnEvaluator.from_records(records)
+        assert evaluator.evaluate_value("N * N * N") == _rows("N * N * N", records)
+
+    @pytest.mark.filterwarnings("error::RuntimeWarning")
+    @pytest.mark.parametrize("seed", range(5))
+    def test_integers_near_int64_limit(self, seed):
+        rng = random.Random(seed)
+        near = [2**62, 2**63 - 1, -(2**63), 2**31 - 1, -(2**31), 2**31, 3, -7]
+        records = [
+            {"A": rng.choice(near) + rng.randint(-3, 3), "B": rng.choice(near)}
+            for _ in range(6)
+        ]
+        evaluator = ColumnEvaluator.from_records(records)
+        for value in (
+            "A + B",
+            "A - B",
+            "A * B",
+            "-A * 2",
+            "A * 3 + B",
+            "A % 7",
+            "A / 3",
+            "A > B",
+            "A * 1.5",
+        ):
+            assert evaluator.evaluate_value(value) == _rows(value, records), value
+        placeholders = {"P": "A * A", "Q": "P * 2 + B", "R": "-Q"}
+        values = evaluator.evaluate_placeholders(placeholders)
+        for key, column in values.items():
+            assert column == [
+                Evaluator(record).evaluate_placeholders(placeholders)[key]
+                for record in records
+            ]
+
+    def test_mixed_int_and_float_column(self):
+        records = [{"N": 1}, {"N": 2.5}]
+        evaluator = ColumnEvaluator.from_records(records)
+        assert evaluator.evaluate_value("N + 1") == [2, 3.5]
+        assert type(evaluator.evaluate_value("N + 1")[0]) is int
+
+
+class TestErrors:
+
+    def test_impure_function_rejected(self, columns):
+        with pytest.raises(NotVectorizableError, match="RANDOM_INT"):
+            columns.evaluate_value("RANDOM_INT(1, 6)")
+
+    def test_sql_rejected(self, columns):
+        with pytest.raises(NotVectorizableError):
+            columns.evaluate_value("SQL('SELECT 1')")
+
+    def test_unknown_function_rejected(self, columns):
+        with pytest.raises(NotVectorizableError):
+            columns.evaluate_value("NO_SUCH_FN(NAME)")
+
+    def test_row_error_raised(self, columns):
+        with pytest.raises(ZeroDivisionError):
+            columns.evaluate_value("PRICE / QTY")
+
+    def test_type_error_raised(self, columns):
+        with pytest.raises(TypeError):
+            columns.evaluate_value("NAME + 1")
+
+    def test_unequal_columns(self):
+        with pytest.raises(ValueError, match="same length"):
+            ColumnEvaluator({"A": [1, 2], "B": [1]})
+
+    def test_records_with_different_fields(self):
+        with pytest.raises(ValueError, match="same fields"):
+            ColumnEvaluator.from_records([{"A": 1}, {"B": 2}])
+
+
+class TestPlaceholders:
+
+    def test_keys_become_columns(self, columns):
+        values = columns.evaluate_placeholders(
+            {"GREETING": "Dear {NAME} ({TOTAL})", "TOTAL": "NET + 1", "NET": "QTY * 2"}
+        )
+        assert list(values) == ["GREETING", "TOTAL", "NET"]
+        assert values["TOTAL"] == [7, -3, 1, 15]
+        assert values["GREETING"][0] == "Dear acme (7)"
+
+    def test_non_vectorizable_keys_left_out(self, columns):
+        values = columns.evaluate_placeholders(
+            {
+                "ROLL": "RANDOM_INT(1, 6)",
+                "TOTAL": "ROLL + QTY",
+                "UNIT": "PRICE / QTY",
+                "LABEL": "UPPER(NAME)",
+            }
+        )
+        assert list(values) == ["LABEL"]
+
+    def test_fields_take_precedence(self, columns):
+        values = columns.evaluate_placeholders({"QTY": "100", "DOUBLE": "QTY * 2"})
+        assert values["DOUBLE"] == [6, -4, 0, 14]
+
+    def test_batch_scope_calls_shared(self):
+        calls = []
+
+        def stamp(kind):
+            calls.append(kind)
+            return "stamp"
+
+        FunctionRegistry.register("STAMP", scope="batch")(stamp)
+        try:
+            cache = CallCache()
+            evaluator = ColumnEvaluator.from_records(RECORDS, call_cache=cache)
+            assert evaluator.evaluate_value("NAME + STAMP('x')")[0] == "acmestamp"
+            Evaluator(RECORDS[0], call_cache=cache).evaluate_value("STAMP('x')")
+        finally:
+            FunctionRegistry._functions.pop("STAMP", None)
+            FunctionRegistry._info.pop("STAMP", None)
+        assert calls == ["x"]
+
+
+class TestKernels:
+
+    def test_kernel_used(self, columns):
+        assert FunctionRegistry.get_kernel("UPPER") is not None
+        assert columns.evaluate_value("UPPER(NAME)") == [
+            "ACME",
+            "GLOBEX",
+            "INITECH",
+            "A",
+        ]
+
+    def test_kernel_dropped_when_function_replaced(self):
+        original = FunctionRegistry.get("LOWER")
+        FunctionRegistry.register("LOWER", pure=True)(lambda text: "replaced")
+        try:
+            assert FunctionRegistry.get_kernel("LOWER") is None
+            evaluator = ColumnEvaluator.from_records(RECORDS)
+            assert evaluator.evaluate_value("LOWER(NAME)") == ["replaced"] * 4
+        finally:
+            FunctionRegistry.register("LOWER", pure=True)(original)
+        assert FunctionRegistry.get_kernel("LOWER") is not None
+
+    def test_kernel_for_unknown_function(self):
+        with pytest.raises(ValueError, match="Unknown function"):
+            FunctionRegistry.kernel("NO_SUCH_FN")(lambda column: column)
+
+
+@pytest.mark.skipif(not vectorized.available(), reason="NumPy is not installed")
+class TestNumpy:
+
+    def test_array_columns(self):
+        import numpy as np
+
+        evaluator = ColumnEvaluator(
+            {"PRICE": np.array([1.5, 2.0]), "QTY": np.array([2, 3])}
+        )
+        result = evaluator.evaluate_value("PRICE * QTY + 1")
+        assert result == [4.0, 7.0]
+        assert all(type(v) is float for v in result)
+
+    def test_comparison_gives_bools(self, columns):
+        assert columns.evaluate_value("QTY > 0") == [True, False, False, True]
+        assert all(type(v) is bool for v in columns.evaluate_value("QTY > 0"))
+
+    def test_division_by_zero_falls_back(self, columns):
+        with pytest.raises(ZeroDivisionError):
+            columns.evaluate_value("QTY / QTY")